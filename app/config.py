@@ -0,0 +1,216 @@
+"""Configuration de l'application, lue depuis les variables d'environnement.
+
+Tous les réglages sont rassemblés dans `Settings`, passé à
+`app.main.create_app`. Chaque processus de travail (`uvicorn --workers N`)
+relit la même configuration : les secrets doivent donc être fournis par
+l'environnement et identiques pour tous les processus, sans quoi un cookie
+signé par l'un serait refusé par les autres.
+
+Variables reconnues (valeur par défaut entre parenthèses) :
+    SECRET_KEY, SESSION_SECRET_KEY  secrets des cookies (valeurs de développement)
+    DATABASE_URL                    URL SQLAlchemy (sqlite:///./vault.db)
+    DB_POOL_SIZE, DB_MAX_OVERFLOW   pool de connexions (5, 10)
+    BCRYPT_ROUNDS                   coût bcrypt des nouveaux hachages (12)
+    GENERATOR_PROCESSES             processus du pool de génération (nombre de cœurs)
+    RATE_LIMITS, RATE_LIMIT_BUCKETS limites de débit (voir `app.middleware.ratelimit`), 10000 seaux
+    METRICS_TOKEN                   jeton exigé par `/metrics` (aucun : clients locaux seulement)
+    SQL_DEBUG, SQL_REPEAT_THRESHOLD détection des N+1 (off, 5)
+    PROFILING_ENABLED, PROFILING_TOKEN, PROFILING_SAMPLE_RATE,
+    PROFILING_DIR, PROFILING_KEEP   profilage à la demande (0, "", 0, profiles, 50)
+    JINJA_BYTECODE_CACHE_DIR        cache du bytecode des templates (répertoire temporaire)
+    LOOP_WATCHDOG_ENABLED,
+    LOOP_BLOCK_THRESHOLD_MS         détection des blocages de la boucle d'événements (0, 100)
+    SEARCH_INDEX_IDLE_SECONDS,
+    SEARCH_INDEX_MAX                index de recherche en mémoire : inactivité, nombre (900, 200)
+    SESSION_MAX_AGE                 validité du cookie `session_token`, en secondes (28800)
+    KEYRING_IDLE_SECONDS,
+    KEYRING_MAX_KEYS                trousseau des clés de coffre : inactivité, nombre (900, 10000)
+    AUDIT_ENABLED, AUDIT_QUEUE_SIZE,
+    AUDIT_BATCH_SIZE, AUDIT_FLUSH_MS,
+    AUDIT_BACKPRESSURE              journal d'audit asynchrone (1, 10000, 500, 200, drop)
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from collections.abc import Mapping
+from dataclasses import dataclass, fields
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Valeurs historiques : les cookies déjà émis restent valides en développement
+DEV_SECRET_KEY = "SECRET_KEY"
+DEV_SESSION_SECRET_KEY = "your-secret-key"
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Réglages de l'application.
+
+    Attributs :
+        secret_key (str) : Secret du cookie `session_token` et de la clé du coffre chiffrée en session.
+        session_secret_key (str) : Secret du cookie de session Starlette (clé du coffre).
+        database_url (str) : URL de la base de données.
+        db_pool_size (int) : Connexions conservées par processus.
+        db_max_overflow (int) : Connexions supplémentaires temporaires par processus.
+        bcrypt_rounds (int) : Coût bcrypt des nouveaux hachages.
+        generator_processes (Optional[int]) : Processus du pool de génération.
+        rate_limits (str) : Surcharge des limites de débit, ex. "login=10/60".
+        rate_limit_buckets (int) : Nombre maximal de seaux du limiteur.
+        metrics_token (Optional[str]) : Jeton exigé par `/metrics` (None : clients locaux seulement).
+        sql_debug (str) : Détection des N+1 : "off", "warn" ou "raise".
+        sql_repeat_threshold (int) : Répétitions d'une instruction signalant un N+1.
+        profiling_enabled (bool) : Active le middleware de profilage.
+        profiling_token (str) : Jeton attendu dans l'en-tête `X-Profile`.
+        profiling_sample_rate (float) : Proportion de requêtes profilées au hasard.
+        profiling_dir (str) : Répertoire des profils.
+        profiling_keep (int) : Nombre de profils conservés.
+        jinja_bytecode_cache_dir (Optional[str]) : Répertoire du cache de bytecode Jinja.
+        loop_watchdog_enabled (bool) : Active la détection des blocages de la boucle.
+        loop_block_threshold_ms (float) : Durée de blocage signalée, en millisecondes.
+        search_index_idle_seconds (float) : Inactivité avant suppression d'un index de recherche.
+        search_index_max (int) : Nombre maximal d'index de recherche en mémoire.
+        session_max_age (int) : Validité du cookie `session_token`, en secondes.
+        keyring_idle_seconds (float) : Inactivité avant l'oubli d'une clé de coffre.
+        keyring_max_keys (int) : Nombre maximal de clés de coffre en mémoire.
+        audit_enabled (bool) : Enregistre le journal d'audit.
+        audit_queue_size (int) : Capacité de la file des événements d'audit.
+        audit_batch_size (int) : Événements écrits par transaction.
+        audit_flush_ms (float) : Attente maximale d'un événement avant écriture, en millisecondes.
+        audit_backpressure (str) : File pleine : "drop" (abandon) ou "block" (attente bornée).
+    """
+
+    secret_key: str = DEV_SECRET_KEY
+    session_secret_key: str = DEV_SESSION_SECRET_KEY
+    database_url: str = "sqlite:///./vault.db"
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    bcrypt_rounds: int = 12
+    generator_processes: Optional[int] = None
+    rate_limits: str = ""
+    rate_limit_buckets: int = 10_000
+    metrics_token: Optional[str] = None
+    sql_debug: str = "off"
+    sql_repeat_threshold: int = 5
+    profiling_enabled: bool = False
+    profiling_token: str = ""
+    profiling_sample_rate: float = 0.0
+    profiling_dir: str = "profiles"
+    profiling_keep: int = 50
+    jinja_bytecode_cache_dir: Optional[str] = None
+    loop_watchdog_enabled: bool = False
+    loop_block_threshold_ms: float = 100.0
+    search_index_idle_seconds: float = 900.0
+    search_index_max: int = 200
+    session_max_age: int = 8 * 3600
+    keyring_idle_seconds: float = 900.0
+    keyring_max_keys: int = 10_000
+    audit_enabled: bool = True
+    audit_queue_size: int = 10_000
+    audit_batch_size: int = 500
+    audit_flush_ms: float = 200.0
+    audit_backpressure: str = "drop"
+
+    @classmethod
+    def from_env(cls, environ: Optional[Mapping[str, str]] = None) -> Settings:
+        """Construit les réglages depuis les variables d'environnement.
+
+        Le nom de chaque variable est celui du champ en majuscules
+        (ex. `DATABASE_URL`). Une variable absente ou vide garde la valeur par défaut.
+
+        Arguments:
+            environ (Optional[Mapping[str, str]]): Les variables (par défaut `os.environ`).
+
+        Returns:
+            Settings: Les réglages.
+
+        Raises:
+            ValueError: Si une valeur ne peut pas être convertie ou est hors limites.
+
+        """
+        environ = os.environ if environ is None else environ
+        values = {}
+        for field in fields(cls):
+            raw = environ.get(field.name.upper(), "").strip()
+            if not raw:
+                continue
+            try:
+                values[field.name] = _convert(field.type, raw)
+            except ValueError:
+                msg = f"{field.name.upper()} invalide : {raw!r}"
+                raise ValueError(msg) from None
+        for name in ("sql_debug", "audit_backpressure"):
+            if name in values:
+                values[name] = values[name].lower()
+        settings = cls(**values)
+        settings.validate()
+        return settings
+
+    def validate(self) -> None:
+        """Vérifie la cohérence des réglages.
+
+        Raises:
+            ValueError: Si un réglage est hors limites.
+
+        """
+        if self.sql_debug not in ("off", "warn", "raise"):
+            msg = f"SQL_DEBUG invalide : {self.sql_debug!r} (off, warn ou raise)"
+            raise ValueError(msg)
+        if not 4 <= self.bcrypt_rounds <= 31:
+            msg = f"BCRYPT_ROUNDS doit être compris entre 4 et 31 : {self.bcrypt_rounds}"
+            raise ValueError(msg)
+        if self.loop_block_threshold_ms <= 0:
+            msg = f"LOOP_BLOCK_THRESHOLD_MS doit être positif : {self.loop_block_threshold_ms}"
+            raise ValueError(msg)
+        if self.search_index_idle_seconds <= 0 or self.search_index_max < 1:
+            msg = "SEARCH_INDEX_IDLE_SECONDS et SEARCH_INDEX_MAX doivent être positifs"
+            raise ValueError(msg)
+        if self.session_max_age <= 0 or self.keyring_idle_seconds <= 0 or self.keyring_max_keys < 1:
+            msg = "SESSION_MAX_AGE, KEYRING_IDLE_SECONDS et KEYRING_MAX_KEYS doivent être positifs"
+            raise ValueError(msg)
+        if self.audit_backpressure not in ("drop", "block"):
+            msg = f"AUDIT_BACKPRESSURE invalide : {self.audit_backpressure!r} (drop ou block)"
+            raise ValueError(msg)
+        if self.audit_queue_size < 1 or self.audit_batch_size < 1 or self.audit_flush_ms <= 0:
+            msg = "AUDIT_QUEUE_SIZE, AUDIT_BATCH_SIZE et AUDIT_FLUSH_MS doivent être positifs"
+            raise ValueError(msg)
+        if not 0 <= self.profiling_sample_rate <= 1:
+            msg = f"PROFILING_SAMPLE_RATE doit être compris entre 0 et 1 : {self.profiling_sample_rate}"
+            raise ValueError(msg)
+
+    def warn_insecure(self) -> None:
+        """Signale dans les logs les secrets de développement encore utilisés."""
+        if self.secret_key == DEV_SECRET_KEY or self.session_secret_key == DEV_SESSION_SECRET_KEY:
+            logger.warning(
+                "SECRET_KEY ou SESSION_SECRET_KEY n'est pas défini : secrets de développement utilisés, "
+                "à ne pas déployer en production.",
+            )
+
+
+def _convert(annotation: str, raw: str) -> object:
+    """Convertit une valeur d'environnement selon l'annotation du champ.
+
+    Arguments:
+        annotation (str): L'annotation du champ (chaîne, annotations différées).
+        raw (str): La valeur lue.
+
+    Returns:
+        object: La valeur convertie.
+
+    Raises:
+        ValueError: Si la valeur ne peut pas être convertie.
+
+    """
+    if "bool" in annotation:
+        if raw.lower() in ("1", "true", "yes", "on"):
+            return True
+        if raw.lower() in ("0", "false", "no", "off"):
+            return False
+        raise ValueError(raw)
+    if "int" in annotation:
+        return int(raw)
+    if "float" in annotation:
+        return float(raw)
+    return raw
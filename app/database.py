@@ -1,25 +1,150 @@
 """Ce module gère la connexion à la base de données et les sessions."""
 
-from sqlalchemy import create_engine
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Optional
+
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.schema import CreateColumn
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from starlette.requests import Request
+
+from app.services import query_stats
 
-DATABASE_URL = "sqlite:///./vault.db"  # Tu peux switcher vers PostgreSQL
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Engine
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    from app.config import Settings
+
+# Base des outils hors serveur (`configure_database`) ; chaque application
+# construite par `create_app` a son propre moteur dans `app.state`
+engine: Optional[Engine] = None
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
 Base = declarative_base()
 
 
-def get_db():
-    """Permet d'obtenir une session de base de données.
+def create_database_engine(settings: Settings) -> Engine:
+    """Crée un moteur pour la base configurée, avec son pool de connexions.
+
+    Arguments:
+        settings (Settings): Les réglages de l'application.
+
+    Returns:
+        Engine: Le moteur SQLAlchemy, instrumenté par `query_stats`.
+
+    """
+    options = {}
+    if settings.database_url.startswith("sqlite"):
+        # Les routes synchrones s'exécutent dans le pool de threads
+        options["connect_args"] = {"check_same_thread": False}
+    if settings.database_url not in ("sqlite://", "sqlite:///:memory:"):
+        options["pool_size"] = settings.db_pool_size
+        options["max_overflow"] = settings.db_max_overflow
+    created = create_engine(settings.database_url, **options)
+    query_stats.instrument(created)
+    return created
+
+
+def create_session_factory(bind: Engine) -> sessionmaker:
+    """Crée la fabrique de sessions d'un moteur.
+
+    Arguments:
+        bind (Engine): Le moteur.
+
+    Returns:
+        sessionmaker: La fabrique de sessions.
+
+    """
+    return sessionmaker(bind=bind, autocommit=False, autoflush=False)
+
+
+def configure_database(settings: Settings) -> Engine:
+    """Crée le moteur des outils hors serveur (`seed`...) et y lie `SessionLocal`.
+
+    Un moteur déjà créé est libéré : ses connexions ne sont plus utilisées.
+    Les applications de `create_app` ne l'utilisent pas.
+
+    Arguments:
+        settings (Settings): Les réglages.
+
+    Returns:
+        Engine: Le moteur SQLAlchemy.
+
+    """
+    global engine
+    if engine is not None:
+        engine.dispose()
+    engine = create_database_engine(settings)
+    SessionLocal.configure(bind=engine)
+    return engine
+
+
+def get_db(request: Request):
+    """Permet d'obtenir une session sur la base de l'application qui sert la requête.
+
+    Arguments:
+        request (Request): La requête HTTP.
 
     Returns:
         Session: La session de base de données.
 
     """
-    db = SessionLocal()
+    db = request.app.state.session_factory()
     try:
         yield db
     finally:
         db.close()
+
+
+def init_db(bind: Optional[Engine] = None) -> None:
+    """Crée les tables manquantes puis met à jour le schéma des tables existantes.
+
+    Appelée au démarrage de l'application (lifespan) et par les outils qui
+    utilisent la base sans passer par le serveur.
+
+    Arguments:
+        bind (Optional[Engine]): Le moteur (par défaut, celui de `configure_database`).
+
+    """
+    # Les modèles doivent être importés pour être connus de `Base.metadata`
+    from app import models  # noqa: F401
+
+    bind = bind or engine
+    Base.metadata.create_all(bind=bind)
+    upgrade_schema(bind)
+
+
+def upgrade_schema(bind: Optional[Engine] = None) -> None:
+    """Ajoute aux tables existantes les colonnes déclarées depuis leur création.
+
+    `Base.metadata.create_all` ne modifie pas une table déjà présente : les
+    nouvelles colonnes (nullables ou avec une valeur par défaut SQL) sont donc
+    ajoutées ici par `ALTER TABLE`, sans toucher aux données. La définition de
+    la colonne (type, `DEFAULT`, `NOT NULL`) est compilée par le dialecte.
+
+    Arguments:
+        bind (Optional[Engine]): Le moteur (par défaut, celui de `configure_database`).
+
+    Raises:
+        RuntimeError: Si une colonne `NOT NULL` sans valeur par défaut SQL manque :
+            les lignes existantes n'auraient pas de valeur, la migration est manuelle.
+    """
+    bind = bind or engine
+    inspector = inspect(bind)
+    with bind.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                if not column.nullable and column.server_default is None:
+                    msg = f"{table.name}.{column.name} est NOT NULL sans valeur par défaut SQL : migration manuelle requise"
+                    raise RuntimeError(msg)
+                definition = CreateColumn(column).compile(dialect=bind.dialect)
+                table_name = bind.dialect.identifier_preparer.format_table(table)
+                connection.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {definition}"))
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
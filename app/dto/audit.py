@@ -0,0 +1,40 @@
+"""Classe avec les DTO du journal d'audit."""
+
+import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class AuditEventOut(BaseModel):
+    """DTO utilisé lors de la consultation d'un événement d'audit.
+
+    Attributs :
+        id (int) : Identifiant de l'événement (croissant).
+        created_at (datetime) : Date de l'événement (UTC).
+        action (str) : Type d'événement (`login`, `entry_update`, `share_access`...).
+        entry_id (Optional[int]) : Entrée du coffre concernée.
+        ip (Optional[str]) : Adresse du client.
+        detail (Optional[str]) : Précision libre.
+
+    """
+
+    id: int
+    created_at: datetime.datetime
+    action: str
+    entry_id: Optional[int]
+    ip: Optional[str]
+    detail: Optional[str]
+
+
+class AuditEventList(BaseModel):
+    """DTO utilisé lors de la consultation du journal d'audit.
+
+    Attributs :
+        items (list[AuditEventOut]) : Les événements, du plus récent au plus ancien.
+        next_before_id (Optional[int]) : Valeur de `before_id` pour la page suivante (None si dernière page).
+
+    """
+
+    items: list[AuditEventOut]
+    next_before_id: Optional[int]
@@ -1,6 +1,8 @@
 """Classe avec les DTO pour les MDP."""
 
-from pydantic import BaseModel
+from typing import Annotated, Literal, Optional, Union
+
+from pydantic import BaseModel, Field
 
 
 class PasswordOut(BaseModel):
@@ -34,3 +36,158 @@ class PasswordOut(BaseModel):
         """
 
         from_attributes = True
+
+
+class PasswordIn(BaseModel):
+    """DTO utilisé lors de la création d'un mot de passe via l'API.
+
+    Attributs :
+        title (str) : Titre de l'entrée de mot de passe.
+        username (str) : Nom d'utilisateur associé à l'entrée.
+        url (str) : URL du service associé.
+        email (str) : Adresse e-mail liée à l'entrée.
+        password (str) : Mot de passe en clair.
+
+    """
+
+    title: str
+    username: str = ""
+    url: str = ""
+    email: str = ""
+    password: str
+
+
+class PasswordUpdate(BaseModel):
+    """DTO utilisé lors de la mise à jour partielle d'un mot de passe via l'API.
+
+    Seuls les champs fournis sont chiffrés à nouveau.
+
+    Attributs :
+        title (str | None) : Nouveau titre.
+        username (str | None) : Nouveau nom d'utilisateur.
+        url (str | None) : Nouvelle URL.
+        email (str | None) : Nouvelle adresse e-mail.
+        password (str | None) : Nouveau mot de passe en clair.
+
+    """
+
+    title: Optional[str] = None
+    username: Optional[str] = None
+    url: Optional[str] = None
+    email: Optional[str] = None
+    password: Optional[str] = None
+
+
+class PasswordList(BaseModel):
+    """DTO utilisé lors du listing des mots de passe via l'API.
+
+    Attributs :
+        items (list[PasswordOut]) : Les entrées, réduites aux champs demandés par `fields`.
+
+    """
+
+    items: list[PasswordOut]
+
+
+class ClientKeyRequest(BaseModel):
+    """DTO utilisé pour demander la clé du coffre enveloppée pour le navigateur.
+
+    Attributs :
+        public_key (str) : Clé publique ECDH P-256 du navigateur (format brut, base64).
+
+    """
+
+    public_key: str
+
+
+class BatchAdd(BaseModel):
+    """Opération de lot : création d'une entrée.
+
+    Attributs :
+        op (str) : "add".
+        data (PasswordIn) : Les données en clair de l'entrée.
+
+    """
+
+    op: Literal["add"]
+    data: PasswordIn
+
+
+class BatchUpdate(BaseModel):
+    """Opération de lot : mise à jour partielle d'une entrée.
+
+    Attributs :
+        op (str) : "update".
+        id (int) : Identifiant de l'entrée.
+        data (PasswordUpdate) : Les champs à modifier.
+
+    """
+
+    op: Literal["update"]
+    id: int
+    data: PasswordUpdate
+
+
+class BatchDelete(BaseModel):
+    """Opération de lot : suppression d'une entrée.
+
+    Attributs :
+        op (str) : "delete".
+        id (int) : Identifiant de l'entrée.
+
+    """
+
+    op: Literal["delete"]
+    id: int
+
+
+BatchOperation = Annotated[Union[BatchAdd, BatchUpdate, BatchDelete], Field(discriminator="op")]
+
+
+class BatchRequest(BaseModel):
+    """DTO utilisé pour appliquer plusieurs opérations en une seule transaction.
+
+    Attributs :
+        operations (list[BatchOperation]) : Les opérations, appliquées dans l'ordre.
+        atomic (bool) : Si une opération échoue, n'en appliquer aucune.
+
+    """
+
+    operations: list[BatchOperation] = Field(min_length=1, max_length=1000)
+    atomic: bool = True
+
+
+class BatchResult(BaseModel):
+    """Résultat d'une opération de lot.
+
+    Attributs :
+        index (int) : Position de l'opération dans la requête.
+        op (str) : Le type d'opération.
+        id (int | None) : Identifiant de l'entrée (créée ou visée).
+        status (int) : Code de statut HTTP de l'opération (201, 200, 204, 404, 409).
+        complexity (int | None) : Complexité du mot de passe après l'opération.
+        detail (str | None) : La raison d'un échec.
+
+    """
+
+    index: int
+    op: str
+    id: Optional[int] = None
+    status: int
+    complexity: Optional[int] = None
+    detail: Optional[str] = None
+
+
+class BatchResponse(BaseModel):
+    """DTO renvoyé par l'endpoint de lot.
+
+    Attributs :
+        applied (bool) : Les opérations réussies ont été enregistrées.
+        revision (int) : La révision du coffre après le lot.
+        results (list[BatchResult]) : Un résultat par opération, dans l'ordre.
+
+    """
+
+    applied: bool
+    revision: int
+    results: list[BatchResult]
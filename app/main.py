@@ -1,46 +1,83 @@
 """FastAPI application entry point."""
 
+import logging
+import multiprocessing
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Optional
+
 from fastapi import FastAPI, Request
+from fastapi.encoders import jsonable_encoder
 from fastapi.exceptions import RequestValidationError, HTTPException
 from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
 from itsdangerous import URLSafeTimedSerializer
 from starlette.middleware.sessions import SessionMiddleware
-from starlette.responses import HTMLResponse
-
-from app.database import Base, engine
-from app.routers import auth, vault, vue
-
-# Imports des modèles pour créer les tables
-from app.models.user import User
-from app.models.password import PasswordEntry, SharedPasswordEntry
+from starlette.responses import HTMLResponse, Response
 
-app = FastAPI()
+from app import templating
+from app.config import Settings
+from app.database import create_database_engine, create_session_factory, init_db
+from app.middleware import (
+    MetricsMiddleware,
+    ProfilingMiddleware,
+    QueryStatsMiddleware,
+    RateLimiter,
+    RateLimitMiddleware,
+    parse_rules,
+)
+from app.responses import FastJSONResponse
+from app.routers import api, auth, metrics, vault, vue
+from app.services import passphrase, profiling, query_stats
+from app.services.audit import AuditLog
+from app.services.generator import PasswordGeneratorService
+from app.services.keyring import SessionKeyWrapper, VaultKeyring
+from app.services.loop_watchdog import loop_watchdog
+from app.services.search_index import SearchIndexes
+from app.templating import templates, warm_up
 
-# Register des middleware
-app.add_middleware(SessionMiddleware, secret_key="your-secret-key")
+logger = logging.getLogger(__name__)
 
-# Database setup
-Base.metadata.create_all(bind=engine)
 
-# Include routers
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Gère les ressources liées au cycle de vie de l'application.
 
+    Arguments:
+        app (FastAPI): L'application FastAPI.
 
-app.include_router(auth.auth_router)
-app.include_router(vault.vault_router)
-app.include_router(vue.view_router)
-
+    """
+    state = app.state
+    # Créer ou mettre à jour le schéma au démarrage, pas à l'import du module
+    init_db(state.engine)
+    # Précompiler les templates avant la première requête
+    warm_up()
+    # Compiler la liste de mots des phrases de passe avant la première requête
+    try:
+        passphrase.get_wordlist()
+    except OSError:
+        logger.exception("Liste de mots des phrases de passe indisponible")
+    settings = state.settings
+    if settings.loop_watchdog_enabled:
+        # Surveiller la boucle de ce worker : retard et blocages
+        loop_watchdog.threshold = settings.loop_block_threshold_ms / 1000
+        loop_watchdog.start()
+    # Thread d'écriture du journal d'audit (après `init_db` : la table existe)
+    state.audit_log.start(state.engine)
+    yield
+    if settings.loop_watchdog_enabled:
+        await loop_watchdog.stop()
+    # Écrire les événements d'audit encore en file
+    state.audit_log.stop()
+    # Arrêter le pool de génération s'il a été démarré
+    state.generator.shutdown()
+    state.engine.dispose()
 
-# Register template & static files
-serializer = URLSafeTimedSerializer("SECRET_KEY")
-templates = Jinja2Templates(directory="app/templates")
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
 # Error handling
 
 
-@app.exception_handler(404)
-async def custom_404_error(request: Request, ex: HTTPException) -> HTMLResponse:
+async def custom_404_error(request: Request, ex: HTTPException) -> Response:
     """Affiche une page d'erreur 404 personnalisée.
 
     Arguments:
@@ -48,9 +85,11 @@ async def custom_404_error(request: Request, ex: HTTPException) -> HTMLResponse:
         ex (HTTPException): L'exception HTTP.
 
     Returns:
-        HTMLResponse: La page d'erreur 404 personnalisée.
+        Response: La page d'erreur 404 personnalisée (JSON pour l'API).
 
     """
+    if request.url.path.startswith("/api/"):
+        return FastJSONResponse({"detail": ex.detail}, status_code=404)
     return templates.TemplateResponse(
         "errors/error_404.html.j2",
         {
@@ -61,7 +100,6 @@ async def custom_404_error(request: Request, ex: HTTPException) -> HTMLResponse:
     )
 
 
-@app.exception_handler(500)
 async def custom_500_error(request: Request, ex: HTTPException) -> HTMLResponse:
     """Affiche une page d'erreur 500 personnalisée.
 
@@ -83,8 +121,7 @@ async def custom_500_error(request: Request, ex: HTTPException) -> HTMLResponse:
     )
 
 
-@app.exception_handler(RequestValidationError)
-async def validation_exception_handler(request: Request, ex: RequestValidationError) -> HTMLResponse:
+async def validation_exception_handler(request: Request, ex: RequestValidationError) -> Response:
     """Arrête les exceptions de validation et affiche une page d'erreur personnalisée.
 
     Arguments:
@@ -92,14 +129,131 @@ async def validation_exception_handler(request: Request, ex: RequestValidationEr
         ex (RequestValidationError): L'exception de validation.
 
     Returns:
-        HTMLResponse: La page d'erreur personnalisée.
+        Response: La page d'erreur personnalisée (JSON 422 pour l'API).
 
     """
+    if request.url.path.startswith("/api/"):
+        return FastJSONResponse({"detail": jsonable_encoder(ex.errors())}, status_code=422)
     return templates.TemplateResponse(
-        "error_404.html.j2",
+        "errors/error_404.html.j2",
         {
             "request": request,
             "status_code": 400,
             "message": "Requête invalide",
         },
+        status_code=400,
+    )
+
+
+def create_app(settings: Optional[Settings] = None) -> FastAPI:
+    """Construit l'application à partir de ses réglages.
+
+    Chaque application a ses propres services dans `app.state` : moteur et
+    fabrique de sessions, limiteur de débit, journal d'audit, pool de
+    génération, trousseau et index de recherche. Deux applications du même
+    processus (tests, plusieurs bases) ne se partagent donc ni base ni état.
+    Restent propres au processus, réglés par la dernière application créée :
+    l'environnement des templates, les statistiques SQL, le profilage, la
+    surveillance de la boucle et le registre des métriques (qui additionne
+    les compteurs de toutes les applications).
+
+    Avec `uvicorn app.main:create_app --factory --workers N`, chaque worker
+    appelle cette fonction et relit la configuration depuis l'environnement.
+
+    Arguments:
+        settings (Optional[Settings]): Les réglages (par défaut, lus depuis l'environnement).
+
+    Returns:
+        FastAPI: L'application configurée.
+
+    """
+    settings = settings or Settings.from_env()
+    settings.warn_insecure()
+
+    # Réglages propres au processus
+    templating.configure(settings.jinja_bytecode_cache_dir)
+    query_stats.configure(settings.sql_debug, settings.sql_repeat_threshold)
+    profiling.configure(settings.profiling_dir, settings.profiling_keep)
+
+    app = FastAPI(lifespan=lifespan)
+    app.state.settings = settings
+    # Un seul sérialiseur pour les cookies `session_token` (voir `auth.get_serializer`)
+    app.state.serializer = URLSafeTimedSerializer(settings.secret_key)
+    # Services de l'application, résolus depuis la requête (`request.app.state`)
+    app.state.engine = create_database_engine(settings)
+    app.state.session_factory = create_session_factory(app.state.engine)
+    app.state.rate_limiter = RateLimiter(parse_rules(settings.rate_limits), settings.rate_limit_buckets)
+    app.state.generator = PasswordGeneratorService(
+        processes=settings.generator_processes or multiprocessing.cpu_count(),
+    )
+    app.state.search_indexes = SearchIndexes(settings.search_index_idle_seconds, settings.search_index_max)
+    # Un coffre dont la clé est oubliée ne garde pas son index en clair
+    app.state.keyring = VaultKeyring(
+        settings.keyring_idle_seconds,
+        settings.keyring_max_keys,
+        on_evict=app.state.search_indexes.evict,
     )
+    # Clé du coffre chiffrée en session : retrouvée par tous les workers
+    app.state.key_wrapper = SessionKeyWrapper(settings.secret_key)
+    app.state.audit_log = AuditLog(
+        settings.audit_enabled,
+        settings.audit_queue_size,
+        settings.audit_batch_size,
+        settings.audit_flush_ms / 1000,
+        settings.audit_backpressure,
+    )
+
+    # Register des middleware
+    app.add_middleware(SessionMiddleware, secret_key=settings.session_secret_key)
+    # Statistiques SQL par requête (nombre, durée, N+1)
+    app.add_middleware(QueryStatsMiddleware)
+    if settings.profiling_enabled:
+        # Profilage à la demande, activé explicitement par configuration
+        app.add_middleware(
+            ProfilingMiddleware,
+            token=settings.profiling_token,
+            sample_rate=settings.profiling_sample_rate,
+        )
+    # Externe à la session : refuse avant la session et les routes
+    app.add_middleware(RateLimitMiddleware, limiter=app.state.rate_limiter)
+    # Le plus externe : mesure aussi les réponses 429
+    app.add_middleware(MetricsMiddleware)
+
+    # Include routers
+    app.include_router(auth.auth_router)
+    app.include_router(vault.vault_router)
+    app.include_router(vue.view_router)
+    app.include_router(api.api_router)
+    app.include_router(metrics.metrics_router)
+
+    # Register static files
+    app.mount("/static", StaticFiles(directory=Path(__file__).parent / "static"), name="static")
+
+    # Error handling
+    app.add_exception_handler(404, custom_404_error)
+    app.add_exception_handler(500, custom_500_error)
+    app.add_exception_handler(RequestValidationError, validation_exception_handler)
+    return app
+
+
+def __getattr__(name: str) -> FastAPI:
+    """Construit `app.main.app` au premier accès (`uvicorn app.main:app`).
+
+    Avec `--factory`, seule `create_app` est appelée : l'application par défaut
+    n'est jamais construite.
+
+    Arguments:
+        name (str): Le nom de l'attribut demandé.
+
+    Returns:
+        FastAPI: L'application configurée depuis l'environnement.
+
+    Raises:
+        AttributeError: Pour tout autre attribut inconnu.
+
+    """
+    if name == "app":
+        globals()["app"] = application = create_app()
+        return application
+    msg = f"module {__name__!r} has no attribute {name!r}"
+    raise AttributeError(msg)
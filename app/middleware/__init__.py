@@ -0,0 +1,16 @@
+"""Middlewares ASGI de l'application."""
+
+from .metrics import MetricsMiddleware
+from .profiling import ProfilingMiddleware
+from .queries import QueryStatsMiddleware
+from .ratelimit import RateLimiter, RateLimitMiddleware, RateLimitRule, parse_rules
+
+__all__ = [
+    "MetricsMiddleware",
+    "ProfilingMiddleware",
+    "QueryStatsMiddleware",
+    "RateLimitMiddleware",
+    "RateLimitRule",
+    "RateLimiter",
+    "parse_rules",
+]
@@ -0,0 +1,61 @@
+"""Mesure des requêtes HTTP : nombre, durée et requêtes en cours, par route."""
+
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.services.metrics import http_request_duration, http_requests, http_requests_in_progress
+
+# Label des requêtes qui ne correspondent à aucune route (404, fichiers statiques)
+UNMATCHED_ROUTE = "<autre>"
+
+
+class MetricsMiddleware:
+    """Middleware ASGI alimentant les métriques `http_*`.
+
+    Le label `route` est le gabarit de la route (ex. `/share/{p_uuid}/{token}`)
+    et non le chemin : le nombre de séries reste borné.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        """Initialise le middleware.
+
+        Arguments:
+            app (ASGIApp): L'application mesurée.
+
+        """
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Mesure la requête jusqu'à l'envoi du dernier octet de la réponse.
+
+        Arguments:
+            scope (Scope): Le scope ASGI.
+            receive (Receive): Le canal de réception ASGI.
+            send (Send): Le canal d'envoi ASGI.
+
+        """
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            http_requests_in_progress.dec()
+            # Le routeur FastAPI renseigne `scope["route"]` pendant le traitement
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            method = scope["method"]
+            http_request_duration.observe(duration, (method, route))
+            http_requests.inc(labels=(method, route, str(status_code)))
@@ -0,0 +1,92 @@
+"""Profilage à la demande d'une requête (voir `app.services.profiling`).
+
+Désactivé par défaut (voir `app.config`). Avec `PROFILING_ENABLED=1`, une requête est profilée si :
+    - elle porte l'en-tête `X-Profile: <PROFILING_TOKEN>` (réservé aux administrateurs) ;
+    - ou elle est tirée au sort selon `PROFILING_SAMPLE_RATE` (0 à 1, 0 par défaut).
+Un seul profil est capturé à la fois ; l'identifiant du profil est renvoyé
+dans l'en-tête `X-Profile-Id`.
+"""
+
+import hmac
+import logging
+import random
+import threading
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.services.profiling import RequestProfile
+
+logger = logging.getLogger(__name__)
+
+
+class ProfilingMiddleware:
+    """Middleware ASGI capturant un profil pour les requêtes sélectionnées."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        token: str = "",
+        sample_rate: float = 0.0,
+    ) -> None:
+        """Initialise le middleware.
+
+        Arguments:
+            app (ASGIApp): L'application profilée.
+            token (str): Le jeton attendu dans `X-Profile` (vide : en-tête ignoré).
+            sample_rate (float): La proportion de requêtes profilées au hasard.
+
+        """
+        self.app = app
+        self.token = token.encode()
+        self.sample_rate = sample_rate
+        self._busy = threading.Lock()
+
+    def selected(self, scope: Scope) -> bool:
+        """Indique si la requête doit être profilée.
+
+        Arguments:
+            scope (Scope): Le scope ASGI.
+
+        Returns:
+            bool: True si l'en-tête administrateur est valide ou si la requête est tirée au sort.
+
+        """
+        if self.token:
+            for name, value in scope["headers"]:
+                if name == b"x-profile" and hmac.compare_digest(value, self.token):
+                    return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Profile la requête si elle est sélectionnée et qu'aucun profil n'est en cours.
+
+        Arguments:
+            scope (Scope): Le scope ASGI.
+            receive (Receive): Le canal de réception ASGI.
+            send (Send): Le canal d'envoi ASGI.
+
+        """
+        if scope["type"] != "http" or not self.selected(scope) or not self._busy.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"])
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = [*message["headers"], (b"x-profile-id", profile.profile_id.encode())]
+            await send(message)
+
+        try:
+            profile.start()
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            try:
+                path = profile.stop(getattr(scope.get("route"), "path", None), status_code)
+                logger.info("Profil de %s %s écrit dans %s", scope["method"], scope["path"], path)
+            finally:
+                self._busy.release()
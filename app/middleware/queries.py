@@ -0,0 +1,41 @@
+"""Statistiques SQL par requête HTTP (voir `app.services.query_stats`)."""
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.middleware.metrics import UNMATCHED_ROUTE
+from app.services import query_stats
+
+
+class QueryStatsMiddleware:
+    """Middleware ASGI : collecte les instructions SQL d'une requête et publie les totaux."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        """Initialise le middleware.
+
+        Arguments:
+            app (ASGIApp): L'application instrumentée.
+
+        """
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Installe les statistiques de la requête puis les publie à la fin.
+
+        Arguments:
+            scope (Scope): Le scope ASGI.
+            receive (Receive): Le canal de réception ASGI.
+            send (Send): Le canal d'envoi ASGI.
+
+        """
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = query_stats.QueryStats()
+        token = query_stats.current_stats.set(stats)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            query_stats.current_stats.reset(token)
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            query_stats.report(stats, scope["method"], route)
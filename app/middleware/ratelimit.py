@@ -0,0 +1,370 @@
+"""Limitation de débit par seau à jetons, par adresse IP et par route.
+
+Les routes publiques coûteuses (connexion et bcrypt, consultation d'un
+partage et dérivation de clé) sont protégées avant tout accès à la session,
+à la base de données ou à la cryptographie : une requête refusée reçoit
+immédiatement une réponse 429.
+
+Les seaux sont conservés dans un `OrderedDict` par règle, dans l'ordre de
+dernière utilisation : les règles n'ont pas la même période, chaque file est
+donc triée par date d'expiration. Un seau inutilisé depuis assez longtemps pour
+être de nouveau plein est équivalent à un seau neuf : il est supprimé. Au-delà
+de `max_buckets` seaux au total, les moins récemment utilisés sont évincés.
+
+Les limites sont configurables par la variable d'environnement `RATE_LIMITS`
+(voir `app.config`), par exemple `RATE_LIMITS="login=10/60,share=30/60"`
+(capacité / période en secondes). Les seaux sont propres à chaque processus :
+avec N workers, un client peut obtenir jusqu'à N fois la limite.
+"""
+
+import json
+import time
+import weakref
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.services.metrics import registry
+
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    """Limite appliquée à une route.
+
+    Attributs :
+        name (str) : Nom de la règle (utilisé pour la configuration et les compteurs).
+        method (str) : Méthode HTTP concernée.
+        path (str) : Chemin exact, ou préfixe s'il se termine par "/".
+        capacity (int) : Nombre de requêtes autorisées en rafale.
+        period (float) : Durée, en secondes, pour regagner `capacity` jetons.
+    """
+
+    name: str
+    method: str
+    path: str
+    capacity: int
+    period: float
+
+    @property
+    def rate(self) -> float:
+        """Jetons regagnés par seconde."""
+        return self.capacity / self.period
+
+    def matches(self, method: str, path: str) -> bool:
+        """Indique si la règle s'applique à la requête.
+
+        Arguments:
+            method (str): La méthode HTTP.
+            path (str): Le chemin de la requête.
+
+        Returns:
+            bool: True si la requête est concernée.
+
+        """
+        if method != self.method:
+            return False
+        if self.path.endswith("/"):
+            return path.startswith(self.path)
+        return path == self.path
+
+
+DEFAULT_RULES = (
+    RateLimitRule("login", "POST", "/login", capacity=10, period=60),
+    RateLimitRule("unlock", "POST", "/unlock", capacity=10, period=60),
+    RateLimitRule("register", "POST", "/register", capacity=5, period=300),
+    RateLimitRule("totp", "POST", "/verify_totp", capacity=10, period=60),
+    RateLimitRule("share", "GET", "/share/", capacity=30, period=60),
+)
+
+
+def parse_rules(spec: str, rules: tuple[RateLimitRule, ...] = DEFAULT_RULES) -> tuple[RateLimitRule, ...]:
+    """Applique des limites au format de `RATE_LIMITS` (ex. "login=10/60,share=30/60").
+
+    Arguments:
+        spec (str): Les limites surchargées (vide : règles inchangées).
+        rules (tuple[RateLimitRule, ...]): Les règles par défaut.
+
+    Returns:
+        tuple[RateLimitRule, ...]: Les règles avec les limites surchargées.
+
+    Raises:
+        ValueError: Si la variable est mal formée, nomme une règle inconnue, ou
+            si une capacité est inférieure à 1 ou une période n'est pas positive.
+
+    """
+    spec = spec.strip()
+    if not spec:
+        return rules
+    by_name = {rule.name: rule for rule in rules}
+    for item in spec.split(","):
+        try:
+            name, limit = item.split("=")
+            capacity, period = limit.split("/")
+            rule = by_name[name.strip()]
+            capacity, period = int(capacity), float(period)
+            # Une capacité ou une période nulle rendrait `rate` invalide
+            if capacity < 1 or not 0 < period < float("inf"):
+                raise ValueError
+            by_name[rule.name] = RateLimitRule(rule.name, rule.method, rule.path, capacity, period)
+        except (KeyError, ValueError):
+            msg = f"RATE_LIMITS invalide : {item!r}"
+            raise ValueError(msg) from None
+    return tuple(by_name.values())
+
+
+class RateLimiter:
+    """Seaux à jetons bornés en mémoire, avec compteurs.
+
+    Les compteurs (`allowed`, `limited`, `evicted`, `expired`, et `limited` par
+    règle) sont lisibles par `stats()`.
+    """
+
+    def __init__(
+        self,
+        rules: tuple[RateLimitRule, ...] = DEFAULT_RULES,
+        max_buckets: int = 10_000,
+    ) -> None:
+        """Initialise le limiteur.
+
+        Arguments:
+            rules (tuple[RateLimitRule, ...]): Les règles à appliquer.
+            max_buckets (int): Nombre maximal de seaux conservés.
+
+        """
+        self.rules = rules
+        self.max_buckets = max_buckets
+        # règle -> client -> [jetons, date de mise à jour], du moins au plus récent
+        self._buckets: dict[str, OrderedDict[str, list[float]]] = {}
+        self._size = 0
+        self._counters = {"allowed": 0, "limited": 0, "evicted": 0, "expired": 0}
+        self._limited_by_rule = dict.fromkeys((rule.name for rule in rules), 0)
+        _limiters.add(self)
+
+    def configure(self, rules: tuple[RateLimitRule, ...], max_buckets: int) -> None:
+        """Remplace les règles et la capacité, et vide les seaux.
+
+        Arguments:
+            rules (tuple[RateLimitRule, ...]): Les règles à appliquer.
+            max_buckets (int): Nombre maximal de seaux conservés.
+
+        """
+        self.rules = rules
+        self.max_buckets = max_buckets
+        self._buckets = {}
+        self._size = 0
+        self._limited_by_rule = dict.fromkeys((rule.name for rule in rules), 0)
+
+    def match(self, method: str, path: str) -> RateLimitRule | None:
+        """Retourne la règle applicable à une requête.
+
+        Arguments:
+            method (str): La méthode HTTP.
+            path (str): Le chemin de la requête.
+
+        Returns:
+            RateLimitRule | None: La première règle correspondante, ou None.
+
+        """
+        for rule in self.rules:
+            if rule.matches(method, path):
+                return rule
+        return None
+
+    def _purge_expired(self, now: float) -> None:
+        """Supprime, depuis les moins récents, les seaux redevenus pleins.
+
+        Arguments:
+            now (float): L'instant courant (horloge monotone).
+
+        """
+        for rule in self.rules:
+            buckets = self._buckets.get(rule.name)
+            while buckets:
+                _, updated = next(iter(buckets.values()))
+                if now - updated < rule.period:
+                    break
+                buckets.popitem(last=False)
+                self._size -= 1
+                self._counters["expired"] += 1
+
+    def _evict_oldest(self) -> None:
+        """Évince le seau le moins récemment utilisé, toutes règles confondues."""
+        oldest = min(
+            (buckets for buckets in self._buckets.values() if buckets),
+            key=lambda buckets: next(iter(buckets.values()))[1],
+        )
+        oldest.popitem(last=False)
+        self._size -= 1
+        self._counters["evicted"] += 1
+
+    def acquire(self, rule: RateLimitRule, client: str) -> float:
+        """Consomme un jeton du seau du client pour la règle.
+
+        Arguments:
+            rule (RateLimitRule): La règle applicable.
+            client (str): L'identifiant du client (adresse IP).
+
+        Returns:
+            float: 0 si la requête est autorisée, sinon le délai en secondes
+            avant qu'un jeton soit disponible.
+
+        """
+        now = time.monotonic()
+        self._purge_expired(now)
+
+        buckets = self._buckets.setdefault(rule.name, OrderedDict())
+        bucket = buckets.get(client)
+        if bucket is None:
+            bucket = buckets[client] = [float(rule.capacity), now]
+            self._size += 1
+        else:
+            bucket[0] = min(rule.capacity, bucket[0] + (now - bucket[1]) * rule.rate)
+            bucket[1] = now
+            buckets.move_to_end(client)  # le plus récemment utilisé
+        while self._size > self.max_buckets:
+            self._evict_oldest()
+
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            self._counters["allowed"] += 1
+            return 0.0
+        self._counters["limited"] += 1
+        self._limited_by_rule[rule.name] += 1
+        return (1 - bucket[0]) / rule.rate
+
+    def stats(self) -> dict[str, object]:
+        """Retourne les compteurs du limiteur.
+
+        Returns:
+            dict[str, object]: Les compteurs globaux, par règle, et le nombre de seaux.
+
+        """
+        return {
+            **self._counters,
+            "buckets": self._size,
+            "limited_by_rule": dict(self._limited_by_rule),
+        }
+
+
+class RateLimitMiddleware:
+    """Middleware ASGI : répond 429 avant d'appeler l'application si le seau est vide."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        limiter: RateLimiter,
+        trust_forwarded: bool = False,
+    ) -> None:
+        """Initialise le middleware.
+
+        Arguments:
+            app (ASGIApp): L'application à protéger.
+            limiter (RateLimiter): Le limiteur partagé.
+            trust_forwarded (bool): Utiliser `X-Forwarded-For` (derrière un proxy de confiance).
+
+        """
+        self.app = app
+        self.limiter = limiter
+        self.trust_forwarded = trust_forwarded
+
+    def client_ip(self, scope: Scope) -> str:
+        """Détermine l'adresse du client.
+
+        Arguments:
+            scope (Scope): Le scope ASGI de la requête.
+
+        Returns:
+            str: L'adresse IP du client.
+
+        """
+        if self.trust_forwarded:
+            for name, value in scope["headers"]:
+                if name == b"x-forwarded-for":
+                    return value.decode("latin-1").split(",")[0].strip()
+        client = scope.get("client")
+        return client[0] if client else "inconnu"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Applique la limite puis transmet la requête à l'application.
+
+        Arguments:
+            scope (Scope): Le scope ASGI.
+            receive (Receive): Le canal de réception ASGI.
+            send (Send): Le canal d'envoi ASGI.
+
+        """
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        rule = self.limiter.match(scope["method"], scope["path"])
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+        retry_after = self.limiter.acquire(rule, self.client_ip(scope))
+        if not retry_after:
+            await self.app(scope, receive, send)
+            return
+
+        body = json.dumps({"detail": "Trop de requêtes, réessayez plus tard"}).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(max(1, round(retry_after))).encode()),
+                ],
+            },
+        )
+        await send({"type": "http.response.body", "body": body})
+
+
+# Limiteurs des applications du processus (un par `create_app`), pour les métriques
+_limiters: "weakref.WeakSet[RateLimiter]" = weakref.WeakSet()
+
+
+def _totals() -> dict:
+    """Additionne les compteurs des limiteurs du processus."""
+    totals = {"allowed": 0, "limited": 0, "expired": 0, "evicted": 0, "buckets": 0}
+    by_rule: Counter = Counter()
+    for limiter in list(_limiters):
+        stats = limiter.stats()
+        for name in totals:
+            totals[name] += stats[name]
+        by_rule.update(stats["limited_by_rule"])
+    totals["limited_by_rule"] = by_rule
+    return totals
+
+
+# Exportés à la lecture de /metrics : rien n'est ajouté au chemin des requêtes
+registry.counter(
+    "ratelimit_requests_total",
+    "Requêtes soumises au limiteur de débit.",
+    ("result",),
+    function=lambda: {
+        (result,): count for result, count in _totals().items() if result in ("allowed", "limited")
+    },
+)
+registry.counter(
+    "ratelimit_limited_total",
+    "Requêtes refusées (429), par règle.",
+    ("rule",),
+    function=lambda: {
+        (rule,): count for rule, count in _totals()["limited_by_rule"].items()
+    },
+)
+registry.counter(
+    "ratelimit_buckets_removed_total",
+    "Seaux supprimés (expirés ou évincés).",
+    ("reason",),
+    function=lambda: {
+        (reason,): count for reason, count in _totals().items() if reason in ("expired", "evicted")
+    },
+)
+registry.gauge(
+    "ratelimit_buckets",
+    "Seaux actuellement conservés.",
+    function=lambda: _totals()["buckets"],
+)
@@ -1,2 +1,3 @@
 from .user import User
 from .password import PasswordEntry, SharedPasswordEntry
+from .audit import AuditEvent
@@ -0,0 +1,41 @@
+"""Contient la définition du modèle AuditEvent (journal d'audit)."""
+
+from sqlalchemy import Column, DateTime, Index, Integer, String
+
+from app.database import Base
+
+
+class AuditEvent(Base):
+    """Représente un événement du journal d'audit.
+
+    Les lignes sont écrites par lots par `app.services.audit`, jamais dans la
+    transaction de la requête qui les produit.
+
+    Attributs :
+        id (int) : Identifiant de l'événement, croissant dans l'ordre d'écriture.
+        created_at (datetime) : Date de l'événement (UTC), prise à sa production.
+        action (str) : Type d'événement (voir `app.services.audit.ACTIONS`).
+        user_id (int) : Utilisateur concerné (le propriétaire pour un partage consulté).
+        entry_id (int) : Entrée du coffre concernée, le cas échéant.
+        ip (str) : Adresse du client.
+        detail (str) : Précision libre (ex. durée de validité d'un partage).
+    """
+
+    __tablename__ = "audit_events"
+
+    id = Column(Integer, primary_key=True)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    action = Column(String(32), nullable=False)
+    # Pas de clé étrangère : le journal survit aux entrées et aux comptes supprimés
+    user_id = Column(Integer, nullable=True)
+    entry_id = Column(Integer, nullable=True)
+    ip = Column(String(45), nullable=True)
+    detail = Column(String(200), nullable=True)
+
+    __table_args__ = (
+        # Historique d'un utilisateur, filtré ou non par action, du plus récent au plus ancien
+        Index("ix_audit_events_user_action_id", "user_id", "action", "id"),
+        Index("ix_audit_events_user_id", "user_id", "id"),
+        # Recherche par période (purge, export)
+        Index("ix_audit_events_created_at", "created_at"),
+    )
@@ -1,9 +1,10 @@
 """Ici se trouvent les modèles de données pour les mots de passe."""
 
 import uuid
+from collections.abc import Iterable
 from typing import Any
 
-from sqlalchemy import UUID, Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy import UUID, Column, DateTime, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import relationship
 
 from app.database import Base
@@ -22,6 +23,8 @@ class PasswordEntry(Base):
         url (str) : URL du service lié à l'entrée de mot de passe (chiffré).
         user_id (int) : Identifiant de l'utilisateur propriétaire.
         complexity (int) : Indice de complexité du mot de passe.
+        domain_tag (str) : Empreinte HMAC du domaine de l'URL ("" sans domaine,
+            None si pas encore calculée), voir `app.services.autofill`.
         owner (User) : Objet utilisateur lié à cette entrée (relation SQLAlchemy).
 
     Méthodes :
@@ -32,6 +35,12 @@ class PasswordEntry(Base):
         get_decrypted(aes_key) -> PasswordOut :
             Retourne un objet contenant toutes les informations déchiffrées
             de cette entrée de mot de passe.
+
+        decrypt_fields(aes_key, fields) -> dict :
+            Déchiffre uniquement les champs demandés.
+
+        set_fields(aes_key, **values) :
+            Chiffre et remplace les champs fournis.
     """
 
     from app.models.user import User
@@ -45,9 +54,25 @@ class PasswordEntry(Base):
     url = Column(String, nullable=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     complexity = Column(Integer, nullable=True)
+    domain_tag = Column(String(64), nullable=True)
 
     owner = relationship("User", back_populates="passwords")
 
+    # Recherche par domaine (remplissage automatique) dans le coffre d'un utilisateur
+    __table_args__ = (Index("ix_passwords_user_domain_tag", "user_id", "domain_tag"),)
+
+    # Champ exposé (PasswordOut) -> colonne chiffrée correspondante
+    ENCRYPTED_FIELDS = {
+        "title": "title",
+        "username": "username",
+        "email": "email",
+        "url": "url",
+        "password": "encrypted_password",
+    }
+
+    # Champs affichés dans la liste : le mot de passe n'est déchiffré qu'à la demande
+    DISPLAY_FIELDS = ("id", "title", "username", "email", "url", "complexity")
+
     def __init__(
         self,
         title: str,
@@ -72,7 +97,7 @@ class PasswordEntry(Base):
             **kw (Any): Autres arguments supplémentaires à passer au constructeur.
 
         """
-        from app.services import password_utils
+        from app.services import autofill, password_utils
 
         super().__init__(**kw)
 
@@ -86,6 +111,7 @@ class PasswordEntry(Base):
         self.username = PasswordAESEncryption.encrypt_password(username, aes_key)
         self.email = PasswordAESEncryption.encrypt_password(email, aes_key)
         self.url = PasswordAESEncryption.encrypt_password(url, aes_key)
+        self.domain_tag = autofill.url_tag(url, PasswordAESEncryption.derive_domain_key(aes_key))
 
         self.complexity = password_utils.calculate_password_strength(password)
         self.owner = user
@@ -116,6 +142,65 @@ class PasswordEntry(Base):
             complexity=self.complexity,
         )
 
+    def decrypt_fields(self, aes_key: bytes, fields: Iterable[str]) -> dict[str, Any]:
+        """Déchiffre uniquement les champs demandés de l'entrée.
+
+        Les champs non chiffrés (`id`, `complexity`) sont copiés tels quels.
+
+        Arguments:
+            aes_key (bytes): Clé AES utilisée pour déchiffrer les informations.
+            fields (Iterable[str]): Les champs de `PasswordOut` à retourner.
+
+        Return:
+            dict[str, Any]: Les valeurs des champs demandés.
+
+        """
+        from app.services.crypto import PasswordAESEncryption
+
+        values = {}
+        for field in fields:
+            column = self.ENCRYPTED_FIELDS.get(field)
+            if column is None:
+                values[field] = getattr(self, field)
+            else:
+                encrypted = getattr(self, column)
+                values[field] = (
+                    PasswordAESEncryption.decrypt_password(encrypted, aes_key)
+                    if encrypted
+                    else ""
+                )
+        return values
+
+    def set_fields(self, aes_key: bytes, **values: str) -> None:
+        """Chiffre et remplace les champs fournis.
+
+        La complexité est recalculée lorsque le mot de passe change, l'empreinte
+        du domaine lorsque l'URL change.
+
+        Arguments:
+            aes_key (bytes): Clé AES utilisée pour chiffrer les informations.
+            **values (str): Les nouveaux champs en clair (title, username, email, url, password).
+
+        """
+        from app.services import autofill, password_utils
+        from app.services.crypto import PasswordAESEncryption
+
+        for field, value in values.items():
+            setattr(
+                self,
+                self.ENCRYPTED_FIELDS[field],
+                PasswordAESEncryption.encrypt_password(value, aes_key),
+            )
+        if "password" in values:
+            self.complexity = password_utils.calculate_password_strength(
+                values["password"],
+            )
+        if "url" in values:
+            self.domain_tag = autofill.url_tag(
+                values["url"],
+                PasswordAESEncryption.derive_domain_key(aes_key),
+            )
+
 
 class SharedPasswordEntry(Base):
     """Un modèle représentant une entrée de mot de passe partagée.
@@ -131,6 +216,7 @@ class SharedPasswordEntry(Base):
         expiry_date (datetime): Date d'expiration de l'entrée partagée.
         original_entry_id (int): Identifiant de l'entrée de mot de passe d'origine.
         share_token_id (str): Identifiant unique pour le système de partage.
+        key_version (int): Schéma de dérivation de la clé de partage (1 : PBKDF2, 2 : HKDF).
     """
 
     __tablename__ = "shared_password_entries"
@@ -160,3 +246,6 @@ class SharedPasswordEntry(Base):
         String,
         nullable=False,
     )  # Un identifiant pour retrouver le token, pas le token lui-même
+
+    # Les partages créés avant l'introduction du versionnage sont en v1 (PBKDF2)
+    key_version = Column(Integer, nullable=False, server_default="1")
@@ -1,7 +1,7 @@
 """Contient la définition du modèle User."""
 
 import os
-from typing import Any
+from typing import Any, Optional
 
 from sqlalchemy import Column, Integer, String
 from sqlalchemy.orm import relationship
@@ -19,6 +19,11 @@ class User(Base):
         id (int) : Identifiant unique de l'utilisateur (généré automatiquement).
         user_salt (str) : Sel utilisé pour le hachage du mot de passe.
         passwords (list) : Liste des entrées de mot de passe associées à l'utilisateur.
+        vault_revision (int) : Révision du coffre, incrémentée à chaque modification.
+        vault_epoch (int) : Époque de verrouillage, incrémentée par `/lock` et la
+            déconnexion ; les clés déverrouillées auparavant sont refusées.
+        key_check (str) : Vérificateur de la clé du coffre, pour le déverrouillage
+            (None tant que l'utilisateur ne s'est pas reconnecté).
     """
 
     __tablename__ = "users"
@@ -28,6 +33,9 @@ class User(Base):
     hashed_password = Column(String, nullable=False)
     totp_secret = Column(String, nullable=False)
     user_salt = Column(String, nullable=False)
+    vault_revision = Column(Integer, nullable=False, default=0, server_default="0")
+    vault_epoch = Column(Integer, nullable=False, default=0, server_default="0")
+    key_check = Column(String(64), nullable=True)
 
     passwords = relationship(
         "PasswordEntry",
@@ -35,13 +43,21 @@ class User(Base):
         cascade="all, delete",
     )
 
-    def __init__(self, username: str, password: str, totp_secret: str, **kw: Any):
+    def __init__(
+        self,
+        username: str,
+        password: str,
+        totp_secret: str,
+        bcrypt_rounds: Optional[int] = None,
+        **kw: Any,
+    ):
         """Initialise un nouvel utilisateur avec les informations fournies.
 
         Arguments:
             username (str) : Nom d'utilisateur de l'utilisateur.
             password (str) : Mot de passe de l'utilisateur.
             totp_secret (str) : Secret TOTP pour l'authentification à deux facteurs.
+            bcrypt_rounds (Optional[int]) : Coût bcrypt du hachage (par défaut, `auth.BCRYPT_ROUNDS`).
             **kw : Autres arguments supplémentaires.
 
         """
@@ -49,6 +65,10 @@ class User(Base):
         self.username = username
         from app.services import auth
 
-        self.hashed_password = auth.hash_password(password)
+        self.hashed_password = auth.hash_password(password, bcrypt_rounds or auth.BCRYPT_ROUNDS)
         self.totp_secret = totp_secret
         self.user_salt = os.urandom(16).hex()
+
+    def bump_revision(self) -> None:
+        """Incrémente la révision du coffre (en SQL, donc sans perte en concurrence)."""
+        self.vault_revision = User.vault_revision + 1
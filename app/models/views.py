@@ -0,0 +1,127 @@
+"""Modèle de lecture compact des entrées du coffre, pour les listes et le rendu.
+
+Une liste de plusieurs dizaines de milliers d'entrées n'a besoin ni de l'ORM
+(carte d'identité, état de chaque instance, `__dict__`) ni de la validation
+pydantic de `PasswordOut`, réservée aux frontières de l'API. Les colonnes sont
+lues directement en tuples, déchiffrées en un appel groupé et rangées dans des
+`PasswordView` à `__slots__`.
+"""
+
+from collections.abc import Iterable
+from typing import Any, Optional
+
+from sqlalchemy import ColumnElement, select
+from sqlalchemy.orm import Session
+
+from app.models.password import PasswordEntry
+from app.services.crypto import PasswordAESEncryption
+
+
+class PasswordView:
+    """Entrée du coffre en lecture seule, sans `__dict__`.
+
+    Les champs non chargés valent None. Jinja y accède comme à un objet
+    (`entry.title`).
+
+    Attributs :
+        id (int) : Identifiant de l'entrée.
+        title (str | None) : Titre.
+        username (str | None) : Nom d'utilisateur.
+        email (str | None) : Adresse e-mail.
+        url (str | None) : URL du service.
+        password (str | None) : Mot de passe.
+        complexity (int | None) : Indice de complexité du mot de passe.
+    """
+
+    __slots__ = ("id", "title", "username", "email", "url", "password", "complexity")
+
+    def __init__(
+        self,
+        id: int,
+        title: Optional[str] = None,
+        username: Optional[str] = None,
+        email: Optional[str] = None,
+        url: Optional[str] = None,
+        password: Optional[str] = None,
+        complexity: Optional[int] = None,
+    ) -> None:
+        """Initialise la vue.
+
+        Arguments:
+            id (int): Identifiant de l'entrée.
+            title (Optional[str]): Titre.
+            username (Optional[str]): Nom d'utilisateur.
+            email (Optional[str]): Adresse e-mail.
+            url (Optional[str]): URL du service.
+            password (Optional[str]): Mot de passe.
+            complexity (Optional[int]): Indice de complexité.
+
+        """
+        self.id = id
+        self.title = title
+        self.username = username
+        self.email = email
+        self.url = url
+        self.password = password
+        self.complexity = complexity
+
+    def as_dict(self, fields: Iterable[str]) -> dict[str, Any]:
+        """Retourne les champs demandés, pour une réponse JSON.
+
+        Arguments:
+            fields (Iterable[str]): Les champs de `PasswordOut` à retourner.
+
+        Returns:
+            dict[str, Any]: Les valeurs des champs.
+
+        """
+        return {field: getattr(self, field) for field in fields}
+
+
+def list_password_views(
+    db: Session,
+    user_id: int,
+    aes_key: Optional[bytes],
+    fields: Iterable[str],
+    *criteria: ColumnElement[bool],
+) -> list[PasswordView]:
+    """Charge les entrées d'un utilisateur, réduites aux champs demandés.
+
+    Arguments:
+        db (Session): Session de base de données.
+        user_id (int): Le propriétaire des entrées.
+        aes_key (Optional[bytes]): La clé du coffre ; None renvoie les champs chiffrés tels que stockés.
+        fields (Iterable[str]): Les champs de `PasswordOut` à charger (`id` toujours inclus).
+        *criteria (ColumnElement[bool]): Conditions supplémentaires sur les entrées.
+
+    Returns:
+        list[PasswordView]: Les entrées, dans l'ordre de la base.
+
+    """
+    fields = tuple(dict.fromkeys(field for field in fields if field != "id"))
+    encrypted = tuple(field for field in fields if field in PasswordEntry.ENCRYPTED_FIELDS)
+    plain = tuple(field for field in fields if field not in PasswordEntry.ENCRYPTED_FIELDS)
+    columns = [PasswordEntry.id]
+    columns += [getattr(PasswordEntry, PasswordEntry.ENCRYPTED_FIELDS[field]) for field in encrypted]
+    columns += [getattr(PasswordEntry, field) for field in plain]
+    rows = db.execute(select(*columns).where(PasswordEntry.user_id == user_id, *criteria)).all()
+
+    width = len(encrypted)
+    if aes_key is None:
+        values = [value or "" for row in rows for value in row[1 : 1 + width]]
+    else:
+        # Tous les champs chiffrés de la liste, en un seul appel
+        values = PasswordAESEncryption.decrypt_many(
+            [value for row in rows for value in row[1 : 1 + width]],
+            aes_key,
+        )
+
+    views = []
+    for index, row in enumerate(rows):
+        view = PasswordView(row[0])
+        for field, value in zip(encrypted, values[index * width : (index + 1) * width]):
+            setattr(view, field, value)
+        for field, value in zip(plain, row[1 + width :]):
+            setattr(view, field, value)
+        views.append(view)
+    return views
@@ -0,0 +1,39 @@
+"""Réponses HTTP partagées par les routes de l'API."""
+
+import json
+from typing import Any
+
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dépend de l'environnement
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    """Réponse JSON compacte, sérialisée avec orjson lorsqu'il est installé.
+
+    Les routes qui la retournent directement évitent `jsonable_encoder` et la
+    validation du `response_model` : le contenu doit déjà être composé de
+    types JSON natifs.
+    """
+
+    def render(self, content: Any) -> bytes:
+        """Sérialise le contenu en JSON compact.
+
+        Arguments:
+            content (Any): Le contenu à sérialiser.
+
+        Returns:
+            bytes: Le JSON encodé en UTF-8.
+
+        """
+        if orjson is not None:
+            return orjson.dumps(content)
+        return json.dumps(
+            content,
+            ensure_ascii=False,
+            allow_nan=False,
+            separators=(",", ":"),
+        ).encode()
@@ -0,0 +1,522 @@
+"""Ce routeur expose le coffre-fort en JSON pour les scripts et l'extension navigateur."""
+
+import datetime
+from typing import Annotated, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.orm import Session
+from starlette import status
+
+from app import database
+from app.dto.audit import AuditEventList
+from app.dto.passwords import (
+    BatchRequest,
+    BatchResponse,
+    ClientKeyRequest,
+    PasswordIn,
+    PasswordList,
+    PasswordOut,
+    PasswordUpdate,
+)
+from app.models import PasswordEntry
+from app.models.user import User
+from app.models.views import list_password_views
+from app.responses import FastJSONResponse
+from app.services import audit, auth, autofill, caching, search_index, vault_batch
+
+api_router = APIRouter(prefix="/api/v1", tags=["api"])
+
+ALL_FIELDS = tuple(PasswordOut.model_fields)
+# Opération d'un lot -> événement du journal d'audit
+BATCH_AUDIT_ACTIONS = {"add": "entry_create", "update": "entry_update", "delete": "entry_delete"}
+
+
+class VaultContext:
+    """Utilisateur authentifié et clé AES de son coffre pour une requête d'API.
+
+    Attributs :
+        request (Request) : La requête HTTP.
+        db (Session) : Session de base de données.
+        user (User) : L'utilisateur authentifié.
+        aes_key (bytes) : La clé AES du coffre.
+    """
+
+    __slots__ = ("request", "db", "user", "aes_key")
+
+    def __init__(self, request: Request, db: Session, user: User, aes_key: bytes) -> None:
+        """Initialise le contexte.
+
+        Arguments:
+            request (Request): La requête HTTP.
+            db (Session): Session de base de données.
+            user (User): L'utilisateur authentifié.
+            aes_key (bytes): La clé AES du coffre.
+
+        """
+        self.request = request
+        self.db = db
+        self.user = user
+        self.aes_key = aes_key
+
+
+def get_vault_context(
+    request: Request,
+    db: Session = Depends(database.get_db),
+) -> VaultContext:
+    """Dépendance : vérifie la session et récupère la clé du coffre.
+
+    Arguments:
+        request (Request): La requête HTTP.
+        db (Session): Session de base de données.
+
+    Returns:
+        VaultContext: L'utilisateur et sa clé AES.
+
+    Raises:
+        HTTPException: 401 si la session est absente ou le coffre verrouillé (à rouvrir par `/unlock`).
+
+    """
+    user = auth.check_session(db, request)
+    if user is None:
+        raise HTTPException(status_code=401, detail="Authentification requise")
+    aes_key = auth.get_session_key(request, user)
+    if aes_key is None:
+        raise HTTPException(status_code=401, detail="Coffre verrouillé")
+    return VaultContext(request, db, user, aes_key)
+
+
+def parse_fields(fields: Optional[str]) -> tuple[str, ...]:
+    """Valide la projection `fields=` et retourne les champs à renvoyer.
+
+    Arguments:
+        fields (Optional[str]): Liste de champs séparés par des virgules (None : tous).
+
+    Returns:
+        tuple[str, ...]: Les champs demandés, `id` toujours inclus en premier.
+
+    Raises:
+        HTTPException: 400 si un champ est inconnu.
+
+    """
+    if not fields:
+        return ALL_FIELDS
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in ALL_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Champs inconnus : {', '.join(unknown)}",
+        )
+    return ("id", *dict.fromkeys(field for field in requested if field != "id"))
+
+
+def get_owned_entry(ctx: VaultContext, password_id: int) -> PasswordEntry:
+    """Récupère une entrée appartenant à l'utilisateur courant.
+
+    Arguments:
+        ctx (VaultContext): Le contexte de la requête.
+        password_id (int): L'identifiant de l'entrée.
+
+    Returns:
+        PasswordEntry: L'entrée trouvée.
+
+    Raises:
+        HTTPException: 404 si l'entrée n'existe pas ou appartient à un autre utilisateur.
+
+    """
+    entry = (
+        ctx.db.query(PasswordEntry)
+        .filter(PasswordEntry.id == password_id, PasswordEntry.user_id == ctx.user.id)
+        .first()
+    )
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Entrée de mot de passe introuvable")
+    return entry
+
+
+@api_router.get("/passwords", response_model=PasswordList)
+def list_passwords(
+    request: Request,
+    ctx: Annotated[VaultContext, Depends(get_vault_context)],
+    fields: Optional[str] = Query(None, description="Champs à renvoyer, séparés par des virgules"),
+) -> Response:
+    """Liste les entrées du coffre, réduites aux champs demandés.
+
+    Seuls les champs demandés sont déchiffrés : `fields=title` ne déchiffre
+    aucun mot de passe. Avec `If-None-Match`, une révision inchangée répond 304
+    sans requête sur les entrées.
+
+    Arguments:
+        request (Request): La requête HTTP.
+        ctx (VaultContext): Le contexte de la requête.
+        fields (Optional[str]): La projection demandée.
+
+    Returns:
+        Response: `{"items": [...]}` en JSON compact, ou 304.
+
+    """
+    selected = parse_fields(fields)
+    etag = caching.vault_etag(ctx.user, f"list:{','.join(selected)}")
+    if caching.is_not_modified(request, etag):
+        return caching.not_modified(etag)
+
+    views = list_password_views(ctx.db, ctx.user.id, ctx.aes_key, selected)
+    items = [view.as_dict(selected) for view in views]
+    return caching.set_etag(FastJSONResponse({"items": items}), etag)
+
+
+@api_router.get("/passwords/ciphertexts", response_model=PasswordList)
+def list_ciphertexts(
+    request: Request,
+    ctx: Annotated[VaultContext, Depends(get_vault_context)],
+) -> Response:
+    """Liste les entrées chiffrées, pour un déchiffrement dans le navigateur.
+
+    Le serveur ne déchiffre rien : les champs sont renvoyés tels que stockés.
+
+    Arguments:
+        request (Request): La requête HTTP.
+        ctx (VaultContext): Le contexte de la requête.
+
+    Returns:
+        Response: `{"items": [...]}` en JSON compact, ou 304.
+
+    """
+    etag = caching.vault_etag(ctx.user, "ciphertexts")
+    if caching.is_not_modified(request, etag):
+        return caching.not_modified(etag)
+
+    views = list_password_views(ctx.db, ctx.user.id, None, ALL_FIELDS)
+    items = [view.as_dict(ALL_FIELDS) for view in views]
+    return caching.set_etag(FastJSONResponse({"items": items}), etag)
+
+
+@api_router.post("/client-key")
+def client_key(
+    payload: ClientKeyRequest,
+    ctx: Annotated[VaultContext, Depends(get_vault_context)],
+) -> Response:
+    """Enveloppe la clé du coffre pour la clé publique ECDH du navigateur.
+
+    Le navigateur conserve ensuite une `CryptoKey` non exportable et n'a plus
+    besoin du serveur pour déchiffrer.
+
+    Arguments:
+        payload (ClientKeyRequest): La clé publique du navigateur.
+        ctx (VaultContext): Le contexte de la requête.
+
+    Returns:
+        Response: La clé enveloppée et les paramètres de dérivation.
+
+    """
+    # ECDH/HKDF/AES-KW ne sont chargés que si le mode client est utilisé
+    from app.services import client_crypto
+
+    try:
+        wrapped = client_crypto.wrap_vault_key(ctx.aes_key, payload.public_key)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Clé publique invalide")
+    return FastJSONResponse(wrapped, headers={"Cache-Control": "no-store"})
+
+
+@api_router.post("/passwords/batch", response_model=BatchResponse)
+def batch_passwords(
+    payload: BatchRequest,
+    ctx: Annotated[VaultContext, Depends(get_vault_context)],
+) -> Response:
+    """Applique plusieurs créations, modifications et suppressions en une transaction.
+
+    La propriété des entrées visées est vérifiée en une requête, les valeurs
+    sont chiffrées en un appel et la révision du coffre n'augmente qu'une fois.
+    Avec `atomic` (par défaut), un échec annule tout le lot.
+
+    Arguments:
+        payload (BatchRequest): Les opérations.
+        ctx (VaultContext): Le contexte de la requête.
+
+    Returns:
+        Response: Un résultat par opération ; 200 si le lot est enregistré, 409 sinon.
+
+    """
+    applied, results = vault_batch.apply_batch(
+        ctx.request.app.state.search_indexes,
+        ctx.db,
+        ctx.user,
+        ctx.aes_key,
+        payload.operations,
+        payload.atomic,
+    )
+    if applied:
+        for result in results:
+            if result["status"] < 400:
+                audit.record(ctx.request, BATCH_AUDIT_ACTIONS[result["op"]], ctx.user.id, result["id"], detail="batch")
+    return FastJSONResponse(
+        {"applied": applied, "revision": ctx.user.vault_revision, "results": results},
+        status_code=status.HTTP_200_OK if applied else status.HTTP_409_CONFLICT,
+    )
+
+
+@api_router.get("/passwords/autofill", response_model=PasswordList)
+def autofill_passwords(
+    ctx: Annotated[VaultContext, Depends(get_vault_context)],
+    url: str = Query(..., max_length=2048, description="URL de la page à remplir"),
+    fields: Optional[str] = Query(None, description="Champs à renvoyer, séparés par des virgules"),
+) -> Response:
+    """Retourne les entrées enregistrées pour le site d'une URL (extension navigateur).
+
+    Les entrées sont trouvées par l'empreinte indexée de leur domaine : seules
+    celles du site demandé sont lues et déchiffrées.
+
+    Arguments:
+        ctx (VaultContext): Le contexte de la requête.
+        url (str): L'URL de la page (seul son domaine enregistrable compte).
+        fields (Optional[str]): La projection demandée.
+
+    Returns:
+        Response: `{"domain": ..., "items": [...]}`, jamais mis en cache.
+
+    """
+    selected = parse_fields(fields)
+    domain, views = autofill.find_entries(ctx.db, ctx.user.id, ctx.aes_key, url, selected)
+    return FastJSONResponse(
+        {"domain": domain, "items": [view.as_dict(selected) for view in views]},
+        headers={"Cache-Control": "no-store"},
+    )
+
+
+@api_router.get("/passwords/search")
+def search_passwords(
+    ctx: Annotated[VaultContext, Depends(get_vault_context)],
+    q: str = Query(..., max_length=search_index.MAX_QUERY_LENGTH, description="Texte recherché"),
+    limit: int = Query(20, ge=1, le=100),
+) -> Response:
+    """Recherche instantanée dans le titre, le nom d'utilisateur, l'URL et l'e-mail.
+
+    L'index en mémoire du coffre est construit à la connexion (ou à la première
+    recherche) puis tenu à jour par les modifications : aucune entrée n'est
+    déchiffrée par frappe.
+
+    Arguments:
+        ctx (VaultContext): Le contexte de la requête.
+        q (str): Le texte recherché (insensible à la casse et aux accents).
+        limit (int): Nombre maximal de résultats.
+
+    Returns:
+        Response: `{"query": ..., "ids": [...]}`, du plus pertinent au moins pertinent.
+
+    """
+    index = search_index.ensure_index(ctx.request.app.state.search_indexes, ctx.db, ctx.user, ctx.aes_key)
+    return FastJSONResponse(
+        {"query": q, "ids": index.search(q, limit)},
+        headers={"Cache-Control": "no-store"},
+    )
+
+
+@api_router.get("/passwords/{password_id}", response_model=PasswordOut)
+def get_password(
+    password_id: int,
+    ctx: Annotated[VaultContext, Depends(get_vault_context)],
+    fields: Optional[str] = Query(None, description="Champs à renvoyer, séparés par des virgules"),
+) -> Response:
+    """Retourne une entrée du coffre, réduite aux champs demandés.
+
+    Arguments:
+        password_id (int): L'identifiant de l'entrée.
+        ctx (VaultContext): Le contexte de la requête.
+        fields (Optional[str]): La projection demandée.
+
+    Returns:
+        Response: L'entrée en JSON compact.
+
+    """
+    entry = get_owned_entry(ctx, password_id)
+    return FastJSONResponse(entry.decrypt_fields(ctx.aes_key, parse_fields(fields)))
+
+
+@api_router.get("/passwords/{password_id}/fields/{field}")
+def reveal_field(
+    password_id: int,
+    field: str,
+    ctx: Annotated[VaultContext, Depends(get_vault_context)],
+) -> Response:
+    """Déchiffre un seul champ d'une entrée, à l'affichage, la copie ou la modification.
+
+    Arguments:
+        password_id (int): L'identifiant de l'entrée.
+        field (str): Le champ chiffré à révéler (ex. "password").
+        ctx (VaultContext): Le contexte de la requête.
+
+    Returns:
+        Response: `{"id": ..., "field": ..., "value": ...}`, jamais mis en cache.
+
+    Raises:
+        HTTPException: 400 si le champ n'est pas un champ chiffré.
+
+    """
+    if field not in PasswordEntry.ENCRYPTED_FIELDS:
+        raise HTTPException(status_code=400, detail=f"Champ inconnu : {field}")
+    entry = get_owned_entry(ctx, password_id)
+    value = entry.decrypt_fields(ctx.aes_key, (field,))[field]
+    return FastJSONResponse(
+        {"id": entry.id, "field": field, "value": value},
+        headers={"Cache-Control": "no-store"},
+    )
+
+
+@api_router.post("/passwords", response_model=PasswordOut, status_code=201)
+def create_password(
+    payload: PasswordIn,
+    ctx: Annotated[VaultContext, Depends(get_vault_context)],
+) -> Response:
+    """Crée une entrée dans le coffre.
+
+    Arguments:
+        payload (PasswordIn): Les données en clair de l'entrée.
+        ctx (VaultContext): Le contexte de la requête.
+
+    Returns:
+        Response: L'entrée créée (201).
+
+    """
+    entry = PasswordEntry(
+        title=payload.title,
+        password=payload.password,
+        user=ctx.user,
+        aes_key=ctx.aes_key,
+        username=payload.username,
+        email=payload.email,
+        url=payload.url,
+    )
+    ctx.db.add(entry)
+    revision = ctx.user.vault_revision
+    ctx.user.bump_revision()
+    ctx.db.commit()
+    search_index.record_changes(
+        ctx.request.app.state.search_indexes,
+        ctx.user.id,
+        revision,
+        upserts=[(entry.id, payload.model_dump())],
+    )
+    audit.record(ctx.request, "entry_create", ctx.user.id, entry.id)
+
+    # Les valeurs en clair sont déjà connues : rien à déchiffrer
+    return FastJSONResponse(
+        {"id": entry.id, **payload.model_dump(), "complexity": entry.complexity},
+        status_code=status.HTTP_201_CREATED,
+    )
+
+
+@api_router.patch("/passwords/{password_id}")
+def update_password(
+    password_id: int,
+    payload: PasswordUpdate,
+    ctx: Annotated[VaultContext, Depends(get_vault_context)],
+) -> Response:
+    """Met à jour les champs fournis d'une entrée ; les autres ne sont pas rechiffrés.
+
+    Arguments:
+        password_id (int): L'identifiant de l'entrée.
+        payload (PasswordUpdate): Les champs à modifier.
+        ctx (VaultContext): Le contexte de la requête.
+
+    Returns:
+        Response: `{"id": ..., "complexity": ...}` après la mise à jour.
+
+    """
+    entry = get_owned_entry(ctx, password_id)
+    values = payload.model_dump(exclude_none=True)
+    entry.set_fields(ctx.aes_key, **values)
+    revision = ctx.user.vault_revision
+    ctx.user.bump_revision()
+    ctx.db.commit()
+    search_index.record_changes(
+        ctx.request.app.state.search_indexes,
+        ctx.user.id,
+        revision,
+        upserts=[(entry.id, values)],
+    )
+    audit.record(ctx.request, "entry_update", ctx.user.id, entry.id)
+    return FastJSONResponse({"id": entry.id, "complexity": entry.complexity})
+
+
+@api_router.delete("/passwords/{password_id}", status_code=204)
+def delete_password(
+    password_id: int,
+    ctx: Annotated[VaultContext, Depends(get_vault_context)],
+) -> Response:
+    """Supprime une entrée du coffre.
+
+    Arguments:
+        password_id (int): L'identifiant de l'entrée.
+        ctx (VaultContext): Le contexte de la requête.
+
+    Returns:
+        Response: Réponse vide (204).
+
+    """
+    ctx.db.delete(get_owned_entry(ctx, password_id))
+    revision = ctx.user.vault_revision
+    ctx.user.bump_revision()
+    ctx.db.commit()
+    search_index.record_changes(
+        ctx.request.app.state.search_indexes,
+        ctx.user.id,
+        revision,
+        deletions=[password_id],
+    )
+    audit.record(ctx.request, "entry_delete", ctx.user.id, password_id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@api_router.get("/audit", response_model=AuditEventList)
+def list_audit_events(
+    request: Request,
+    db: Session = Depends(database.get_db),
+    action: Optional[str] = Query(None, description="Ne retenir qu'un type d'événement"),
+    since: Optional[datetime.datetime] = Query(None, description="Ne retenir que les événements postérieurs"),
+    before_id: Optional[int] = Query(None, ge=1, description="Page suivante : `next_before_id` de la page précédente"),
+    limit: int = Query(100, ge=1, le=500),
+) -> Response:
+    """Consulte le journal d'audit de l'utilisateur, du plus récent au plus ancien.
+
+    Le coffre n'a pas besoin d'être déverrouillé : le journal ne contient
+    aucune donnée chiffrée. Les événements sont écrits par lots : les plus
+    récents peuvent apparaître avec un retard de l'ordre de `AUDIT_FLUSH_MS`.
+
+    Arguments:
+        request (Request): La requête HTTP.
+        db (Session): Session de base de données.
+        action (Optional[str]): Type d'événement.
+        since (Optional[datetime.datetime]): Date minimale.
+        before_id (Optional[int]): Identifiant maximal (exclu).
+        limit (int): Nombre maximal d'événements.
+
+    Returns:
+        Response: `{"items": [...], "next_before_id": ...}`.
+
+    Raises:
+        HTTPException: 401 sans session, 400 si le type d'événement est inconnu.
+
+    """
+    user = auth.check_session(db, request)
+    if user is None:
+        raise HTTPException(status_code=401, detail="Authentification requise")
+    if action is not None and action not in audit.ACTIONS:
+        raise HTTPException(status_code=400, detail=f"Type d'événement inconnu : {action}")
+    events = audit.list_events(db, user.id, action, since, before_id, limit)
+    items = [
+        {
+            "id": event.id,
+            # SQLite relit les dates sans fuseau : elles sont en UTC
+            "created_at": (event.created_at.replace(tzinfo=datetime.timezone.utc) if event.created_at.tzinfo is None else event.created_at).isoformat(),
+            "action": event.action,
+            "entry_id": event.entry_id,
+            "ip": event.ip,
+            "detail": event.detail,
+        }
+        for event in events
+    ]
+    return FastJSONResponse(
+        {"items": items, "next_before_id": events[-1].id if len(events) == limit else None},
+        headers={"Cache-Control": "no-store"},
+    )
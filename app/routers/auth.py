@@ -2,40 +2,79 @@
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Annotated
+import hmac
+from typing import TYPE_CHECKING, Annotated, Optional
 
 from fastapi import APIRouter, Depends, Form, Request, status
-from itsdangerous import URLSafeTimedSerializer
+from starlette.background import BackgroundTasks
 from starlette.responses import HTMLResponse, RedirectResponse
-from starlette.templating import Jinja2Templates
 
 from app import database
 from app.models.user import User
-from app.services import auth, totp
+from app.services import audit, auth, autofill, search_index, totp
 from app.services.crypto import PasswordAESEncryption
+from app.templating import templates
 
 if TYPE_CHECKING:
     from sqlalchemy.orm import Session
 
-serializer = URLSafeTimedSerializer("SECRET_KEY")
-templates = Jinja2Templates(directory="app/templates")
 
 auth_router = APIRouter()
 
 
+def after_unlock(request: Request, user_id: int, aes_key: bytes) -> BackgroundTasks:
+    """Tâches lancées après l'envoi de la réponse, une fois la clé du coffre disponible.
+
+    Arguments:
+        request (Request): La requête HTTP (services de l'application).
+        user_id (int): L'utilisateur.
+        aes_key (bytes): La clé du coffre.
+
+    Returns:
+        BackgroundTasks: Construction de l'index de recherche et empreintes de domaines manquantes.
+
+    """
+    state = request.app.state
+    tasks = BackgroundTasks()
+    tasks.add_task(search_index.build_after_unlock, state.search_indexes, state.session_factory, user_id, aes_key)
+    tasks.add_task(autofill.backfill_after_unlock, state.session_factory, user_id, aes_key)
+    return tasks
+
+
+def safe_next(target: Optional[str]) -> str:
+    """Retourne la page de retour après déverrouillage, limitée à ce site.
+
+    Arguments:
+        target (Optional[str]): Le paramètre `next`.
+
+    Returns:
+        str: Un chemin local, ou "/dashboard".
+
+    """
+    if not target or not target.startswith("/") or target.startswith("//") or "\\" in target:
+        return "/dashboard"
+    return target
+
+
 # Logout
 @auth_router.get("/logout")
-def logout(request: Request) -> HTMLResponse:
+def logout(request: Request, db: Session = Depends(database.get_db)) -> HTMLResponse:
     """Déconnexion de l'utilisateur et suppression de la session.
 
     Arguments:
         request (Request): La requête HTTP.
+        db (Session): La session de base de données.
 
     Returns:
         HTMLResponse : Redirection vers la page de connexion.
 
     """
     response = RedirectResponse(url="/login")
+    auth.lock_vault(request, db)
+    if (user_id := auth.session_user_id(request)) is not None:
+        # L'index de recherche contient des données en clair
+        request.app.state.search_indexes.evict(user_id)
+        audit.record(request, "logout", user_id)
     response.delete_cookie("session_token")
     request.session.clear()  # Supprime toute la session
     return response
@@ -64,19 +103,20 @@ def login(
     """
     # Chercher l'utilisateur dans la base de données
     errors = []
-    db_user: User = db.query(User).filter(User.username == username).first()
-    if not db_user:
-        errors.append("Nom d'utilisateur ou mot de passe incorrect.")
+    db_user: Optional[User] = db.query(User).filter(User.username == username).first()
 
-    # Vérifier le mot de passe
-    if not auth.verify_password(password, db_user.hashed_password):
+    # Vérifier le mot de passe ; un nom inconnu coûte aussi un bcrypt (pas
+    # d'énumération des comptes par le temps de réponse)
+    hashed_password = db_user.hashed_password if db_user else auth.dummy_password_hash()
+    if not auth.verify_password(password, hashed_password) or db_user is None:
         errors.append("Nom d'utilisateur ou mot de passe incorrect.")
 
     # Vérifier le code TOTP
-    if not totp.verify_totp(db_user.totp_secret, totp_token):
+    if db_user is not None and not totp.verify_totp(db_user.totp_secret, totp_token):
         errors.append("Code TOTP invalide.")
 
     if errors:
+        audit.record(request, "login_failed", db_user.id if db_user else None, detail=username)
         return templates.TemplateResponse(
             "login.html.j2",
             {"request": request, "errors": errors},
@@ -87,10 +127,22 @@ def login(
         password,
         bytes.fromhex(db_user.user_salt),
     )
+    if db_user.key_check is None:
+        # Comptes antérieurs au déverrouillage : vérificateur enregistré à la connexion
+        db_user.key_check = PasswordAESEncryption.key_check(aes_key)
+        db.commit()
     response = RedirectResponse(url="/dashboard", status_code=status.HTTP_302_FOUND)
-    auth.register_session_cookie(response, db_user, serializer)
+    auth.register_session_cookie(
+        response,
+        db_user,
+        auth.get_serializer(request),
+        request.app.state.settings.session_max_age,
+    )
 
-    request.session["key"] = aes_key.hex()  # Stocker la clé AES dans la session
+    # La clé reste en mémoire (trousseau) ; la session porte son identifiant et sa version chiffrée
+    auth.unlock_vault(request, db_user, aes_key)
+    response.background = after_unlock(request, db_user.id, aes_key)
+    audit.record(request, "login", db_user.id)
 
     # Enregistrer le cookie de session et rediriger l'utilisateur
     return response
@@ -118,7 +170,7 @@ async def register(
     errors = []
 
     # vérification de la session
-    if auth.check_session(db, request, serializer) is not None:
+    if auth.check_session(db, request) is not None:
         return templates.TemplateResponse("dashboard.html.j2", {"request": request})
 
     # Vérification des champs
@@ -140,7 +192,13 @@ async def register(
         username=username,
         password=password,
         totp_secret=totp_secret,
+        bcrypt_rounds=request.app.state.settings.bcrypt_rounds,
     )
+    aes_key = PasswordAESEncryption.derive_key(
+        password,
+        bytes.fromhex(new_user.user_salt),
+    )
+    new_user.key_check = PasswordAESEncryption.key_check(aes_key)
 
     db.add(new_user)
     db.commit()
@@ -148,11 +206,8 @@ async def register(
 
     qr_code = totp.generate_qr_code(totp_secret, username)
 
-    aes_key = PasswordAESEncryption.derive_key(
-        password,
-        bytes.fromhex(new_user.user_salt),
-    )
-    request.session["key"] = aes_key.hex()  # Stocker la clé AES dans la session
+    auth.unlock_vault(request, new_user, aes_key)
+    audit.record(request, "register", new_user.id)
 
     return templates.TemplateResponse(
         "register_done.html.j2",
@@ -189,7 +244,7 @@ def verify_totp(
 
     """
     # vérification de la session
-    if auth.check_session(db, request, serializer) is not None:
+    if auth.check_session(db, request) is not None:
         return templates.TemplateResponse("dashboard.html.j2", {"request": request})
 
     db_user = db.query(User).filter(User.id == user_id).first()
@@ -218,7 +273,107 @@ def verify_totp(
         )
 
     response = RedirectResponse(url="/dashboard", status_code=status.HTTP_302_FOUND)
-    auth.register_session_cookie(response, db_user, serializer)
+    auth.register_session_cookie(
+        response,
+        db_user,
+        auth.get_serializer(request),
+        request.app.state.settings.session_max_age,
+    )
 
     # Enregistrer le cookie de session et rediriger l'utilisateur
     return response
+
+
+@auth_router.get("/unlock")
+def unlock_view(
+    request: Request,
+    next: Optional[str] = None,
+    db: Session = Depends(database.get_db),
+) -> HTMLResponse:
+    """Affiche le déverrouillage du coffre (session valide, clé oubliée).
+
+    Arguments:
+        request (Request): La requête HTTP.
+        next (Optional[str]): La page à afficher après le déverrouillage.
+        db (Session): Session de base de données.
+
+    Returns:
+        HTMLResponse: Le formulaire, ou une redirection si la session est absente ou le coffre ouvert.
+
+    """
+    if (user := auth.check_session(db, request)) is None:
+        return RedirectResponse(url="/login", status_code=status.HTTP_302_FOUND)
+    if auth.get_session_key(request, user) is not None:
+        return RedirectResponse(url=safe_next(next), status_code=status.HTTP_302_FOUND)
+    return templates.TemplateResponse(
+        "unlock.html.j2",
+        {"request": request, "user": user, "next": safe_next(next)},
+    )
+
+
+@auth_router.post("/unlock")
+def unlock(
+    request: Request,
+    password: Annotated[str, Form()] = ...,
+    next: Annotated[Optional[str], Form()] = None,
+    db: Session = Depends(database.get_db),
+) -> HTMLResponse:
+    """Redérive la clé du coffre et la replace dans le trousseau.
+
+    Seule la dérivation PBKDF2 est refaite : l'utilisateur est déjà identifié
+    par `session_token` et le mot de passe est vérifié par `users.key_check`,
+    sans bcrypt ni TOTP. Un compte sans vérificateur (antérieur) est vérifié
+    une fois par bcrypt, puis le vérificateur est enregistré.
+
+    Arguments:
+        request (Request): La requête HTTP.
+        password (str): Le mot de passe principal.
+        next (Optional[str]): La page à afficher après le déverrouillage.
+        db (Session): Session de base de données.
+
+    Returns:
+        HTMLResponse: Redirection vers `next`, ou le formulaire avec une erreur.
+
+    """
+    if (user := auth.check_session(db, request)) is None:
+        return RedirectResponse(url="/login", status_code=status.HTTP_302_FOUND)
+
+    aes_key = PasswordAESEncryption.derive_key(password, bytes.fromhex(user.user_salt))
+    if user.key_check is None:
+        valid = auth.verify_password(password, user.hashed_password)
+        if valid:
+            user.key_check = PasswordAESEncryption.key_check(aes_key)
+            db.commit()
+    else:
+        valid = hmac.compare_digest(user.key_check, PasswordAESEncryption.key_check(aes_key))
+    if not valid:
+        audit.record(request, "unlock_failed", user.id)
+        return templates.TemplateResponse(
+            "unlock.html.j2",
+            {"request": request, "user": user, "next": safe_next(next), "errors": ["Mot de passe incorrect."]},
+            status_code=status.HTTP_401_UNAUTHORIZED,
+        )
+
+    auth.unlock_vault(request, user, aes_key)
+    response = RedirectResponse(url=safe_next(next), status_code=status.HTTP_302_FOUND)
+    response.background = after_unlock(request, user.id, aes_key)
+    audit.record(request, "unlock", user.id)
+    return response
+
+
+@auth_router.post("/lock")
+def lock(request: Request, db: Session = Depends(database.get_db)) -> HTMLResponse:
+    """Verrouille le coffre : la clé est oubliée, la session reste ouverte.
+
+    Arguments:
+        request (Request): La requête HTTP.
+        db (Session): La session de base de données.
+
+    Returns:
+        HTMLResponse: Redirection vers le déverrouillage.
+
+    """
+    if (user_id := auth.lock_vault(request, db)) is not None:
+        request.app.state.search_indexes.evict(user_id)
+        audit.record(request, "lock", user_id)
+    return RedirectResponse(url="/unlock", status_code=status.HTTP_302_FOUND)
@@ -0,0 +1,60 @@
+"""Ce routeur expose les métriques de l'application au format Prometheus."""
+
+import hmac
+import ipaddress
+
+from fastapi import APIRouter, HTTPException, Request
+from starlette.responses import PlainTextResponse
+
+from app.services.metrics import registry
+
+metrics_router = APIRouter(tags=["metrics"])
+
+
+def is_local_client(request: Request) -> bool:
+    """Indique si la requête provient de la machine locale (adresse de bouclage).
+
+    Arguments:
+        request (Request): La requête HTTP.
+
+    Returns:
+        bool: True pour 127.0.0.0/8 et ::1.
+
+    """
+    if request.client is None:
+        return False
+    try:
+        return ipaddress.ip_address(request.client.host).is_loopback
+    except ValueError:
+        return False
+
+
+@metrics_router.get("/metrics", include_in_schema=False)
+def metrics(request: Request) -> PlainTextResponse:
+    """Retourne toutes les métriques au format texte Prometheus.
+
+    Arguments:
+        request (Request): La requête HTTP.
+
+    Returns:
+        PlainTextResponse: L'exposition Prometheus.
+
+    Raises:
+        HTTPException: 401 si un jeton est configuré et absent ou invalide,
+            403 sans jeton configuré pour un client qui n'est pas local.
+
+    """
+    # Si un jeton est configuré, exiger l'en-tête `Authorization: Bearer <jeton>`
+    token = request.app.state.settings.metrics_token
+    if token:
+        supplied = request.headers.get("authorization", "").removeprefix("Bearer ")
+        if not hmac.compare_digest(supplied.encode(), token.encode()):
+            raise HTTPException(status_code=401, detail="Jeton de métriques invalide")
+    elif not is_local_client(request):
+        # Sans jeton, les compteurs (authentification, limiteur...) restent privés
+        raise HTTPException(status_code=403, detail="Métriques réservées aux clients locaux sans METRICS_TOKEN")
+    return PlainTextResponse(
+        registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+        headers={"Cache-Control": "no-store"},
+    )
@@ -1,29 +1,27 @@
 """Ce fichier contient toutes les routes relatives au coffre fort."""
 
-import multiprocessing
 import uuid
 from base64 import urlsafe_b64decode
 from datetime import datetime
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from fastapi.params import Form
-from itsdangerous import URLSafeTimedSerializer
 from sqlalchemy.orm import Session
 from starlette import status
+from starlette.concurrency import run_in_threadpool
 from starlette.requests import Request
-from starlette.responses import HTMLResponse, RedirectResponse
-from starlette.templating import Jinja2Templates
+from starlette.responses import HTMLResponse, RedirectResponse, StreamingResponse
 
 from app import database
 from app.models import PasswordEntry
 from app.models.password import SharedPasswordEntry
-from app.services import auth, password_utils
+from app.services import audit, auth, autofill, passphrase, password_policy, password_utils, search_index
 from app.services.crypto import PasswordAESEncryption, SharedPasswordEncryption
+from app.services.generator import MAX_STREAM_COUNT
+from app.templating import templates
 
 vault_router = APIRouter()
-serializer = URLSafeTimedSerializer("SECRET_KEY")
-templates = Jinja2Templates(directory="app/templates")
 
 
 @vault_router.post("/add_password")
@@ -52,10 +50,12 @@ async def add_password(
 
     """
     # Vérifier la session de l'utilisateur
-    if (user := auth.check_session(db, request, serializer)) is None:
+    if (user := auth.check_session(db, request)) is None:
         return RedirectResponse(url="/login", status_code=status.HTTP_302_FOUND)
 
-    aes_key = bytes.fromhex(request.session.get("key"))
+    # Coffre verrouillé (clé oubliée par le trousseau) : déverrouiller d'abord
+    if (aes_key := auth.get_session_key(request, user)) is None:
+        return auth.login_redirect(request, user)
 
     new_password_entry = PasswordEntry(
         title=title,
@@ -69,8 +69,17 @@ async def add_password(
 
     # Ajouter à la DB
     db.add(new_password_entry)
+    revision = user.vault_revision
+    user.bump_revision()
     db.commit()
     db.refresh(new_password_entry)
+    search_index.record_changes(
+        request.app.state.search_indexes,
+        user.id,
+        revision,
+        upserts=[(new_password_entry.id, {"title": title, "username": username, "url": url, "email": email})],
+    )
+    audit.record(request, "entry_create", user.id, new_password_entry.id)
 
     return RedirectResponse(url="/dashboard", status_code=status.HTTP_302_FOUND)
 
@@ -93,12 +102,14 @@ async def delete_password(
 
     """
     # Vérifier la session de l'utilisateur
-    if (auth.check_session(db, request, serializer)) is None:
+    if (user := auth.check_session(db, request)) is None:
         return RedirectResponse(url="/login", status_code=status.HTTP_302_FOUND)
 
-    # Récupérer le mot de passe à supprimer
+    # Récupérer le mot de passe à supprimer (uniquement s'il appartient à l'utilisateur)
     password_entry = (
-        db.query(PasswordEntry).filter(PasswordEntry.id == password_id).first()
+        db.query(PasswordEntry)
+        .filter(PasswordEntry.id == password_id, PasswordEntry.user_id == user.id)
+        .first()
     )
 
     if not password_entry:
@@ -106,7 +117,11 @@ async def delete_password(
 
     # Supprimer le mot de passe de la DB
     db.delete(password_entry)
+    revision = user.vault_revision
+    user.bump_revision()
     db.commit()
+    search_index.record_changes(request.app.state.search_indexes, user.id, revision, deletions=[password_id])
+    audit.record(request, "entry_delete", user.id, password_id)
 
     return RedirectResponse(url="/dashboard", status_code=status.HTTP_302_FOUND)
 
@@ -139,18 +154,21 @@ async def update_password(
 
     """
     # Vérifier la session de l'utilisateur
-    if auth.check_session(db, request, serializer) is None:
+    if (user := auth.check_session(db, request)) is None:
         return RedirectResponse(url="/login", status_code=status.HTTP_302_FOUND)
 
-    # Récupérer le mot de passe à mettre à jour
+    # Récupérer le mot de passe à mettre à jour (uniquement s'il appartient à l'utilisateur)
     password_entry = (
-        db.query(PasswordEntry).filter(PasswordEntry.id == password_id).first()
+        db.query(PasswordEntry)
+        .filter(PasswordEntry.id == password_id, PasswordEntry.user_id == user.id)
+        .first()
     )
 
     if not password_entry:
         return {"message": "Password entry not found"}
 
-    aes_key = bytes.fromhex(request.session.get("key"))
+    if (aes_key := auth.get_session_key(request, user)) is None:
+        return auth.login_redirect(request, user)
 
     # Mettre à jour les champs
     password_entry.title = PasswordAESEncryption.encrypt_password(title, aes_key)
@@ -161,10 +179,20 @@ async def update_password(
     password_entry.username = PasswordAESEncryption.encrypt_password(username, aes_key)
     password_entry.email = PasswordAESEncryption.encrypt_password(email, aes_key)
     password_entry.url = PasswordAESEncryption.encrypt_password(url, aes_key)
+    password_entry.domain_tag = autofill.url_tag(url, PasswordAESEncryption.derive_domain_key(aes_key))
     password_entry.complexity = password_utils.calculate_password_strength(password)
 
     # Enregistrer les modifications
+    revision = user.vault_revision
+    user.bump_revision()
     db.commit()
+    search_index.record_changes(
+        request.app.state.search_indexes,
+        user.id,
+        revision,
+        upserts=[(password_id, {"title": title, "username": username, "url": url, "email": email})],
+    )
+    audit.record(request, "entry_update", user.id, password_id)
 
     return RedirectResponse(url="/dashboard", status_code=status.HTTP_302_FOUND)
 
@@ -178,6 +206,7 @@ async def generator(
     use_uppercase: Annotated[bool, Form()] = False,
     use_lowercase: Annotated[bool, Form()] = False,
     num_passwords: Annotated[int, Form()] = ...,
+    policy: Annotated[str, Form()] = "",
 ) -> HTMLResponse:
     """Génère un mot de passe aléatoire en fonction des critères spécifiés.
 
@@ -189,54 +218,178 @@ async def generator(
         use_uppercase (bool): Inclure des lettres majuscules
         use_lowercase (bool): Inclure des lettres minuscules
         num_passwords (int): Nombre de mots de passe à générer
+        policy (str): Politique nommée remplaçant les critères (vide = critères)
 
     Returns:
         HTMLResponse: Réponse HTML avec les mots de passe générés
 
     """
-    with multiprocessing.Pool(processes=multiprocessing.cpu_count()) as pool:
-        # Création d'une liste de paramètres pour chaque mot de passe à générer
-        try:
-            args = [
-                (length, use_special_chars, use_digits, use_uppercase, use_lowercase),
-            ] * num_passwords
-            passwords = pool.starmap(password_utils.generate_password, args)
-        except ValueError:
-            return templates.TemplateResponse(
-                "generator.html.j2",
-                {
-                    "request": request,
-                    "errors": [
-                        "Vous devez sélectionner au moins un critère de caractère pour générer un mot de passe.",
-                    ],
-                    "criteria": {
-                        "length": length,
-                        "num_passwords": "on" if num_passwords else "off",
-                        "use_special_chars": "on" if use_special_chars else "off",
-                        "use_digits": "on" if use_digits else "off",
-                        "use_uppercase": "on" if use_uppercase else "off",
-                        "use_lowercase": "on" if use_lowercase else "off",
-                    },
-                },
+    criteria = {
+        "length": length,
+        "num_passwords": "on" if num_passwords else "off",
+        "use_special_chars": "on" if use_special_chars else "off",
+        "use_digits": "on" if use_digits else "off",
+        "use_uppercase": "on" if use_uppercase else "off",
+        "use_lowercase": "on" if use_lowercase else "off",
+        "policy": policy,
+    }
+
+    generator_service = request.app.state.generator
+    try:
+        if policy:
+            passwords = await run_in_threadpool(
+                generator_service.generate_with_policy,
+                num_passwords,
+                password_policy.get_policy(policy),
             )
+        else:
+            args = (
+                num_passwords,
+                length,
+                use_special_chars,
+                use_digits,
+                use_uppercase,
+                use_lowercase,
+            )
+            # Même en ligne (sans NumPy, en Python pur), la génération ne
+            # doit pas occuper la boucle asyncio ; les gros lots attendent le pool
+            passwords = await run_in_threadpool(generator_service.generate, *args)
+    except ValueError as ex:
+        # Politique inconnue ou invalide, nombre ou longueur hors limites : message du service
+        if policy or use_special_chars or use_digits or use_uppercase or use_lowercase:
+            message = str(ex)
+        else:
+            message = "Vous devez sélectionner au moins un critère de caractère pour générer un mot de passe."
+        return templates.TemplateResponse(
+            "generator.html.j2",
+            {
+                "request": request,
+                "errors": [message],
+                "criteria": criteria,
+                "policies": password_policy.POLICIES,
+            },
+        )
 
     return templates.TemplateResponse(
         "generator.html.j2",
         {
             "request": request,
-            "criteria": {
-                "length": length,
-                "num_passwords": "on" if num_passwords else "off",
-                "use_special_chars": "on" if use_special_chars else "off",
-                "use_digits": "on" if use_digits else "off",
-                "use_uppercase": "on" if use_uppercase else "off",
-                "use_lowercase": "on" if use_lowercase else "off",
-            },
+            "criteria": criteria,
+            "policies": password_policy.POLICIES,
             "passwords": passwords,
         },
     )
 
 
+@vault_router.post("/generator/passphrase")
+def passphrase_generator(
+    request: Request,
+    word_count: Annotated[int, Form()] = 6,
+    separator: Annotated[str, Form()] = "-",
+    capitalization: Annotated[str, Form()] = "none",
+    insert_digit: Annotated[bool, Form()] = False,
+    num_passphrases: Annotated[int, Form()] = 5,
+) -> HTMLResponse:
+    """Génère des phrases de passe à partir de la liste de mots par défaut.
+
+    Arguments:
+        request (Request): Requête FastAPI
+        word_count (int): Nombre de mots par phrase
+        separator (str): Séparateur entre les mots
+        capitalization (str): Mode de majuscules ("none", "all" ou "random")
+        insert_digit (bool): Ajouter un chiffre à un mot
+        num_passphrases (int): Nombre de phrases à générer
+
+    Returns:
+        HTMLResponse: Réponse HTML avec les phrases générées et leur entropie
+
+    """
+    passphrase_criteria = {
+        "word_count": word_count,
+        "separator": separator,
+        "capitalization": capitalization,
+        "insert_digit": "on" if insert_digit else "off",
+        "num_passphrases": num_passphrases,
+    }
+    context = {
+        "request": request,
+        "criteria": {
+            "length": 16,
+            "use_special_chars": "on",
+            "use_digits": "on",
+            "use_uppercase": "on",
+            "use_lowercase": "on",
+            "num_passwords": 5,
+            "policy": "",
+        },
+        "passphrase_criteria": passphrase_criteria,
+        "policies": password_policy.POLICIES,
+    }
+
+    try:
+        context["passphrases"] = [
+            passphrase.generate_passphrase(
+                word_count,
+                separator,
+                capitalization,
+                insert_digit,
+            )
+            for _ in range(max(1, min(num_passphrases, 10)))
+        ]
+    except ValueError as ex:
+        context["passphrase_errors"] = [str(ex)]
+
+    return templates.TemplateResponse("generator.html.j2", context)
+
+
+@vault_router.get("/generator/stream")
+def generator_stream(
+    request: Request,
+    count: int = Query(..., ge=1, le=MAX_STREAM_COUNT),
+    length: int = 16,
+    use_special_chars: bool = True,
+    use_digits: bool = True,
+    use_uppercase: bool = True,
+    use_lowercase: bool = True,
+    policy: str | None = None,
+    db: Session = Depends(database.get_db),
+) -> Response:
+    """Génère un grand nombre de mots de passe sous forme de flux NDJSON.
+
+    Arguments:
+        request (Request): Requête FastAPI
+        count (int): Nombre de mots de passe à générer
+        length (int): Longueur du mot de passe
+        use_special_chars (bool): Inclure des caractères spéciaux
+        use_digits (bool): Inclure des chiffres
+        use_uppercase (bool): Inclure des lettres majuscules
+        use_lowercase (bool): Inclure des lettres minuscules
+        policy (str | None): Politique nommée remplaçant les critères
+        db (Session): Session de base de données
+
+    Returns:
+        Response: Flux `application/x-ndjson`, une ligne par mot de passe
+
+    """
+    if auth.check_session(db, request) is None:
+        return RedirectResponse(url="/login", status_code=status.HTTP_302_FOUND)
+
+    try:
+        chunks = request.app.state.generator.iter_ndjson(
+            count,
+            length,
+            use_special_chars,
+            use_digits,
+            use_uppercase,
+            use_lowercase,
+            policy=password_policy.get_policy(policy) if policy else None,
+        )
+    except ValueError as ex:
+        raise HTTPException(status_code=400, detail=str(ex))
+
+    return StreamingResponse(chunks, media_type="application/x-ndjson")
+
+
 @vault_router.post("/passwords/{password_id}/share")
 async def share_password(
     request: Request,
@@ -256,7 +409,7 @@ async def share_password(
         HTMLResponse: Réponse HTML avec le lien de partage
 
     """
-    if (user := auth.check_session(db, request, serializer)) is None:
+    if (user := auth.check_session(db, request)) is None:
         return RedirectResponse(url="/login", status_code=status.HTTP_302_FOUND)
 
     # Vérifier que l'entrée appartient à l'utilisateur
@@ -276,10 +429,8 @@ async def share_password(
         )
 
     # Récupérér la clée de l'user
-    aes_key = bytes.fromhex(request.session.get("key"))
-
-    if not aes_key:
-        raise HTTPException(status_code=401, detail="AES key missing from session")
+    if (aes_key := auth.get_session_key(request, user)) is None:
+        return auth.login_redirect(request, user)
 
     shared_entry, token = SharedPasswordEncryption.encrypt_shared_password(
         password_entry=password_entry,
@@ -287,6 +438,7 @@ async def share_password(
         db=db,
         validity_hours=validity_hours,
     )
+    audit.record(request, "share_create", user.id, password_id, detail=f"{shared_entry.uuid} ({validity_hours} h)")
 
     share_link = f"{request.base_url}share/{shared_entry.uuid}/{token}"
 
@@ -337,18 +489,27 @@ async def retrieve_shared_password(
             detail="Entrée partagée introuvable ou expirée",
         )
 
+    # Le journal d'audit rattache la consultation au propriétaire de l'entrée
+    owner_id = (
+        db.query(PasswordEntry.user_id)
+        .filter(PasswordEntry.id == shared_entry.original_entry_id)
+        .scalar()
+    )
+
     # Décoder le token pour récupérer l'UUID
     try:
         padding = "=" * (-len(token) % 4)
         decoded_token = urlsafe_b64decode(token + padding)
         share_token = decoded_token.decode()
     except Exception:
+        audit.record(request, "share_access_failed", owner_id, shared_entry.original_entry_id, detail=p_uuid)
         raise HTTPException(status_code=400, detail="Token invalide")
 
     try:
         shared_key = SharedPasswordEncryption.derive_share_token(
             shared_entry.share_token_id,
             share_token,
+            shared_entry.key_version,
         )
 
         # Déchiffrer les données
@@ -372,15 +533,19 @@ async def retrieve_shared_password(
             "url": PasswordAESEncryption.decrypt_password(
                 shared_entry.encrypted_url,
                 shared_key,
-            ),
+            )
+            if shared_entry.encrypted_url
+            else "",
             "expiry_date": shared_entry.expiry_date,
         }
 
+        audit.record(request, "share_access", owner_id, shared_entry.original_entry_id, detail=p_uuid)
         return templates.TemplateResponse(
             "shared_password.html.j2",
             {"request": request, "shared_entry": decrypted_data},
         )
     except Exception:
+        audit.record(request, "share_access_failed", owner_id, shared_entry.original_entry_id, detail=p_uuid)
         raise HTTPException(
             status_code=500,
             detail="Erreur lors de la récupération de l'entrée partagée",
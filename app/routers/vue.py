@@ -1,20 +1,19 @@
 """Ce routeur gère l'acès et le rendu des vues de l'application."""
-from http.client import HTTPException
+from typing import Optional
 
 from fastapi import APIRouter, Depends, Request, Response, status
 from fastapi.responses import HTMLResponse
-from itsdangerous import URLSafeTimedSerializer
 from sqlalchemy.orm import Session
 from starlette.responses import RedirectResponse
-from starlette.templating import Jinja2Templates
 
 from app import database
+from app.dto.passwords import PasswordOut
 from app.models import PasswordEntry
+from app.models.views import list_password_views
 from app.models.user import User
-from app.services import auth
+from app.services import auth, caching, password_policy
+from app.templating import stream_template, templates
 
-serializer = URLSafeTimedSerializer("SECRET_KEY")
-templates = Jinja2Templates(directory="app/templates")
 view_router = APIRouter()
 
 
@@ -33,7 +32,7 @@ async def login(
         RedirectResponse: Redirection vers la page de connexion ou le tableau de bord.
 
     """
-    if auth.check_session(db, request, serializer) is not None:
+    if auth.check_session(db, request) is not None:
         return RedirectResponse(url="/dashboard", status_code=status.HTTP_302_FOUND)
     return RedirectResponse(url="/login", status_code=status.HTTP_302_FOUND)
 
@@ -56,7 +55,7 @@ async def register(
         Response: La page d'inscription.
 
     """
-    if auth.check_session(db, request, serializer) is not None:
+    if auth.check_session(db, request) is not None:
         return RedirectResponse(url="/dashboard", status_code=status.HTTP_302_FOUND)
     return templates.TemplateResponse("register.html.j2", {"request": request})
 
@@ -77,7 +76,7 @@ async def login_view(
 
     """
     # Vérifier la session de l'utilisateur
-    if auth.check_session(db, request, serializer) is not None:
+    if auth.check_session(db, request) is not None:
         return RedirectResponse(url="/dashboard", status_code=status.HTTP_302_FOUND)
     return templates.TemplateResponse("login.html.j2", {"request": request})
 
@@ -85,12 +84,17 @@ async def login_view(
 @view_router.get("/dashboard", response_class=HTMLResponse)
 async def dashboard(
     request: Request,
+    mode: Optional[str] = None,
     db: Session = Depends(database.get_db),
 ) -> Response:
     """Affiche le tableau de bord de l'application.
 
+    En mode "client", les champs sont envoyés chiffrés et déchiffrés par le
+    navigateur (WebCrypto) : le serveur ne déchiffre rien.
+
     Arguments:
         request (Request): La requête HTTP.
+        mode (Optional[str]): "client" ou "server" pour changer de mode (mémorisé en session).
         db (Session): Session de base de données.
 
     Returns:
@@ -98,26 +102,37 @@ async def dashboard(
 
     """
     # Vérifier la session de l'utilisateur
-    if (user :=auth.check_session(db, request, serializer)) is None:
+    if (user :=auth.check_session(db, request)) is None:
         return RedirectResponse(url="/login", status_code=status.HTTP_302_FOUND)
 
-    # Récupérer le salt en session
-    aes_key = bytes.fromhex(request.session.get("key"))
-
-
-    # Récupère tous les mots de passe de l'utilisateur
-    passwords = db.query(PasswordEntry).filter(PasswordEntry.user_id == user.id).all()
-
-    if not aes_key:
-        raise HTTPException(status_code=401, detail="AES key missing from session")
-
-    # Déchiffre les mots de passe avec la clé AES dérivée de la session
-    decrypted_passwords = [entry.get_decrypted(aes_key) for entry in passwords]
-
-    return templates.TemplateResponse(
+    # Coffre verrouillé (clé oubliée par le trousseau) : déverrouiller puis revenir ici
+    if (aes_key := auth.get_session_key(request, user)) is None:
+        return auth.login_redirect(request, user)
+
+    if mode in ("client", "server"):
+        request.session["dashboard_mode"] = mode
+    client_mode = request.session.get("dashboard_mode") == "client"
+
+    # Le navigateur a déjà cette révision du coffre : ni requête ni déchiffrement
+    etag = caching.vault_etag(user, "dashboard-client" if client_mode else "dashboard")
+    if caching.is_not_modified(request, etag):
+        return caching.not_modified(etag)
+
+    if client_mode:
+        # Les champs restent chiffrés : le navigateur les déchiffre
+        entries = list_password_views(db, user.id, None, PasswordOut.model_fields)
+    else:
+        # Seuls les champs affichés sont déchiffrés ; le mot de passe est
+        # demandé à l'API lorsqu'il est affiché, copié ou modifié
+        entries = list_password_views(db, user.id, aes_key, PasswordEntry.DISPLAY_FIELDS)
+
+    # Rendu en flux : la page n'est jamais construite entièrement en mémoire
+    response = stream_template(
+        request,
         "dashboard.html.j2",
-        {"request": request, "user": user, "passwords": decrypted_passwords},
+        {"user": user, "passwords": entries, "client_mode": client_mode},
     )
+    return caching.set_etag(response, etag)
 
 
 @view_router.get("/generator", response_class=HTMLResponse)
@@ -132,7 +147,7 @@ def generator(request: Request, db: Session = Depends(database.get_db)) -> Respo
         Response: La page de génération de mots de passe.
 
     """
-    if auth.check_session(db, request, serializer) is None:
+    if auth.check_session(db, request) is None:
         return RedirectResponse(url="/login", status_code=status.HTTP_302_FOUND)
 
     return templates.TemplateResponse(
@@ -146,7 +161,9 @@ def generator(request: Request, db: Session = Depends(database.get_db)) -> Respo
                 "use_uppercase": "on",
                 "use_lowercase": "on",
                 "num_passwords": 5,
+                "policy": "",
             },
+            "policies": password_policy.POLICIES,
             "password": [],
         },
     )
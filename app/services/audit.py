@@ -0,0 +1,367 @@
+"""Journal d'audit asynchrone : connexions, partages et modifications du coffre.
+
+Écrire une ligne dans chaque gestionnaire ajouterait une écriture SQLite et un
+commit aux chemins les plus fréquents. Les gestionnaires se contentent donc de
+déposer l'événement dans une file bornée en mémoire (`record`, sans E/S) ; un
+thread d'écriture les insère par lots, en une transaction, dès que
+`AUDIT_BATCH_SIZE` événements sont en attente ou `AUDIT_FLUSH_MS` après le
+premier d'entre eux.
+
+Contre-pression, quand la file (`AUDIT_QUEUE_SIZE`) est pleine :
+    - "drop" (par défaut) : le nouvel événement est abandonné, la requête
+      n'attend jamais ;
+    - "block" : l'événement attend au plus `AUDIT_FLUSH_MS` qu'une place se
+      libère, puis il est abandonné. Une route synchrone (pool de threads)
+      attend elle-même ; depuis la boucle asyncio, l'attente est confiée au
+      pool de threads et la boucle n'est jamais bloquée.
+Les abandons sont comptés (`audit_events_total{outcome="dropped"}`) et signalés
+dans les logs.
+
+Chaque application a son journal (`app.state.audit_log`, créé par
+`create_app`), écrit dans sa base. À l'arrêt de l'application (lifespan), la
+file est vidée et écrite avant la fin du thread. Un lot dont l'écriture échoue
+est journalisé et compté (`outcome="failed"`), pas réessayé.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import datetime
+import logging
+import queue
+import threading
+import time
+import weakref
+from typing import TYPE_CHECKING, Optional
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from app.models.audit import AuditEvent
+from app.services.metrics import registry
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Types d'événements enregistrés
+ACTIONS = (
+    "register",
+    "login",
+    "login_failed",
+    "logout",
+    "unlock",
+    "unlock_failed",
+    "lock",
+    "entry_create",
+    "entry_update",
+    "entry_delete",
+    "share_create",
+    "share_access",
+    "share_access_failed",
+)
+BACKPRESSURE_POLICIES = ("drop", "block")
+
+audit_events = registry.counter(
+    "audit_events_total",
+    "Événements d'audit, par issue (written, dropped, failed).",
+    ("outcome",),
+)
+audit_flush_duration = registry.histogram(
+    "audit_flush_duration_seconds",
+    "Durée d'écriture d'un lot d'événements d'audit.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+# Marqueur d'arrêt du thread d'écriture
+_STOP = object()
+
+
+class AuditLog:
+    """File d'événements d'audit et thread d'écriture par lots.
+
+    Attributs :
+        enabled (bool) : Enregistre les événements (sinon `record` est sans effet).
+        batch_size (int) : Nombre d'événements déclenchant l'écriture d'un lot.
+        flush_interval (float) : Attente maximale d'un événement avant écriture, en secondes.
+        policy (str) : Contre-pression quand la file est pleine ("drop" ou "block").
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        max_queue: int = 10_000,
+        batch_size: int = 500,
+        flush_interval: float = 0.2,
+        policy: str = "drop",
+    ) -> None:
+        """Initialise le journal, sans démarrer le thread d'écriture.
+
+        Arguments:
+            enabled (bool): Enregistre les événements.
+            max_queue (int): Capacité de la file.
+            batch_size (int): Nombre d'événements déclenchant l'écriture d'un lot.
+            flush_interval (float): Attente maximale d'un événement avant écriture, en secondes.
+            policy (str): Contre-pression quand la file est pleine ("drop" ou "block").
+
+        Raises:
+            ValueError: Si la politique est inconnue.
+
+        """
+        if policy not in BACKPRESSURE_POLICIES:
+            msg = f"Politique de contre-pression inconnue : {policy!r} (drop ou block)"
+            raise ValueError(msg)
+        self.enabled = enabled
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self._queue: queue.Queue = queue.Queue(max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._engine: Optional[Engine] = None
+        self._last_drop_warning = 0.0
+        _journals.add(self)
+
+    def pending(self) -> int:
+        """Nombre d'événements en attente d'écriture."""
+        return self._queue.qsize()
+
+    def record(
+        self,
+        action: str,
+        user_id: Optional[int] = None,
+        entry_id: Optional[int] = None,
+        ip: Optional[str] = None,
+        detail: Optional[str] = None,
+    ) -> bool:
+        """Dépose un événement dans la file, sans accès à la base.
+
+        Arguments:
+            action (str): Le type d'événement (voir `ACTIONS`).
+            user_id (Optional[int]): L'utilisateur concerné.
+            entry_id (Optional[int]): L'entrée du coffre concernée.
+            ip (Optional[str]): L'adresse du client.
+            detail (Optional[str]): Une précision libre (tronquée à 200 caractères).
+
+        Returns:
+            bool: False si l'événement a été abandonné (file pleine) ou le journal
+                désactivé. En "block" depuis la boucle, True : l'attente se poursuit
+                dans le pool de threads (abandon éventuel compté dans `audit_events_total`).
+
+        """
+        if not self.enabled:
+            return False
+        event = {
+            "created_at": datetime.datetime.now(tz=datetime.timezone.utc),
+            "action": action,
+            "user_id": user_id,
+            "entry_id": entry_id,
+            "ip": ip,
+            "detail": detail[:200] if detail else None,
+        }
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            if self.policy != "block":
+                self._dropped()
+                return False
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                # Route synchrone, dans le pool de threads : l'attente est permise
+                return self._put_waiting(event)
+            # Jamais d'attente sur la boucle asyncio
+            loop.run_in_executor(None, self._put_waiting, event)
+        return True
+
+    def _put_waiting(self, event: dict) -> bool:
+        """Dépose un événement en attendant au plus `flush_interval` une place libre."""
+        try:
+            self._queue.put(event, timeout=self.flush_interval)
+        except queue.Full:
+            self._dropped()
+            return False
+        return True
+
+    def _dropped(self) -> None:
+        """Compte un événement abandonné et le signale (au plus un avertissement toutes les 10 s)."""
+        audit_events.inc(labels=("dropped",))
+        now = time.monotonic()
+        if now - self._last_drop_warning > 10:
+            self._last_drop_warning = now
+            logger.warning("File d'audit pleine (%d) : événements abandonnés", self._queue.maxsize)
+
+    def start(self, engine: Engine) -> None:
+        """Démarre le thread d'écriture (idempotent).
+
+        Arguments:
+            engine (Engine): Le moteur de la base où écrire les événements.
+
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._engine = engine
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Écrit les événements en attente puis arrête le thread d'écriture.
+
+        Arguments:
+            timeout (float): Attente maximale de la fin de l'écriture, en secondes.
+
+        """
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning("Arrêt du journal d'audit : %d événements non écrits", self.pending())
+        self._thread = None
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Attend l'écriture de tous les événements déposés avant l'appel.
+
+        Arguments:
+            timeout (float): Attente maximale, en secondes.
+
+        Returns:
+            bool: True si les événements ont été écrits dans le délai.
+
+        """
+        if self._thread is None:
+            return False
+        done = threading.Event()
+        self._queue.put(done, timeout=timeout)
+        return done.wait(timeout)
+
+    def _run(self) -> None:
+        """Boucle du thread d'écriture : un lot par `batch_size` événements ou par intervalle."""
+        while True:
+            item = self._queue.get()
+            batch, markers, stopping = [], [], item is _STOP
+            if isinstance(item, threading.Event):
+                markers.append(item)
+            elif not stopping:
+                batch.append(item)
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    if item is _STOP:
+                        stopping = True
+                        break
+                    if isinstance(item, threading.Event):
+                        # `flush` : écrire tout de suite ce qui précède le marqueur
+                        markers.append(item)
+                        break
+                    batch.append(item)
+            if stopping:
+                # Vider la file : les événements déposés avant l'arrêt sont écrits
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if isinstance(item, threading.Event):
+                        markers.append(item)
+                    elif item is not _STOP:
+                        batch.append(item)
+            for start in range(0, len(batch), self.batch_size):
+                self._write(batch[start : start + self.batch_size])
+            for marker in markers:
+                marker.set()
+            if stopping:
+                return
+
+    def _write(self, batch: list[dict]) -> None:
+        """Insère un lot d'événements en une transaction."""
+        if not batch:
+            return
+        start = time.perf_counter()
+        try:
+            with self._engine.begin() as connection:
+                connection.execute(insert(AuditEvent.__table__), batch)
+        except Exception:
+            audit_events.inc(len(batch), ("failed",))
+            logger.exception("Écriture du journal d'audit impossible (%d événements perdus)", len(batch))
+            return
+        audit_flush_duration.observe(time.perf_counter() - start)
+        audit_events.inc(len(batch), ("written",))
+
+
+# Journaux des applications du processus, pour les métriques
+_journals: "weakref.WeakSet[AuditLog]" = weakref.WeakSet()
+
+registry.gauge(
+    "audit_queue_depth",
+    "Événements d'audit en attente d'écriture.",
+    function=lambda: sum(journal.pending() for journal in list(_journals)),
+)
+
+
+def record(
+    request,
+    action: str,
+    user_id: Optional[int] = None,
+    entry_id: Optional[int] = None,
+    detail: Optional[str] = None,
+) -> bool:
+    """Enregistre un événement produit par une requête dans le journal de son application.
+
+    Arguments:
+        request: La requête HTTP.
+        action (str): Le type d'événement (voir `ACTIONS`).
+        user_id (Optional[int]): L'utilisateur concerné.
+        entry_id (Optional[int]): L'entrée du coffre concernée.
+        detail (Optional[str]): Une précision libre.
+
+    Returns:
+        bool: False si l'événement a été abandonné.
+
+    """
+    ip = request.client.host if request.client else None
+    return request.app.state.audit_log.record(action, user_id, entry_id, ip, detail)
+
+
+def list_events(
+    db: Session,
+    user_id: int,
+    action: Optional[str] = None,
+    since: Optional[datetime.datetime] = None,
+    before_id: Optional[int] = None,
+    limit: int = 100,
+) -> list[AuditEvent]:
+    """Retourne les événements d'un utilisateur, du plus récent au plus ancien.
+
+    La pagination se fait par identifiant (`before_id`), servie par les index
+    (user_id, id) et (user_id, action, id).
+
+    Arguments:
+        db (Session): Session de base de données.
+        user_id (int): L'utilisateur.
+        action (Optional[str]): Ne retenir qu'un type d'événement.
+        since (Optional[datetime.datetime]): Ne retenir que les événements postérieurs (UTC si sans fuseau).
+        before_id (Optional[int]): Ne retenir que les événements d'identifiant inférieur (page suivante).
+        limit (int): Nombre maximal d'événements.
+
+    Returns:
+        list[AuditEvent]: Les événements.
+
+    """
+    query = select(AuditEvent).where(AuditEvent.user_id == user_id)
+    if action is not None:
+        query = query.where(AuditEvent.action == action)
+    if since is not None:
+        # Dates stockées en UTC (SQLite les relit sans fuseau) : comparer en UTC
+        if since.tzinfo is not None:
+            since = since.astimezone(datetime.timezone.utc)
+        query = query.where(AuditEvent.created_at >= since)
+    if before_id is not None:
+        query = query.where(AuditEvent.id < before_id)
+    return list(db.scalars(query.order_by(AuditEvent.id.desc()).limit(limit)))
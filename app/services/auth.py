@@ -1,27 +1,75 @@
 """Ce service gère l'authentification des utilisateurs et la gestion des sessions."""
+import secrets
+import time
+from functools import lru_cache
 from typing import Optional
 
+from urllib.parse import quote
+
 from fastapi import Response
+from itsdangerous import BadSignature
 from itsdangerous import URLSafeTimedSerializer as Serializer
-from passlib.context import CryptContext
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from starlette import status
+from starlette.responses import RedirectResponse
 
 from app.models import user as models
 from app.models.user import User
+from app.services.keyring import keyring_restores
+from app.services.metrics import auth_attempts, password_verify_duration
+
+# Coût par défaut des nouveaux hachages (réglage `BCRYPT_ROUNDS` de l'application)
+BCRYPT_ROUNDS = 12
+# Clés de la session (SessionMiddleware) : identifiant du trousseau, clé du
+# coffre chiffrée par `SessionKeyWrapper` et date de sa dernière utilisation
+VAULT_SESSION_KEY = "vault"
+VAULT_WRAPPED_SESSION_KEY = "vault_key"
+VAULT_SEEN_SESSION_KEY = "vault_seen"
+
+
+@lru_cache(maxsize=4)
+def get_pwd_context(rounds: int = BCRYPT_ROUNDS):
+    """Construit le contexte passlib au premier hachage ou à la première vérification.
+
+    passlib et son backend bcrypt ne sont ainsi pas chargés au démarrage. Le
+    coût ne concerne que les nouveaux hachages : chaque hachage porte le sien.
+
+    Arguments:
+        rounds (int): Le coût bcrypt des nouveaux hachages.
+
+    Returns:
+        CryptContext: Le contexte de hachage bcrypt.
+
+    """
+    from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
 
 
-def hash_password(password: str) -> str:
+def hash_password(password: str, rounds: int = BCRYPT_ROUNDS) -> str:
     """Hache le mot de passe en utilisant bcrypt.
 
     Arguments:
         password (str): Le mot de passe à hacher.
+        rounds (int): Le coût bcrypt (logarithme du nombre d'itérations).
 
     Returns:
         str: Le mot de passe haché.
 
     """
-    return pwd_context.hash(password)
+    return get_pwd_context(rounds).hash(password)
+
+
+@lru_cache(maxsize=1)
+def dummy_password_hash() -> str:
+    """Hachage d'un mot de passe aléatoire, vérifié pour un nom d'utilisateur inconnu.
+
+    Returns:
+        str: Un hachage bcrypt au coût par défaut, qu'aucun mot de passe ne vérifie.
+
+    """
+    return hash_password(secrets.token_urlsafe(32))
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -35,7 +83,11 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         bool: True si les mots de passe correspondent, False sinon.
 
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    start = time.perf_counter()
+    valid = get_pwd_context().verify(plain_password, hashed_password)
+    password_verify_duration.observe(time.perf_counter() - start)
+    auth_attempts.inc(labels=("password", "success" if valid else "failure"))
+    return valid
 
 
 def authenticate_user(db, username: str, password: str) -> Optional[User]:
@@ -56,16 +108,28 @@ def authenticate_user(db, username: str, password: str) -> Optional[User]:
     return user
 
 
-def check_session(db, request, serializer: Serializer) -> Optional[User]:
-    """Vérifie si l'utilisateur est authentifié en vérifiant le cookie de session.
+def get_serializer(request) -> Serializer:
+    """Retourne le sérialiseur des cookies de session, partagé par l'application.
+
+    Arguments:
+        request: La requête HTTP.
+
+    Returns:
+        Serializer: Le sérialiseur créé par `create_app`.
+
+    """
+    return request.app.state.serializer
+
+
+def session_user_id(request, serializer: Optional[Serializer] = None) -> Optional[int]:
+    """Retourne l'identifiant porté par le cookie de session, sans accès à la base.
 
     Arguments:
-        db (Session): La session de base de données.
         request: La requête HTTP contenant le cookie de session.
-        serializer (Serializer): Le sérialiseur pour gérer les cookies de session.
+        serializer (Optional[Serializer]): Le sérialiseur (par défaut, celui de l'application).
 
     Returns:
-        Optional[User]: L'utilisateur authentifié si le cookie est valide, None sinon.
+        Optional[int]: L'identifiant de l'utilisateur, ou None si le cookie est absent ou invalide.
 
     """
     session_token = request.cookies.get("session_token")
@@ -73,8 +137,32 @@ def check_session(db, request, serializer: Serializer) -> Optional[User]:
         return None
 
     # Désérialiser le jeton pour obtenir l'ID utilisateur
-    user_data = serializer.loads(session_token)
-    user_id = user_data.get("user_id")
+    try:
+        user_data = (serializer or get_serializer(request)).loads(
+            session_token,
+            max_age=request.app.state.settings.session_max_age,
+        )
+    except BadSignature:
+        # Jeton altéré, expiré ou signé avec un ancien secret : session absente
+        return None
+    return user_data.get("user_id")
+
+
+def check_session(db, request, serializer: Optional[Serializer] = None) -> Optional[User]:
+    """Vérifie si l'utilisateur est authentifié en vérifiant le cookie de session.
+
+    Arguments:
+        db (Session): La session de base de données.
+        request: La requête HTTP contenant le cookie de session.
+        serializer (Optional[Serializer]): Le sérialiseur (par défaut, celui de l'application).
+
+    Returns:
+        Optional[User]: L'utilisateur authentifié si le cookie est valide, None sinon.
+
+    """
+    user_id = session_user_id(request, serializer)
+    if user_id is None:
+        return None
 
     # Chercher l'utilisateur dans la base de données
     user = db.query(User).filter(models.User.id == user_id).first()
@@ -84,10 +172,134 @@ def check_session(db, request, serializer: Serializer) -> Optional[User]:
     return user
 
 
+def get_session_key(request, user: User) -> Optional[bytes]:
+    """Récupère la clé AES du coffre déverrouillé par cette session.
+
+    La clé est cherchée dans le trousseau de l'application. Absente (requête
+    reçue par un autre worker, clé évincée), elle est déchiffrée depuis la
+    session et replacée dans le trousseau, sauf si elle est inutilisée depuis
+    plus de `KEYRING_IDLE_SECONDS`. Dans les deux cas, elle doit dater de
+    l'époque de verrouillage courante de l'utilisateur (`users.vault_epoch`) :
+    une session copiée avant `/lock` ou la déconnexion ne rouvre pas le coffre.
+
+    Arguments:
+        request: La requête HTTP.
+        user (User): L'utilisateur authentifié.
+
+    Returns:
+        Optional[bytes]: La clé AES, ou None si le coffre est verrouillé.
+
+    """
+    state = request.app.state
+    session = request.session
+    epoch = user.vault_epoch or 0
+    aes_key = state.keyring.get(session.get(VAULT_SESSION_KEY), user.id, epoch)
+    now = int(time.time())
+    if aes_key is None:
+        wrapped = session.get(VAULT_WRAPPED_SESSION_KEY)
+        if not wrapped:
+            return None
+        if now - session.get(VAULT_SEEN_SESSION_KEY, 0) > state.keyring.idle_timeout:
+            # Inutilisée trop longtemps, dans tous les workers : coffre verrouillé
+            _forget_session_key(request)
+            return None
+        aes_key = state.key_wrapper.unwrap(user.id, epoch, wrapped)
+        if aes_key is None:
+            # Autre secret, ou coffre verrouillé depuis : la clé est inutilisable
+            _forget_session_key(request)
+            return None
+        session[VAULT_SESSION_KEY] = state.keyring.put(user.id, epoch, aes_key, session.get(VAULT_SESSION_KEY))
+        keyring_restores.inc()
+    session[VAULT_SEEN_SESSION_KEY] = now
+    return aes_key
+
+
+def unlock_vault(request, user: User, aes_key: bytes) -> None:
+    """Place la clé du coffre dans le trousseau, et en session son identifiant et sa version chiffrée.
+
+    Arguments:
+        request: La requête HTTP.
+        user (User): Le propriétaire du coffre.
+        aes_key (bytes): La clé AES dérivée.
+
+    """
+    state = request.app.state
+    epoch = user.vault_epoch or 0
+    state.keyring.lock(request.session.get(VAULT_SESSION_KEY))
+    request.session[VAULT_SESSION_KEY] = state.keyring.put(user.id, epoch, aes_key)
+    request.session[VAULT_WRAPPED_SESSION_KEY] = state.key_wrapper.wrap(user.id, epoch, aes_key)
+    request.session[VAULT_SEEN_SESSION_KEY] = int(time.time())
+
+
+def _forget_session_key(request) -> Optional[int]:
+    """Oublie la clé du coffre de cette session, dans la session et dans le trousseau local.
+
+    Arguments:
+        request: La requête HTTP.
+
+    Returns:
+        Optional[int]: Le propriétaire de la clé oubliée du trousseau, ou None.
+
+    """
+    request.session.pop(VAULT_WRAPPED_SESSION_KEY, None)
+    request.session.pop(VAULT_SEEN_SESSION_KEY, None)
+    return request.app.state.keyring.lock(request.session.pop(VAULT_SESSION_KEY, None))
+
+
+def lock_vault(request, db: Session) -> Optional[int]:
+    """Verrouille le coffre de l'utilisateur de cette session, dans tous les workers.
+
+    La clé est oubliée de la session et du trousseau local, et l'époque de
+    verrouillage de l'utilisateur est incrémentée en base : les clés
+    déverrouillées auparavant, y compris dans une copie du cookie de session
+    ou dans le trousseau d'un autre worker, sont refusées.
+
+    Arguments:
+        request: La requête HTTP.
+        db (Session): La session de base de données.
+
+    Returns:
+        Optional[int]: Le propriétaire du coffre verrouillé, ou None si la
+        session ne portait pas de coffre déverrouillé.
+
+    """
+    had_key = VAULT_WRAPPED_SESSION_KEY in request.session or VAULT_SESSION_KEY in request.session
+    _forget_session_key(request)
+    user_id = session_user_id(request)
+    if user_id is None:
+        return None
+    db.execute(update(User).where(User.id == user_id).values(vault_epoch=User.vault_epoch + 1))
+    db.commit()
+    return user_id if had_key else None
+
+
+def login_redirect(request, user: Optional[User]) -> RedirectResponse:
+    """Redirige vers la connexion, ou vers `/unlock` si seule la clé du coffre manque.
+
+    Après le déverrouillage, l'utilisateur revient à la page demandée (pour
+    une requête GET) ou au tableau de bord.
+
+    Arguments:
+        request: La requête HTTP.
+        user (Optional[User]): L'utilisateur authentifié, ou None.
+
+    Returns:
+        RedirectResponse: La redirection (302).
+
+    """
+    if user is None:
+        return RedirectResponse(url="/login", status_code=status.HTTP_302_FOUND)
+    target = "/dashboard"
+    if request.method == "GET":
+        target = request.url.path + (f"?{request.url.query}" if request.url.query else "")
+    return RedirectResponse(url=f"/unlock?next={quote(target, safe='')}", status_code=status.HTTP_302_FOUND)
+
+
 def register_session_cookie(
     response: Response,
     user: User,
     serializer: Serializer,
+    max_age: int,
 ) -> Response:
     """Enregistre le cookie de session pour l'utilisateur.
 
@@ -95,6 +307,7 @@ def register_session_cookie(
         response (Response): La réponse HTTP à laquelle ajouter le cookie.
         user (User): L'utilisateur pour lequel enregistrer le cookie.
         serializer (Serializer): Le sérialiseur pour gérer les cookies de session.
+        max_age (int): La durée de vie du cookie, en secondes (`SESSION_MAX_AGE`).
 
     Returns:
         Response: La réponse HTTP avec le cookie de session ajouté.
@@ -109,7 +322,7 @@ def register_session_cookie(
         key="session_token",
         value=session_token,
         httponly=True,  # Empêche l'accès via JavaScript
-        max_age=3600,  # Durée de vie de 1 heure
+        max_age=max_age,  # Durée de vie (SESSION_MAX_AGE)
         secure=True,  # Assure que le cookie soit envoyé uniquement via HTTPS
         samesite="Strict",  # Sécurise le cookie pour éviter les attaques CSRF
     )
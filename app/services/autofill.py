@@ -0,0 +1,209 @@
+"""Index des entrées du coffre par domaine, pour le remplissage automatique.
+
+L'URL d'une entrée est chiffrée : trouver les entrées d'un site imposerait de
+déchiffrer tout le coffre à chaque page visitée. À l'écriture, le domaine
+enregistrable de l'URL (`login.example.co.uk` -> `example.co.uk`) est réduit
+à une empreinte HMAC-SHA256 dont la clé est dérivée de la clé du coffre
+(`PasswordAESEncryption.derive_domain_key`), stockée dans la colonne indexée
+`passwords.domain_tag`. La recherche calcule l'empreinte du domaine demandé et
+ne lit puis ne déchiffre que les entrées correspondantes.
+
+`domain_tag` vaut "" pour une URL sans domaine et NULL pour une entrée pas
+encore indexée (créée avant cette colonne) : ces entrées sont complétées dès
+que la clé du coffre est disponible (connexion, première recherche).
+
+Le domaine enregistrable est déterminé sans liste publique des suffixes
+complète : les suffixes à deux niveaux les plus courants sont connus
+(`co.uk`, `com.au`, `gouv.fr`...), les autres domaines gardent leurs deux
+derniers niveaux.
+"""
+
+import ipaddress
+from collections.abc import Iterable
+from typing import Optional
+from urllib.parse import urlsplit
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.models import PasswordEntry
+from app.models.views import PasswordView, list_password_views
+from app.services.crypto import PasswordAESEncryption
+
+# Suffixes publics à deux niveaux (sous lesquels un domaine a trois niveaux)
+MULTI_LABEL_SUFFIXES = frozenset(
+    f"{second}.{tld}"
+    for tld, seconds in {
+        "uk": ("co", "org", "ac", "gov", "ltd", "plc", "me", "net", "nhs", "sch"),
+        "au": ("com", "net", "org", "edu", "gov", "asn", "id"),
+        "nz": ("co", "org", "net", "ac", "govt", "geek", "school"),
+        "jp": ("co", "ne", "or", "ac", "go", "ad", "ed", "gr", "lg"),
+        "br": ("com", "net", "org", "gov", "edu"),
+        "in": ("co", "net", "org", "firm", "gen", "ind", "ac", "edu", "gov", "res"),
+        "za": ("co", "org", "net", "gov", "ac", "web"),
+        "fr": ("gouv", "asso", "com", "tm", "nom"),
+        "cn": ("com", "net", "org", "gov", "edu"),
+        "kr": ("co", "or", "ne", "go", "ac", "re"),
+        "il": ("co", "org", "net", "ac", "gov"),
+        "tr": ("com", "net", "org", "gov", "edu", "gen"),
+        "mx": ("com", "net", "org", "gob", "edu"),
+        "ar": ("com", "net", "org", "gob", "edu"),
+        "sg": ("com", "net", "org", "gov", "edu"),
+        "hk": ("com", "net", "org", "gov", "edu"),
+        "tw": ("com", "net", "org", "gov", "edu"),
+        "ua": ("com", "net", "org", "gov", "edu"),
+        "ru": ("com", "net", "org"),
+        "pl": ("com", "net", "org"),
+        "es": ("com", "org", "nom", "gob", "edu"),
+        "be": ("ac",),
+        "at": ("co", "or", "ac", "gv"),
+        "ch": ("ch",),
+    }.items()
+    for second in seconds
+) | frozenset(("github.io", "gitlab.io", "herokuapp.com", "blogspot.com", "pages.dev", "netlify.app", "vercel.app"))
+
+# Taille des lots de l'indexation des entrées existantes
+BACKFILL_BATCH = 1000
+
+
+def registrable_domain(url: Optional[str]) -> str:
+    """Retourne le domaine enregistrable d'une URL.
+
+    Arguments:
+        url (Optional[str]): L'URL, avec ou sans schéma (`example.com/login` accepté).
+
+    Returns:
+        str: Le domaine normalisé (minuscules, IDN en punycode), l'adresse IP
+        ou "" si l'URL n'a pas de nom d'hôte.
+
+    """
+    url = (url or "").strip()
+    if not url:
+        return ""
+    if "://" not in url:
+        url = "//" + url
+    try:
+        host = urlsplit(url).hostname or ""
+    except ValueError:
+        return ""
+    host = host.rstrip(".")
+    if not host:
+        return ""
+    try:
+        return str(ipaddress.ip_address(host))
+    except ValueError:
+        pass
+    try:
+        host = host.encode("idna").decode("ascii")
+    except UnicodeError:
+        return ""
+    labels = host.split(".")
+    if len(labels) <= 2:
+        return host
+    size = 3 if ".".join(labels[-2:]) in MULTI_LABEL_SUFFIXES else 2
+    return ".".join(labels[-size:])
+
+
+def url_tag(url: Optional[str], domain_key: bytes) -> str:
+    """Retourne l'empreinte stockée dans `domain_tag` pour une URL.
+
+    Arguments:
+        url (Optional[str]): L'URL en clair.
+        domain_key (bytes): La clé de `PasswordAESEncryption.derive_domain_key`.
+
+    Returns:
+        str: L'empreinte du domaine, ou "" si l'URL n'a pas de domaine.
+
+    """
+    domain = registrable_domain(url)
+    return PasswordAESEncryption.domain_tag(domain, domain_key) if domain else ""
+
+
+def backfill_domain_tags(db: Session, user_id: int, aes_key: bytes) -> int:
+    """Indexe les entrées d'un utilisateur dont `domain_tag` n'est pas encore calculé.
+
+    Les URL sont déchiffrées par lots (`decrypt_many`) et les empreintes
+    écrites par des UPDATE groupés. La révision du coffre ne change pas : le
+    contenu visible des entrées est inchangé.
+
+    Arguments:
+        db (Session): Session de base de données.
+        user_id (int): L'utilisateur.
+        aes_key (bytes): La clé du coffre.
+
+    Returns:
+        int: Le nombre d'entrées indexées.
+
+    """
+    domain_key = PasswordAESEncryption.derive_domain_key(aes_key)
+    done = 0
+    while True:
+        rows = db.execute(
+            select(PasswordEntry.id, PasswordEntry.url)
+            .where(PasswordEntry.user_id == user_id, PasswordEntry.domain_tag.is_(None))
+            .limit(BACKFILL_BATCH),
+        ).all()
+        if not rows:
+            return done
+        urls = PasswordAESEncryption.decrypt_many([url or "" for _, url in rows], aes_key)
+        db.execute(
+            update(PasswordEntry),
+            [{"id": entry_id, "domain_tag": url_tag(url, domain_key)} for (entry_id, _), url in zip(rows, urls)],
+        )
+        db.commit()
+        done += len(rows)
+
+
+def backfill_after_unlock(session_factory: sessionmaker, user_id: int, aes_key: bytes) -> None:
+    """Indexe les entrées existantes d'un coffre qui vient d'être ouvert (tâche de fond).
+
+    Arguments:
+        session_factory (sessionmaker): La fabrique de sessions de l'application.
+        user_id (int): L'utilisateur.
+        aes_key (bytes): La clé du coffre.
+
+    """
+    db = session_factory()
+    try:
+        backfill_domain_tags(db, user_id, aes_key)
+    finally:
+        db.close()
+
+
+def find_entries(
+    db: Session,
+    user_id: int,
+    aes_key: bytes,
+    url: str,
+    fields: Iterable[str],
+) -> tuple[str, list[PasswordView]]:
+    """Retourne les entrées d'un utilisateur enregistrées pour le site d'une URL.
+
+    Toute URL du même domaine enregistrable correspond
+    (`https://login.example.com` trouve `www.example.com/account`).
+
+    Arguments:
+        db (Session): Session de base de données.
+        user_id (int): L'utilisateur.
+        aes_key (bytes): La clé du coffre.
+        url (str): L'URL de la page à remplir.
+        fields (Iterable[str]): Les champs de `PasswordOut` à déchiffrer.
+
+    Returns:
+        tuple[str, list[PasswordView]]: Le domaine enregistrable et les entrées correspondantes.
+
+    """
+    domain = registrable_domain(url)
+    if not domain:
+        return "", []
+    # Entrées antérieures à l'index : complétées avant la recherche
+    pending = db.scalar(
+        select(PasswordEntry.id)
+        .where(PasswordEntry.user_id == user_id, PasswordEntry.domain_tag.is_(None))
+        .limit(1),
+    )
+    if pending is not None:
+        backfill_domain_tags(db, user_id, aes_key)
+    tag = PasswordAESEncryption.domain_tag(domain, PasswordAESEncryption.derive_domain_key(aes_key))
+    views = list_password_views(db, user_id, aes_key, fields, PasswordEntry.domain_tag == tag)
+    return domain, views
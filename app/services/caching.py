@@ -0,0 +1,96 @@
+"""Réponses conditionnelles (ETag / 304) basées sur la révision du coffre."""
+
+import hashlib
+from functools import lru_cache
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.models.user import User
+from app.templating import TEMPLATES_DIR
+
+# Les pages ne doivent être réutilisées qu'après revalidation, et jamais partagées
+CACHE_CONTROL = "private, no-cache"
+
+
+@lru_cache(maxsize=1)
+def _templates_fingerprint() -> str:
+    """Empreinte des templates : une page rendue par une autre version n'est pas réutilisée.
+
+    Returns:
+        str: Une empreinte courte, identique pour tous les workers d'un même déploiement.
+
+    """
+    digest = hashlib.sha256()
+    for path in sorted(TEMPLATES_DIR.rglob("*.j2")):
+        stat = path.stat()
+        digest.update(f"{path.name}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()[:8]
+
+
+def vault_etag(user: User, variant: str) -> str:
+    """Calcule l'ETag d'une représentation du coffre d'un utilisateur.
+
+    Arguments:
+        user (User): Le propriétaire du coffre.
+        variant (str): La représentation (ex. "dashboard", "list:title,url").
+
+    Returns:
+        str: L'ETag faible, entre guillemets.
+
+    """
+    tag = f"{user.id}-{user.vault_revision}-{variant}-{_templates_fingerprint()}"
+    return f'W/"{hashlib.sha256(tag.encode()).hexdigest()[:20]}"'
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """Indique si l'en-tête `If-None-Match` du client correspond à l'ETag.
+
+    Arguments:
+        request (Request): La requête HTTP.
+        etag (str): L'ETag courant.
+
+    Returns:
+        bool: True si le client possède déjà cette version.
+
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Comparaison faible : le préfixe W/ est ignoré
+    current = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == current for tag in header.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    """Construit la réponse `304 Not Modified`.
+
+    Arguments:
+        etag (str): L'ETag courant.
+
+    Returns:
+        Response: Une réponse vide avec l'ETag.
+
+    """
+    return Response(
+        status_code=304,
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+    )
+
+
+def set_etag(response: Response, etag: str) -> Response:
+    """Ajoute l'ETag et la politique de cache à une réponse.
+
+    Arguments:
+        response (Response): La réponse à compléter.
+        etag (str): L'ETag courant.
+
+    Returns:
+        Response: La même réponse.
+
+    """
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return response
@@ -0,0 +1,246 @@
+"""Transmission de la clé du coffre au navigateur pour le déchiffrement côté client.
+
+Le navigateur génère une paire ECDH P-256 non exportable et envoie sa clé
+publique. Le serveur génère une paire éphémère, dérive une clé d'enveloppe par
+HKDF-SHA256 sur le secret ECDH, et enveloppe la clé AES du coffre en AES-KW
+(RFC 3394). Le navigateur la désenveloppe avec WebCrypto en `CryptoKey`
+AES-CBC non exportable et déchiffre lui-même les champs : le format
+`base64(IV || AES-256-CBC(PKCS7))` de `PasswordAESEncryption` est directement
+compatible avec `crypto.subtle.decrypt({name: "AES-CBC", iv})`.
+
+Utilisation en ligne de commande (vecteurs de test pour le client JavaScript) :
+    python -m app.services.client_crypto vectors > tests/data/client_crypto_vectors.json
+    python -m app.services.client_crypto verify tests/data/client_crypto_vectors.json
+
+Les vecteurs sont déterministes (clés, sel et IV dérivés d'une graine) : le
+fichier versionné dans `tests/data` est vérifié à la fois par cette
+implémentation et par `static/js/vault_client.js` (tests/js).
+"""
+
+import hashlib
+import json
+import os
+import sys
+from base64 import b64decode, b64encode
+
+from cryptography.hazmat.primitives import hashes, padding, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from cryptography.hazmat.primitives.keywrap import aes_key_unwrap, aes_key_wrap
+
+from app.services.crypto import PasswordAESEncryption
+
+ALGORITHM = "ECDH-P256+HKDF-SHA256+A256KW"
+CIPHER = "AES-256-CBC"
+HKDF_INFO = b"password-vault client key v1"
+# Graine des vecteurs de test versionnés
+TEST_VECTOR_SEED = b"password-vault client vectors v1"
+# Ordre du groupe de P-256 (dérivation des clés privées des vecteurs)
+P256_ORDER = 0xFFFFFFFF00000000FFFFFFFFFFFFFFFFBCE6FAADA7179E84F3B9CAC2FC632551
+
+
+def _b64(data: bytes) -> str:
+    """Encode en base64 standard (format attendu par `atob`)."""
+    return b64encode(data).decode()
+
+
+def _public_bytes(public_key: ec.EllipticCurvePublicKey) -> bytes:
+    """Sérialise une clé publique P-256 au format brut non compressé (WebCrypto "raw")."""
+    return public_key.public_bytes(
+        serialization.Encoding.X962,
+        serialization.PublicFormat.UncompressedPoint,
+    )
+
+
+def _derive_kek(
+    private_key: ec.EllipticCurvePrivateKey,
+    peer_public: bytes,
+    salt: bytes,
+) -> bytes:
+    """Dérive la clé d'enveloppe AES-KW à partir de l'échange ECDH.
+
+    Arguments:
+        private_key (ec.EllipticCurvePrivateKey): Notre clé privée éphémère.
+        peer_public (bytes): La clé publique brute de l'autre partie.
+        salt (bytes): Le sel HKDF.
+
+    Returns:
+        bytes: La clé d'enveloppe de 32 octets.
+
+    Raises:
+        ValueError: Si la clé publique n'est pas un point P-256 valide.
+
+    """
+    peer = ec.EllipticCurvePublicKey.from_encoded_point(ec.SECP256R1(), peer_public)
+    shared = private_key.exchange(ec.ECDH(), peer)
+    return HKDF(algorithm=hashes.SHA256(), length=32, salt=salt, info=HKDF_INFO).derive(
+        shared,
+    )
+
+
+def wrap_vault_key(vault_key: bytes, client_public_key: str) -> dict[str, str]:
+    """Enveloppe la clé du coffre pour la clé publique ECDH du navigateur.
+
+    Arguments:
+        vault_key (bytes): La clé AES-256 du coffre.
+        client_public_key (str): La clé publique P-256 du navigateur (brute, base64).
+
+    Returns:
+        dict[str, str]: La clé publique du serveur, le sel, la clé enveloppée et les paramètres.
+
+    Raises:
+        ValueError: Si la clé publique est invalide.
+
+    """
+    return _wrap(vault_key, client_public_key, ec.generate_private_key(ec.SECP256R1()), os.urandom(16))
+
+
+def _wrap(
+    vault_key: bytes,
+    client_public_key: str,
+    server_key: ec.EllipticCurvePrivateKey,
+    salt: bytes,
+) -> dict[str, str]:
+    """Enveloppe la clé du coffre avec une paire serveur et un sel donnés (voir `wrap_vault_key`)."""
+    kek = _derive_kek(server_key, b64decode(client_public_key), salt)
+    return {
+        "alg": ALGORITHM,
+        "cipher": CIPHER,
+        "info": HKDF_INFO.decode(),
+        "server_public_key": _b64(_public_bytes(server_key.public_key())),
+        "salt": _b64(salt),
+        "wrapped_key": _b64(aes_key_wrap(kek, vault_key)),
+    }
+
+
+def unwrap_vault_key(
+    client_private_key: ec.EllipticCurvePrivateKey,
+    payload: dict[str, str],
+) -> bytes:
+    """Implémentation de référence du côté navigateur : désenveloppe la clé du coffre.
+
+    Arguments:
+        client_private_key (ec.EllipticCurvePrivateKey): La clé privée du client.
+        payload (dict[str, str]): La réponse de `wrap_vault_key`.
+
+    Returns:
+        bytes: La clé AES du coffre.
+
+    """
+    kek = _derive_kek(
+        client_private_key,
+        b64decode(payload["server_public_key"]),
+        b64decode(payload["salt"]),
+    )
+    return aes_key_unwrap(kek, b64decode(payload["wrapped_key"]))
+
+
+def _seeded(seed: bytes, label: str, size: int = 32) -> bytes:
+    """Dérive des octets pseudo-aléatoires reproductibles d'une graine et d'une étiquette."""
+    return hashlib.sha256(seed + b"/" + label.encode()).digest()[:size]
+
+
+def _seeded_private_key(seed: bytes, label: str) -> ec.EllipticCurvePrivateKey:
+    """Dérive une clé privée P-256 reproductible d'une graine et d'une étiquette."""
+    value = int.from_bytes(_seeded(seed, label), "big") % (P256_ORDER - 1) + 1
+    return ec.derive_private_key(value, ec.SECP256R1())
+
+
+def _encrypt_with_iv(plaintext: str, key: bytes, iv: bytes) -> str:
+    """Chiffre un champ au format de `PasswordAESEncryption`, avec un IV imposé."""
+    padder = padding.PKCS7(128).padder()
+    padded = padder.update(plaintext.encode()) + padder.finalize()
+    encryptor = Cipher(algorithms.AES(key), modes.CBC(iv)).encryptor()
+    return _b64(iv + encryptor.update(padded) + encryptor.finalize())
+
+
+def generate_test_vectors(count: int = 3, seed: bytes = TEST_VECTOR_SEED) -> dict:
+    """Produit des vecteurs de test déterministes pour le client JavaScript.
+
+    Chaque vecteur contient la clé privée du client (PKCS#8, base64), la réponse
+    du serveur, la clé attendue et des champs chiffrés avec leur clair. Les clés,
+    le sel et les IV sont dérivés de `seed` : une même graine donne les mêmes vecteurs.
+
+    Arguments:
+        count (int): Nombre de vecteurs.
+        seed (bytes): La graine.
+
+    Returns:
+        dict: Les vecteurs, sérialisables en JSON.
+
+    """
+    vectors = []
+    samples = ["", "motdepasse", "Ünïcødé ✓ 🔐", "x" * 100]
+    for number in range(count):
+        client_key = _seeded_private_key(seed, f"{number}/client")
+        vault_key = _seeded(seed, f"{number}/vault")
+        payload = _wrap(
+            vault_key,
+            _b64(_public_bytes(client_key.public_key())),
+            _seeded_private_key(seed, f"{number}/server"),
+            _seeded(seed, f"{number}/salt", 16),
+        )
+        vectors.append(
+            {
+                "client_private_key_pkcs8": _b64(
+                    client_key.private_bytes(
+                        serialization.Encoding.DER,
+                        serialization.PrivateFormat.PKCS8,
+                        serialization.NoEncryption(),
+                    ),
+                ),
+                "response": payload,
+                "vault_key": _b64(vault_key),
+                "fields": [
+                    {
+                        "plaintext": sample,
+                        "ciphertext": _encrypt_with_iv(sample, vault_key, _seeded(seed, f"{number}/iv/{index}", 16)),
+                    }
+                    for index, sample in enumerate(samples)
+                ],
+            },
+        )
+    return {"alg": ALGORITHM, "cipher": CIPHER, "vectors": vectors}
+
+
+def verify_test_vectors(data: dict) -> int:
+    """Vérifie des vecteurs de test avec l'implémentation de référence.
+
+    Arguments:
+        data (dict): Les vecteurs produits par `generate_test_vectors`.
+
+    Returns:
+        int: Le nombre de champs vérifiés.
+
+    Raises:
+        ValueError: Si un vecteur ne correspond pas.
+
+    """
+    checked = 0
+    for vector in data["vectors"]:
+        client_key = serialization.load_der_private_key(
+            b64decode(vector["client_private_key_pkcs8"]),
+            password=None,
+        )
+        vault_key = unwrap_vault_key(client_key, vector["response"])
+        if vault_key != b64decode(vector["vault_key"]):
+            msg = "Clé du coffre désenveloppée incorrecte"
+            raise ValueError(msg)
+        for field in vector["fields"]:
+            plaintext = PasswordAESEncryption.decrypt_password(field["ciphertext"], vault_key)
+            if plaintext != field["plaintext"]:
+                msg = f"Champ mal déchiffré : {field['plaintext']!r}"
+                raise ValueError(msg)
+            checked += 1
+    return checked
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["vectors"]:
+        print(json.dumps(generate_test_vectors(), ensure_ascii=False, indent=2))
+    elif len(sys.argv) == 3 and sys.argv[1] == "verify":
+        with open(sys.argv[2], encoding="utf-8") as file:
+            print(f"{verify_test_vectors(json.load(file))} champs vérifiés")
+    else:
+        sys.exit("Utilisation : python -m app.services.client_crypto vectors | verify <fichier.json>")
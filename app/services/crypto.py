@@ -1,18 +1,31 @@
 """Services de chiffrement pour le stockage sécurisé des données sensibles."""
 
 import datetime
+import hashlib
+import hmac
 import os
 import secrets
+import time
 from base64 import b64decode, b64encode, urlsafe_b64encode
 from datetime import timedelta
 
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import hashes, padding
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from sqlalchemy.orm import Session
 
 from app.models.password import PasswordEntry, SharedPasswordEntry
+from app.services.metrics import crypto_operations, kdf_duration
+
+# Version de la dérivation utilisée pour les nouveaux partages
+SHARE_KEY_VERSION = 2
+SHARE_KEY_INFO = b"password-vault share key v2"
+# Clé HMAC de l'index des domaines, dérivée de la clé du coffre
+DOMAIN_KEY_INFO = b"password-vault domain index v1"
+# Message authentifié par la clé du coffre pour la vérifier au déverrouillage
+KEY_CHECK_INFO = b"password-vault key check v1"
 
 
 class PasswordAESEncryption:
@@ -37,7 +50,10 @@ class PasswordAESEncryption:
             iterations=100000,
             backend=default_backend(),
         )
-        return kdf.derive(password.encode())
+        start = time.perf_counter()
+        key = kdf.derive(password.encode())
+        kdf_duration.observe(time.perf_counter() - start, ("pbkdf2_vault",))
+        return key
 
     @staticmethod
     def encrypt_password(password: str, aes_key: bytes) -> str:
@@ -51,6 +67,7 @@ class PasswordAESEncryption:
             str: Le mot de passe chiffré en base64.
 
         """
+        crypto_operations.inc(labels=("encrypt",))
         iv = os.urandom(16)  # Générer un IV unique pour chaque mot de passe
 
         padder = padding.PKCS7(128).padder()
@@ -69,6 +86,120 @@ class PasswordAESEncryption:
         full_data = iv + encrypted_data
         return b64encode(full_data).decode()  # Encodé en base64 pour stocker facilement
 
+    @staticmethod
+    def encrypt_many(values: list[str], aes_key: bytes) -> list[str]:
+        """Chiffre plusieurs valeurs avec la même clé, au format de `encrypt_password`.
+
+        L'algorithme et le bourrage ne sont préparés qu'une fois et les IV sont
+        tirés en un seul appel à `os.urandom` : chaque valeur garde son propre IV.
+
+        Arguments:
+            values (list[str]): Les valeurs en clair.
+            aes_key (bytes): La clé AES de l'utilisateur.
+
+        Returns:
+            list[str]: Les valeurs chiffrées en base64, dans le même ordre.
+
+        """
+        crypto_operations.inc(len(values), ("encrypt",))
+        algorithm = algorithms.AES(aes_key)
+        ivs = os.urandom(16 * len(values))
+        pkcs7 = padding.PKCS7(128)
+        encrypted = []
+        for index, value in enumerate(values):
+            iv = ivs[16 * index : 16 * index + 16]
+            padder = pkcs7.padder()
+            padded_data = padder.update(value.encode()) + padder.finalize()
+            encryptor = Cipher(algorithm, modes.CBC(iv), backend=default_backend()).encryptor()
+            encrypted_data = encryptor.update(padded_data) + encryptor.finalize()
+            encrypted.append(b64encode(iv + encrypted_data).decode())
+        return encrypted
+
+    @staticmethod
+    def decrypt_many(values: list[str], aes_key: bytes) -> list[str]:
+        """Déchiffre plusieurs valeurs de `encrypt_password` avec la même clé.
+
+        Une valeur vide (colonne nulle ou vide) donne une chaîne vide.
+
+        Arguments:
+            values (list[str]): Les valeurs chiffrées en base64.
+            aes_key (bytes): La clé AES de l'utilisateur.
+
+        Returns:
+            list[str]: Les valeurs en clair, dans le même ordre.
+
+        """
+        crypto_operations.inc(len(values), ("decrypt",))
+        algorithm = algorithms.AES(aes_key)
+        pkcs7 = padding.PKCS7(128)
+        decrypted = []
+        for value in values:
+            if not value:
+                decrypted.append("")
+                continue
+            encrypted_data = b64decode(value)
+            decryptor = Cipher(algorithm, modes.CBC(encrypted_data[:16]), backend=default_backend()).decryptor()
+            decrypted_padded = decryptor.update(encrypted_data[16:]) + decryptor.finalize()
+            unpadder = pkcs7.unpadder()
+            decrypted.append((unpadder.update(decrypted_padded) + unpadder.finalize()).decode())
+        return decrypted
+
+    @staticmethod
+    def key_check(aes_key: bytes) -> str:
+        """Calcule le vérificateur de la clé du coffre (`users.key_check`).
+
+        Le déverrouillage compare ce vérificateur à celui de la clé redérivée :
+        le mot de passe est ainsi vérifié sans bcrypt. Il ne révèle rien de la
+        clé (HMAC-SHA256 d'un message fixe).
+
+        Arguments:
+            aes_key (bytes): La clé AES de l'utilisateur.
+
+        Returns:
+            str: Le vérificateur en hexadécimal (64 caractères).
+
+        """
+        return hmac.new(aes_key, KEY_CHECK_INFO, hashlib.sha256).hexdigest()
+
+    @staticmethod
+    def derive_domain_key(aes_key: bytes) -> bytes:
+        """Dérive de la clé du coffre la clé HMAC de l'index des domaines.
+
+        La clé AES n'est jamais utilisée directement comme clé HMAC : HKDF
+        sépare les deux usages.
+
+        Arguments:
+            aes_key (bytes): La clé AES de l'utilisateur.
+
+        Returns:
+            bytes: La clé HMAC (32 octets).
+
+        """
+        return HKDF(
+            algorithm=hashes.SHA256(),
+            length=32,
+            salt=None,
+            info=DOMAIN_KEY_INFO,
+            backend=default_backend(),
+        ).derive(aes_key)
+
+    @staticmethod
+    def domain_tag(domain: str, domain_key: bytes) -> str:
+        """Calcule l'empreinte indexée d'un domaine (HMAC-SHA256).
+
+        Sans la clé du coffre, l'empreinte ne permet ni de retrouver le domaine
+        ni de comparer les domaines de deux utilisateurs.
+
+        Arguments:
+            domain (str): Le domaine enregistrable, normalisé.
+            domain_key (bytes): La clé de `derive_domain_key`.
+
+        Returns:
+            str: L'empreinte en hexadécimal (64 caractères).
+
+        """
+        return hmac.new(domain_key, domain.encode(), hashlib.sha256).hexdigest()
+
     @staticmethod
     def decrypt_password(encrypted_password: str, aes_key: bytes) -> str:
         """Déchiffre le mot de passe chiffré en utilisant AES-256 en mode CBC.
@@ -81,6 +212,7 @@ class PasswordAESEncryption:
             str: Le mot de passe déchiffré.
 
         """
+        crypto_operations.inc(labels=("decrypt",))
         encrypted_data = b64decode(encrypted_password)
 
         iv = encrypted_data[:16]  # L'IV est dans les 16 premiers octets
@@ -106,17 +238,41 @@ class SharedPasswordEncryption:
     """Classe pour le chiffrement et le déchiffrement des mots de passe partagés."""
 
     @staticmethod
-    def derive_share_token(share_token_id: str, token: str) -> bytes:
+    def derive_share_token(share_token_id: str, token: str, version: int = 1) -> bytes:
         """Dérive une clé de partage à partir de l'UUID et du token.
 
+        Le token contient déjà 128 bits d'aléa (`secrets.token_urlsafe(16)`) :
+        l'étirement de clé de la v1 (PBKDF2, 100 000 itérations) ne le renforce
+        pas et coûte ~100 ms par consultation. La v2 utilise HKDF-SHA256 ; la v1
+        reste lisible pour les partages existants.
+
         Arguments:
             share_token_id (str): L'UUID du partage.
             token (str): Le token spécifique au partage.
+            version (int): Le schéma de dérivation (1 : PBKDF2, 2 : HKDF).
 
         Returns:
             bytes: La clé de partage dérivée.
 
+        Raises:
+            ValueError: Si la version est inconnue.
+
         """
+        start = time.perf_counter()
+        if version == 2:
+            key = HKDF(
+                algorithm=hashes.SHA256(),
+                length=32,
+                salt=share_token_id.encode(),
+                info=SHARE_KEY_INFO,
+                backend=default_backend(),
+            ).derive(token.encode())
+            kdf_duration.observe(time.perf_counter() - start, ("hkdf_share_v2",))
+            return key
+        if version != 1:
+            msg = f"Version de clé de partage inconnue : {version}"
+            raise ValueError(msg)
+
         dkdf = PBKDF2HMAC(
             algorithm=hashes.SHA256(),
             length=32,  # Taille de la clé AES (256 bits)
@@ -124,7 +280,9 @@ class SharedPasswordEncryption:
             iterations=100000,
             backend=default_backend(),
         )
-        return dkdf.derive(token.encode())
+        key = dkdf.derive(token.encode())
+        kdf_duration.observe(time.perf_counter() - start, ("pbkdf2_share_v1",))
+        return key
 
     @staticmethod
     def encrypt_shared_password(
@@ -178,6 +336,7 @@ class SharedPasswordEncryption:
         shared_key = SharedPasswordEncryption.derive_share_token(
             share_token_id,
             share_token,
+            SHARE_KEY_VERSION,
         )
 
         # Chiffrer les données
@@ -208,6 +367,7 @@ class SharedPasswordEncryption:
             + timedelta(hours=validity_hours),
             original_entry_id=password_entry.id,
             share_token_id=share_token_id,  # Stocker l'identifiant, pas le token lui-même
+            key_version=SHARE_KEY_VERSION,
         )
 
         # Enregistrer l'entrée partagée dans la base de données
@@ -0,0 +1,279 @@
+"""Service de génération de mots de passe lié au cycle de vie de l'application.
+
+Les petits lots sont générés directement dans le processus courant : créer des
+processus pour quelques chaînes coûte bien plus cher que de les générer. Un pool
+de processus persistant n'est démarré qu'à la première demande volumineuse, puis
+réutilisé jusqu'à l'arrêt de l'application.
+"""
+
+from __future__ import annotations
+
+import json
+import multiprocessing
+import threading
+from collections.abc import Iterator
+from typing import TYPE_CHECKING
+
+from app.services import password_batch
+from app.services.password_policy import PasswordPolicy
+
+if TYPE_CHECKING:
+    from multiprocessing.pool import Pool
+
+# En dessous de ce nombre de mots de passe, la génération reste dans le processus.
+# NumPy est optionnel : sans lui, 20 000 mots de passe prennent déjà ~60 ms.
+INLINE_THRESHOLD = 20_000
+# Nombre de mots de passe générés par tâche envoyée au pool (et par bloc NDJSON)
+CHUNK_SIZE = 50_000
+# Nombre maximal de mots de passe pour un lot ou un flux NDJSON
+MAX_STREAM_COUNT = 1_000_000
+
+# Critères à cases à cocher de `generate_passwords`, ou une politique nommée
+GeneratorArgs = tuple[int, bool, bool, bool, bool] | PasswordPolicy
+
+
+def _generate_chunk(count: int, args: GeneratorArgs) -> list[str]:
+    """Génère un bloc de mots de passe (en ligne ou dans un processus du pool).
+
+    Arguments:
+        count (int): Nombre de mots de passe du bloc.
+        args (GeneratorArgs): Critères passés à `generate_passwords`, ou une politique.
+
+    Returns:
+        list[str]: Les mots de passe générés.
+
+    """
+    if isinstance(args, PasswordPolicy):
+        return args.generate_many(count)
+    return password_batch.generate_passwords(count, *args)
+
+
+def _star_generate_chunk(task: tuple[int, GeneratorArgs]) -> list[str]:
+    """Adapte `_generate_chunk` à `Pool.imap`, qui ne passe qu'un argument.
+
+    Arguments:
+        task (tuple[int, GeneratorArgs]): Taille du bloc et critères.
+
+    Returns:
+        list[str]: Les mots de passe générés.
+
+    """
+    return _generate_chunk(*task)
+
+
+def _check_count(count: int) -> None:
+    """Vérifie le nombre de mots de passe demandé.
+
+    Arguments:
+        count (int): Nombre de mots de passe demandé.
+
+    Raises:
+        ValueError: Si `count` est inférieur à 1 ou supérieur à `MAX_STREAM_COUNT`.
+
+    """
+    if not 1 <= count <= MAX_STREAM_COUNT:
+        msg = f"Le nombre de mots de passe doit être compris entre 1 et {MAX_STREAM_COUNT}."
+        raise ValueError(msg)
+
+
+def _chunk_sizes(count: int, chunk_size: int) -> list[int]:
+    """Découpe un nombre total de mots de passe en tailles de blocs.
+
+    Arguments:
+        count (int): Nombre total de mots de passe.
+        chunk_size (int): Taille maximale d'un bloc.
+
+    Returns:
+        list[int]: Les tailles successives des blocs.
+
+    """
+    full, rest = divmod(count, chunk_size)
+    return [chunk_size] * full + ([rest] if rest else [])
+
+
+class PasswordGeneratorService:
+    """Génère des lots de mots de passe en ligne ou via un pool persistant.
+
+    Attributs :
+        inline_threshold (int) : Taille de lot à partir de laquelle le pool est utilisé.
+        chunk_size (int) : Nombre de mots de passe par tâche du pool.
+        processes (int) : Nombre de processus du pool.
+    """
+
+    def __init__(
+        self,
+        inline_threshold: int = INLINE_THRESHOLD,
+        chunk_size: int = CHUNK_SIZE,
+        processes: int | None = None,
+    ) -> None:
+        """Initialise le service sans démarrer de processus.
+
+        Arguments:
+            inline_threshold (int): Taille de lot à partir de laquelle le pool est utilisé.
+            chunk_size (int): Nombre de mots de passe par tâche du pool.
+            processes (int | None): Nombre de processus (par défaut, nombre de cœurs).
+
+        """
+        self.inline_threshold = inline_threshold
+        self.chunk_size = chunk_size
+        self.processes = processes or multiprocessing.cpu_count()
+        self._pool: Pool | None = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> Pool:
+        """Retourne le pool persistant, en le démarrant au premier appel.
+
+        Returns:
+            Pool: Le pool de processus.
+
+        """
+        with self._lock:
+            if self._pool is None:
+                # "spawn" évite de dupliquer par fork un serveur multi-thread
+                context = multiprocessing.get_context("spawn")
+                self._pool = context.Pool(processes=self.processes)
+            return self._pool
+
+    def shutdown(self) -> None:
+        """Arrête le pool de processus s'il a été démarré."""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.close()
+                self._pool.join()
+                self._pool = None
+
+    def generate(
+        self,
+        count: int,
+        length: int,
+        use_special_chars: bool,
+        use_digits: bool,
+        use_uppercase: bool,
+        use_lowercase: bool,
+    ) -> list[str]:
+        """Génère `count` mots de passe selon les critères donnés.
+
+        Arguments:
+            count (int): Nombre de mots de passe à générer.
+            length (int): Longueur de chaque mot de passe.
+            use_special_chars (bool): Inclure des caractères spéciaux.
+            use_digits (bool): Inclure des chiffres.
+            use_uppercase (bool): Inclure des lettres majuscules.
+            use_lowercase (bool): Inclure des lettres minuscules.
+
+        Returns:
+            list[str]: Les mots de passe générés.
+
+        Raises:
+            ValueError: Si aucun critère de caractère n'est sélectionné ou si `count` est hors limites.
+
+        """
+        args = (length, use_special_chars, use_digits, use_uppercase, use_lowercase)
+        # Valide les critères avant d'occuper le pool
+        password_batch.generate_passwords(1, *args)
+        return self._run(count, args)
+
+    def generate_with_policy(self, count: int, policy: PasswordPolicy) -> list[str]:
+        """Génère `count` mots de passe respectant une politique.
+
+        Arguments:
+            count (int): Nombre de mots de passe à générer.
+            policy (PasswordPolicy): La politique à respecter.
+
+        Returns:
+            list[str]: Les mots de passe générés.
+
+        Raises:
+            ValueError: Si `count` est hors limites.
+
+        """
+        return self._run(count, policy)
+
+    def _run(self, count: int, args: GeneratorArgs) -> list[str]:
+        """Génère en ligne ou répartit la génération sur le pool selon la taille.
+
+        Arguments:
+            count (int): Nombre de mots de passe à générer.
+            args (GeneratorArgs): Critères ou politique.
+
+        Returns:
+            list[str]: Les mots de passe générés.
+
+        Raises:
+            ValueError: Si `count` est hors limites.
+
+        """
+        _check_count(count)
+        if count <= self.inline_threshold:
+            return _generate_chunk(count, args)
+
+        tasks = [(size, args) for size in _chunk_sizes(count, self.chunk_size)]
+        passwords = []
+        for chunk in self._get_pool().starmap(_generate_chunk, tasks):
+            passwords.extend(chunk)
+        return passwords
+
+    def iter_ndjson(
+        self,
+        count: int,
+        length: int,
+        use_special_chars: bool,
+        use_digits: bool,
+        use_uppercase: bool,
+        use_lowercase: bool,
+        policy: PasswordPolicy | None = None,
+    ) -> Iterator[bytes]:
+        """Génère les mots de passe sous forme de flux NDJSON, bloc par bloc.
+
+        Arguments:
+            count (int): Nombre de mots de passe à générer.
+            length (int): Longueur de chaque mot de passe.
+            use_special_chars (bool): Inclure des caractères spéciaux.
+            use_digits (bool): Inclure des chiffres.
+            use_uppercase (bool): Inclure des lettres majuscules.
+            use_lowercase (bool): Inclure des lettres minuscules.
+            policy (PasswordPolicy | None): Politique remplaçant les critères ci-dessus.
+
+        Returns:
+            Iterator[bytes]: Des blocs de lignes `{"password": "..."}`.
+
+        Raises:
+            ValueError: Si aucun critère n'est sélectionné ou si `count` est hors limites.
+
+        """
+        _check_count(count)
+
+        args = policy or (
+            length,
+            use_special_chars,
+            use_digits,
+            use_uppercase,
+            use_lowercase,
+        )
+        if policy is None:
+            # Lève ValueError immédiatement, avant l'envoi de la réponse
+            password_batch.generate_passwords(1, *args)
+        tasks = [(size, args) for size in _chunk_sizes(count, self.chunk_size)]
+
+        if count <= self.inline_threshold:
+            chunks = (_generate_chunk(*task) for task in tasks)
+        else:
+            chunks = self._get_pool().imap(_star_generate_chunk, tasks)
+
+        return (_to_ndjson(chunk) for chunk in chunks)
+
+
+def _to_ndjson(passwords: list[str]) -> bytes:
+    """Sérialise un bloc de mots de passe en lignes NDJSON.
+
+    Arguments:
+        passwords (list[str]): Les mots de passe du bloc.
+
+    Returns:
+        bytes: Les lignes NDJSON encodées en UTF-8.
+
+    """
+    return "".join(
+        f'{{"password": {json.dumps(password)}}}\n' for password in passwords
+    ).encode()
+
@@ -0,0 +1,277 @@
+"""Trousseau des clés de coffre déverrouillées, en mémoire du processus.
+
+La clé AES d'un coffre (PBKDF2, 100 000 itérations) n'est jamais stockée en
+clair dans le cookie de session : elle reste dans ce trousseau, sous un
+identifiant aléatoire conservé en session. Le trousseau est borné :
+    - une clé inutilisée pendant `KEYRING_IDLE_SECONDS` est oubliée ;
+    - au-delà de `KEYRING_MAX_KEYS`, la moins récemment utilisée est oubliée.
+Quand la dernière clé d'un utilisateur est oubliée faute d'utilisation ou de
+place, `on_evict` est appelé (suppression de son index de recherche, qui
+contient des données en clair).
+
+Le trousseau est propre à chaque application (`app.state.keyring`, créé par
+`create_app`), donc à chaque worker. Pour qu'un coffre ouvert le reste quel
+que soit le worker qui reçoit la requête, la session porte aussi la clé
+chiffrée sous un secret du serveur (`SessionKeyWrapper`, AES-GCM sous une clé
+dérivée de `SECRET_KEY`) et la date de sa dernière utilisation. Un worker qui
+ne trouve pas la clé dans son trousseau la déchiffre et l'y replace, sauf si
+elle est inutilisée depuis plus de `KEYRING_IDLE_SECONDS`.
+
+Verrouillage : un cookie de session copié avant `/lock` ou la déconnexion
+contient encore la clé chiffrée. Le verrouillage est donc décidé côté
+serveur, par l'époque de verrouillage de l'utilisateur (`users.vault_epoch`),
+incrémentée par `/lock` et la déconnexion. Chaque clé du trousseau et chaque
+clé chiffrée porte l'époque de son déverrouillage (données associées
+d'AES-GCM) : d'une époque passée, elle est refusée par tous les workers.
+
+Une clé oubliée ne demande pas une nouvelle connexion complète : tant que le
+cookie `session_token` est valide, `/unlock` redérive seulement la clé à
+partir du mot de passe et la vérifie avec `users.key_check`, sans bcrypt ni TOTP.
+"""
+
+import os
+import secrets
+import threading
+import time
+import weakref
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import Counter, OrderedDict
+from collections.abc import Callable
+from typing import Optional
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+from app.services.metrics import registry
+
+# Contexte HKDF de la clé qui chiffre les clés de coffre conservées en session
+WRAP_KEY_INFO = b"vault-session-key-wrap"
+NONCE_SIZE = 12
+
+keyring_evictions = registry.counter(
+    "vault_keyring_evictions_total",
+    "Clés de coffre oubliées, par motif (idle, capacity, lock).",
+    ("reason",),
+)
+keyring_restores = registry.counter(
+    "vault_keyring_restores_total",
+    "Clés de coffre replacées dans le trousseau depuis la session (autre worker, clé évincée).",
+)
+
+
+class SessionKeyWrapper:
+    """Chiffre les clés de coffre conservées dans la session (cookie signé, non chiffré)."""
+
+    def __init__(self, secret: str) -> None:
+        """Dérive la clé de chiffrement du secret du serveur.
+
+        Arguments:
+            secret (str): Le secret partagé par les workers (`SECRET_KEY`).
+
+        """
+        key = HKDF(algorithm=hashes.SHA256(), length=32, salt=None, info=WRAP_KEY_INFO).derive(secret.encode())
+        self._aead = AESGCM(key)
+
+    def wrap(self, user_id: int, epoch: int, key: bytes) -> str:
+        """Chiffre la clé d'un coffre, liée à son propriétaire et à l'époque de verrouillage.
+
+        Arguments:
+            user_id (int): Le propriétaire du coffre.
+            epoch (int): L'époque de verrouillage courante (`users.vault_epoch`).
+            key (bytes): La clé AES du coffre.
+
+        Returns:
+            str: La clé chiffrée, en base64 (URL).
+
+        """
+        nonce = os.urandom(NONCE_SIZE)
+        sealed = self._aead.encrypt(nonce, key, f"vault:{user_id}:{epoch}".encode())
+        return urlsafe_b64encode(nonce + sealed).decode()
+
+    def unwrap(self, user_id: int, epoch: int, wrapped: str) -> Optional[bytes]:
+        """Déchiffre une clé de `wrap`.
+
+        Arguments:
+            user_id (int): L'utilisateur authentifié, qui doit être le propriétaire de la clé.
+            epoch (int): L'époque de verrouillage courante de l'utilisateur.
+            wrapped (str): La clé chiffrée.
+
+        Returns:
+            Optional[bytes]: La clé, ou None si elle est illisible (autre secret,
+            autre utilisateur, coffre verrouillé depuis).
+
+        """
+        try:
+            raw = urlsafe_b64decode(wrapped)
+            return self._aead.decrypt(raw[:NONCE_SIZE], raw[NONCE_SIZE:], f"vault:{user_id}:{epoch}".encode())
+        except (ValueError, InvalidTag):
+            return None
+
+
+class VaultKeyring:
+    """Clés de coffre déverrouillées, indexées par un identifiant de session opaque.
+
+    Attributs :
+        idle_timeout (float) : Durée d'inactivité avant oubli d'une clé, en secondes.
+        max_keys (int) : Nombre maximal de clés conservées.
+        on_evict (Optional[Callable[[int], None]]) : Appelé quand la dernière clé
+            d'un utilisateur est oubliée (inactivité ou capacité).
+    """
+
+    def __init__(
+        self,
+        idle_timeout: float = 900.0,
+        max_keys: int = 10_000,
+        on_evict: Optional[Callable[[int], None]] = None,
+    ) -> None:
+        """Initialise un trousseau vide.
+
+        Arguments:
+            idle_timeout (float): Durée d'inactivité avant oubli d'une clé, en secondes.
+            max_keys (int): Nombre maximal de clés conservées.
+            on_evict (Optional[Callable[[int], None]]): Appelé avec l'utilisateur dont
+                la dernière clé est oubliée (inactivité ou capacité).
+
+        """
+        self.idle_timeout = idle_timeout
+        self.max_keys = max_keys
+        self.on_evict = on_evict
+        # identifiant -> [user_id, clé, dernière utilisation, époque], du moins au plus récent
+        self._entries: OrderedDict[str, list] = OrderedDict()
+        # Nombre de clés conservées par utilisateur (plusieurs sessions possibles)
+        self._per_user: Counter[int] = Counter()
+        self._lock = threading.Lock()
+        _keyrings.add(self)
+
+    def __len__(self) -> int:
+        """Nombre de clés conservées."""
+        return len(self._entries)
+
+    def _forget(self, user_id: int) -> bool:
+        """Décompte une clé oubliée ; True si c'était la dernière de l'utilisateur (verrou pris)."""
+        self._per_user[user_id] -= 1
+        if self._per_user[user_id] > 0:
+            return False
+        del self._per_user[user_id]
+        return True
+
+    def _purge(self, now: float) -> list[int]:
+        """Oublie les clés inactives puis les plus anciennes au-delà de la capacité (verrou pris).
+
+        Returns:
+            list[int]: Les utilisateurs dont la dernière clé a été oubliée.
+
+        """
+        emptied = []
+        # L'ordre est celui des dernières utilisations : les inactives sont en tête
+        while self._entries:
+            handle, entry = next(iter(self._entries.items()))
+            if now - entry[2] <= self.idle_timeout:
+                break
+            del self._entries[handle]
+            keyring_evictions.inc(labels=("idle",))
+            if self._forget(entry[0]):
+                emptied.append(entry[0])
+        while len(self._entries) > self.max_keys:
+            _, entry = self._entries.popitem(last=False)
+            keyring_evictions.inc(labels=("capacity",))
+            if self._forget(entry[0]):
+                emptied.append(entry[0])
+        return emptied
+
+    def _notify(self, emptied: list[int]) -> None:
+        """Signale les utilisateurs sans clé à `on_evict` (hors verrou)."""
+        if self.on_evict is not None:
+            for user_id in emptied:
+                self.on_evict(user_id)
+
+    def put(self, user_id: int, epoch: int, key: bytes, handle: Optional[str] = None) -> str:
+        """Conserve une clé déverrouillée.
+
+        Arguments:
+            user_id (int): Le propriétaire du coffre.
+            epoch (int): L'époque de verrouillage du déverrouillage (`users.vault_epoch`).
+            key (bytes): La clé AES du coffre.
+            handle (Optional[str]): L'identifiant déjà en session (clé replacée depuis
+                la session : tous les workers gardent le même), s'il est libre.
+
+        Returns:
+            str: L'identifiant à conserver en session.
+
+        """
+        now = time.monotonic()
+        with self._lock:
+            if not handle or handle in self._entries:
+                handle = secrets.token_urlsafe(24)
+            self._entries[handle] = [user_id, key, now, epoch]
+            self._per_user[user_id] += 1
+            emptied = self._purge(now)
+        self._notify(emptied)
+        return handle
+
+    def get(self, handle: Optional[str], user_id: int, epoch: int) -> Optional[bytes]:
+        """Retourne la clé d'un identifiant de session et prolonge sa durée de vie.
+
+        Une clé d'une époque de verrouillage passée (coffre verrouillé depuis,
+        éventuellement par un autre worker) est oubliée.
+
+        Arguments:
+            handle (Optional[str]): L'identifiant conservé en session.
+            user_id (int): L'utilisateur authentifié, qui doit être le propriétaire de la clé.
+            epoch (int): L'époque de verrouillage courante de l'utilisateur.
+
+        Returns:
+            Optional[bytes]: La clé, ou None si le coffre est verrouillé.
+
+        """
+        if not handle:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            emptied = self._purge(now)
+            entry = self._entries.get(handle)
+            if entry is not None and entry[0] == user_id:
+                if entry[3] != epoch:
+                    del self._entries[handle]
+                    keyring_evictions.inc(labels=("lock",))
+                    if self._forget(user_id):
+                        emptied.append(user_id)
+                    entry = None
+                else:
+                    entry[2] = now
+                    self._entries.move_to_end(handle)
+        self._notify(emptied)
+        if entry is None or entry[0] != user_id:
+            return None
+        return entry[1]
+
+    def lock(self, handle: Optional[str]) -> Optional[int]:
+        """Oublie une clé (verrouillage explicite ou déconnexion).
+
+        Arguments:
+            handle (Optional[str]): L'identifiant conservé en session.
+
+        Returns:
+            Optional[int]: Le propriétaire de la clé oubliée, ou None si elle était absente.
+
+        """
+        with self._lock:
+            entry = self._entries.pop(handle, None) if handle else None
+            if entry is not None:
+                self._forget(entry[0])
+        if entry is None:
+            return None
+        keyring_evictions.inc(labels=("lock",))
+        return entry[0]
+
+
+# Trousseaux des applications du processus, pour les métriques
+_keyrings: "weakref.WeakSet[VaultKeyring]" = weakref.WeakSet()
+
+registry.gauge(
+    "vault_keyring_keys",
+    "Clés de coffre déverrouillées en mémoire.",
+    function=lambda: sum(len(keyring) for keyring in list(_keyrings)),
+)
@@ -0,0 +1,175 @@
+"""Détection des blocages de la boucle d'événements.
+
+Une route `async def` qui appelle du code synchrone coûteux (dérivation de
+clé, déchiffrement, requête SQL) bloque toute la boucle : aucune autre requête
+du worker n'avance pendant ce temps.
+
+Deux mesures complémentaires :
+    - une tâche de la boucle se réveille toutes les `interval` secondes ; le
+      retard de son réveil est le retard de la boucle (`event_loop_lag_seconds`) ;
+    - un thread de surveillance vérifie que ce réveil a bien lieu. Si la boucle
+      ne s'est pas réveillée depuis plus de `threshold` secondes, il capture la
+      pile du thread de la boucle (`sys._current_frames()`), c'est-à-dire la
+      coroutine fautive, retrouve la requête HTTP en cours dans ses frames
+      (`scope`) et journalise le tout. Un blocage n'est signalé qu'une fois.
+
+Activé par `LOOP_WATCHDOG_ENABLED=1` (voir `app.config`).
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Optional
+
+from app.services.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Échantillons de retard conservés pour les quantiles exportés (fenêtre glissante)
+LAG_WINDOW = 1024
+LAG_QUANTILES = (0.5, 0.9, 0.99)
+# Profondeur de pile journalisée lors d'un blocage
+STACK_LIMIT = 30
+
+loop_lag = registry.histogram(
+    "event_loop_lag_seconds",
+    "Retard de réveil de la boucle d'événements.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+loop_blocked = registry.counter(
+    "event_loop_blocked_total",
+    "Blocages de la boucle d'événements au-delà du seuil, par route.",
+    ("route",),
+)
+
+
+def _blocked_request(frame) -> Optional[str]:
+    """Retrouve la requête HTTP en cours dans la pile de la boucle.
+
+    Le `scope` ASGI est une variable locale des middlewares et des routes : la
+    frame la plus profonde qui en porte un désigne la requête qui bloque.
+
+    Arguments:
+        frame: La frame feuille du thread de la boucle.
+
+    Returns:
+        Optional[str]: "MÉTHODE gabarit" (ou chemin), None hors requête HTTP.
+
+    """
+    while frame is not None:
+        scope = frame.f_locals.get("scope")
+        if isinstance(scope, dict) and scope.get("type") == "http":
+            route = getattr(scope.get("route"), "path", None) or scope.get("path", "?")
+            return f"{scope.get('method', '?')} {route}"
+        frame = frame.f_back
+    return None
+
+
+class LoopWatchdog:
+    """Mesure le retard de la boucle et journalise les blocages.
+
+    Attributs :
+        threshold (float) : Durée de blocage signalée, en secondes.
+        interval (float) : Intervalle des réveils de la boucle, en secondes.
+    """
+
+    def __init__(self, threshold: float = 0.1, interval: float = 0.05) -> None:
+        """Initialise le watchdog sans le démarrer.
+
+        Arguments:
+            threshold (float): Durée de blocage signalée, en secondes.
+            interval (float): Intervalle des réveils de la boucle, en secondes.
+
+        """
+        self.threshold = threshold
+        self.interval = interval
+        self._lags: deque[float] = deque(maxlen=LAG_WINDOW)
+        self._last_beat = 0.0
+        self._reported_beat = 0.0
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    async def _heartbeat(self) -> None:
+        """Tâche de la boucle : mesure le retard de chaque réveil."""
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            self._last_beat = now
+            self._lags.append(lag)
+            loop_lag.observe(lag)
+
+    def _monitor(self) -> None:
+        """Thread de surveillance : capture la pile de la boucle si elle est bloquée."""
+        while not self._stop.wait(self.interval):
+            beat = self._last_beat
+            blocked_for = time.monotonic() - beat - self.interval
+            if blocked_for < self.threshold or beat == self._reported_beat:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            self._reported_beat = beat
+            request = _blocked_request(frame)
+            loop_blocked.inc(labels=(request.split(" ", 1)[1] if request else "<hors requête>",))
+            stack = "".join(traceback.format_stack(frame, limit=STACK_LIMIT))
+            logger.warning(
+                "Boucle d'événements bloquée depuis %.0f ms (%s) :\n%s",
+                blocked_for * 1000,
+                request or "hors requête HTTP",
+                stack,
+            )
+
+    def start(self) -> None:
+        """Démarre la mesure, depuis la boucle d'événements (ex. dans le lifespan)."""
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._reported_beat = 0.0
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._monitor, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    async def stop(self) -> None:
+        """Arrête la tâche de mesure et le thread de surveillance."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def quantiles(self) -> dict[tuple[str, ...], float]:
+        """Calcule les quantiles du retard sur la fenêtre glissante.
+
+        Returns:
+            dict[tuple[str, ...], float]: Le retard (secondes) par quantile.
+
+        """
+        lags = sorted(self._lags)
+        if not lags:
+            return {}
+        return {(str(q),): lags[min(len(lags) - 1, int(q * len(lags)))] for q in LAG_QUANTILES}
+
+
+loop_watchdog = LoopWatchdog()
+
+# Quantiles calculés à la lecture de /metrics, sur les derniers réveils
+registry.gauge(
+    "event_loop_lag_quantile_seconds",
+    f"Quantiles du retard de la boucle sur les {LAG_WINDOW} derniers réveils.",
+    ("quantile",),
+    function=loop_watchdog.quantiles,
+)
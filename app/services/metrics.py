@@ -0,0 +1,348 @@
+"""Registre de métriques sans dépendance, exposé au format texte Prometheus.
+
+Trois types sont disponibles : compteurs, jauges et histogrammes à seaux
+fixes. Chaque métrique peut porter des labels, passés sous forme de tuple de
+valeurs dans l'ordre de `labelnames`. Une mise à jour coûte une recherche de
+dictionnaire sous un verrou (les routes synchrones s'exécutent dans un pool
+de threads).
+
+Une métrique peut aussi être calculée à la lecture (`function=`), pour
+exporter des valeurs tenues ailleurs (ex. les compteurs du limiteur de débit)
+sans rien ajouter au chemin critique.
+"""
+
+import threading
+from bisect import bisect_left
+from collections.abc import Callable, Iterator
+from typing import Optional, Union
+
+Labels = tuple[str, ...]
+Sample = Union[float, dict[Labels, float]]
+
+# Secondes : de la requête servie depuis le cache (~1 ms) au KDF et à bcrypt (~1 s)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _escape(value: str) -> str:
+    """Échappe une valeur de label pour le format texte Prometheus."""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Labels, values: Labels, extra: str = "") -> str:
+    """Formate un ensemble de labels, ex. `{method="GET",route="/"}`.
+
+    Arguments:
+        names (Labels): Les noms des labels.
+        values (Labels): Les valeurs, dans le même ordre.
+        extra (str): Un label supplémentaire déjà formaté (ex. `le="0.1"`).
+
+    Returns:
+        str: Les labels entre accolades, ou une chaîne vide.
+
+    """
+    parts = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    """Formate une valeur numérique (entiers sans décimale)."""
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+class Metric:
+    """Base commune des métriques.
+
+    Attributs :
+        name (str) : Nom de la métrique.
+        documentation (str) : Description (ligne `# HELP`).
+        labelnames (Labels) : Noms des labels.
+    """
+
+    kind = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Labels = (),
+        function: Optional[Callable[[], Sample]] = None,
+    ) -> None:
+        """Initialise la métrique.
+
+        Arguments:
+            name (str): Nom de la métrique.
+            documentation (str): Description.
+            labelnames (Labels): Noms des labels.
+            function (Optional[Callable[[], Sample]]): Calcule la valeur à la lecture.
+
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._function = function
+        self._values: dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def _samples(self) -> dict[Labels, float]:
+        """Retourne les valeurs courantes, par ensemble de labels."""
+        if self._function is None:
+            with self._lock:
+                return dict(self._values)
+        sample = self._function()
+        return sample if isinstance(sample, dict) else {(): sample}
+
+    def value(self, labels: Labels = ()) -> float:
+        """Retourne la valeur courante pour un ensemble de labels.
+
+        Arguments:
+            labels (Labels): Les valeurs des labels.
+
+        Returns:
+            float: La valeur (0 si jamais mise à jour).
+
+        """
+        return self._samples().get(labels, 0.0)
+
+    def collect(self) -> Iterator[str]:
+        """Produit les lignes de l'exposition Prometheus.
+
+        Yields:
+            str: Les lignes `# HELP`, `# TYPE` puis les échantillons.
+
+        """
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+        for labels, value in sorted(self._samples().items()):
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Counter(Metric):
+    """Compteur monotone."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, labels: Labels = ()) -> None:
+        """Incrémente le compteur.
+
+        Arguments:
+            amount (float): La valeur à ajouter (positive).
+            labels (Labels): Les valeurs des labels.
+
+        """
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+
+class Gauge(Metric):
+    """Valeur instantanée, qui peut monter ou descendre."""
+
+    kind = "gauge"
+
+    def set(self, value: float, labels: Labels = ()) -> None:
+        """Fixe la valeur de la jauge.
+
+        Arguments:
+            value (float): La nouvelle valeur.
+            labels (Labels): Les valeurs des labels.
+
+        """
+        with self._lock:
+            self._values[labels] = value
+
+    def inc(self, amount: float = 1.0, labels: Labels = ()) -> None:
+        """Augmente (ou diminue, si négatif) la jauge.
+
+        Arguments:
+            amount (float): La variation.
+            labels (Labels): Les valeurs des labels.
+
+        """
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, labels: Labels = ()) -> None:
+        """Diminue la jauge.
+
+        Arguments:
+            amount (float): La variation.
+            labels (Labels): Les valeurs des labels.
+
+        """
+        self.inc(-amount, labels)
+
+
+class Histogram(Metric):
+    """Histogramme à seaux fixes (bornes supérieures inclusives)."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Labels = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        """Initialise l'histogramme.
+
+        Arguments:
+            name (str): Nom de la métrique.
+            documentation (str): Description.
+            labelnames (Labels): Noms des labels.
+            buckets (tuple[float, ...]): Les bornes supérieures, croissantes.
+
+        """
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [compte par seau (+Inf en dernier), somme, nombre]
+        self._series: dict[Labels, list] = {}
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        """Enregistre une observation.
+
+        Arguments:
+            value (float): La valeur observée (ex. une durée en secondes).
+            labels (Labels): Les valeurs des labels.
+
+        """
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, labels: Labels = ()) -> int:
+        """Retourne le nombre d'observations pour un ensemble de labels.
+
+        Arguments:
+            labels (Labels): Les valeurs des labels.
+
+        Returns:
+            int: Le nombre d'observations.
+
+        """
+        with self._lock:
+            series = self._series.get(labels)
+            return series[2] if series else 0
+
+    def collect(self) -> Iterator[str]:
+        """Produit les lignes `_bucket`, `_sum` et `_count` de l'exposition.
+
+        Yields:
+            str: Les lignes de l'exposition Prometheus.
+
+        """
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+        with self._lock:
+            snapshot = {labels: (list(s[0]), s[1], s[2]) for labels, s in self._series.items()}
+        bounds = [*(_format_value(bound) for bound in self.buckets), "+Inf"]
+        for labels, (counts, total, count) in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                label_text = _format_labels(self.labelnames, labels, f'le="{bound}"')
+                yield f"{self.name}_bucket{label_text} {cumulative}"
+            label_text = _format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum{label_text} {_format_value(total)}"
+            yield f"{self.name}_count{label_text} {count}"
+
+
+class Registry:
+    """Ensemble des métriques exposées par `/metrics`."""
+
+    def __init__(self) -> None:
+        """Initialise un registre vide."""
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        """Ajoute une métrique au registre.
+
+        Arguments:
+            metric (Metric): La métrique à ajouter.
+
+        Returns:
+            Metric: La même métrique.
+
+        Raises:
+            ValueError: Si une métrique du même nom existe déjà.
+
+        """
+        if metric.name in self._metrics:
+            msg = f"Métrique déjà enregistrée : {metric.name}"
+            raise ValueError(msg)
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Labels = (), **kw) -> Counter:
+        """Crée et enregistre un compteur."""
+        return self.register(Counter(name, documentation, labelnames, **kw))
+
+    def gauge(self, name: str, documentation: str, labelnames: Labels = (), **kw) -> Gauge:
+        """Crée et enregistre une jauge."""
+        return self.register(Gauge(name, documentation, labelnames, **kw))
+
+    def histogram(self, name: str, documentation: str, labelnames: Labels = (), **kw) -> Histogram:
+        """Crée et enregistre un histogramme."""
+        return self.register(Histogram(name, documentation, labelnames, **kw))
+
+    def render(self) -> str:
+        """Produit l'exposition complète au format texte Prometheus 0.0.4.
+
+        Returns:
+            str: Le texte à servir sur `/metrics`.
+
+        """
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# Requêtes HTTP (alimentées par `app.middleware.metrics`)
+http_requests = registry.counter(
+    "http_requests_total",
+    "Requêtes HTTP traitées.",
+    ("method", "route", "status"),
+)
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds",
+    "Durée de traitement des requêtes HTTP.",
+    ("method", "route"),
+)
+http_requests_in_progress = registry.gauge(
+    "http_requests_in_progress",
+    "Requêtes HTTP en cours de traitement.",
+)
+
+# Cryptographie
+kdf_duration = registry.histogram(
+    "kdf_duration_seconds",
+    "Durée des dérivations de clé.",
+    ("kind",),
+)
+crypto_operations = registry.counter(
+    "crypto_operations_total",
+    "Chiffrements et déchiffrements AES de champs.",
+    ("operation",),
+)
+
+# Authentification
+password_verify_duration = registry.histogram(
+    "auth_password_verify_duration_seconds",
+    "Durée des vérifications de mot de passe (bcrypt).",
+)
+auth_attempts = registry.counter(
+    "auth_verifications_total",
+    "Vérifications de mot de passe et de code TOTP.",
+    ("factor", "result"),
+)
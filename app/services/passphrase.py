@@ -0,0 +1,379 @@
+"""Génération de phrases de passe (type diceware) à partir de listes de mots indexées.
+
+Les listes de mots sont compilées dans un fichier `.pvwl` compact :
+
+    en-tête   : b"PVWL", version (u8), 3 octets de remplissage
+    nombre    : nombre de mots (u32, little-endian)
+    offsets   : (nombre + 1) offsets u32 vers le début de chaque mot
+    données   : les mots encodés en UTF-8, mis bout à bout
+
+Le fichier est projeté en mémoire (`mmap`) et chaque mot est lu à la demande
+depuis ses offsets : une liste d'un million de mots ne coûte ni temps de
+démarrage ni mémoire Python.
+
+La liste par défaut est compilée au démarrage de l'application (lifespan), à
+côté de sa source, ou dans `WORDLISTS_CACHE_DIR` si ce répertoire est en
+lecture seule. L'écriture passe par un fichier temporaire unique renommé
+atomiquement : plusieurs workers peuvent compiler en même temps sans se gêner.
+
+Une liste compilée décide de l'entropie réelle des phrases de passe : une liste
+de trois mots déposée par un autre compte les rendrait prévisibles sans que
+l'entropie affichée ne change. `WORDLISTS_CACHE_DIR` est donc propre à
+l'utilisateur du processus (créé en 0700, propriétaire vérifié), et un fichier
+compilé n'est chargé que si ni lui ni son répertoire ne sont modifiables par
+d'autres comptes que celui du processus et celui qui a installé l'application.
+
+Utilisation en ligne de commande :
+    python -m app.services.passphrase build app/data/wordlists/fr.txt
+"""
+
+import logging
+import math
+import mmap
+import os
+import secrets
+import stat
+import struct
+import sys
+import tempfile
+import threading
+from functools import lru_cache
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+WORDLISTS_DIR = Path(__file__).resolve().parent.parent / "data" / "wordlists"
+# Repli quand `WORDLISTS_DIR` n'est pas accessible en écriture (déploiement en
+# lecture seule) : un répertoire par utilisateur, jamais partagé
+WORDLISTS_CACHE_DIR = Path(tempfile.gettempdir()) / f"vault-wordlists-{os.getuid() if hasattr(os, 'getuid') else 0}"
+DEFAULT_WORDLIST = "fr"
+
+MAGIC = b"PVWL"
+VERSION = 1
+HEADER = struct.Struct("<4sB3xI")
+OFFSET = struct.Struct("<I")
+
+SEPARATORS = ("-", " ", ".", "_", "")
+CAPITALIZATIONS = ("none", "all", "random")
+
+_build_lock = threading.Lock()
+
+
+class Wordlist:
+    """Liste de mots projetée en mémoire depuis un fichier `.pvwl`.
+
+    Attributs :
+        path (Path) : Chemin du fichier compilé.
+        count (int) : Nombre de mots de la liste.
+    """
+
+    def __init__(self, path: Path) -> None:
+        """Ouvre et projette en mémoire un fichier `.pvwl`.
+
+        Arguments:
+            path (Path): Chemin du fichier compilé.
+
+        Raises:
+            ValueError: Si le fichier n'est pas une liste de mots valide.
+
+        """
+        self.path = path
+        with path.open("rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION or self.count == 0:
+            self._mmap.close()
+            msg = f"Liste de mots invalide : {path}"
+            raise ValueError(msg)
+        self._data_start = HEADER.size + (self.count + 1) * OFFSET.size
+
+    def __len__(self) -> int:
+        """Retourne le nombre de mots de la liste."""
+        return self.count
+
+    def __getitem__(self, index: int) -> str:
+        """Lit le mot d'indice `index` directement dans le fichier projeté.
+
+        Arguments:
+            index (int): Indice du mot, entre 0 et `count - 1`.
+
+        Returns:
+            str: Le mot lu.
+
+        """
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        position = HEADER.size + index * OFFSET.size
+        start, end = struct.unpack_from("<II", self._mmap, position)
+        return self._mmap[self._data_start + start : self._data_start + end].decode()
+
+    @property
+    def bits_per_word(self) -> float:
+        """Entropie apportée par un mot tiré uniformément, en bits."""
+        return math.log2(self.count)
+
+    def random_word(self) -> str:
+        """Tire un mot uniformément avec le générateur cryptographique.
+
+        Returns:
+            str: Le mot tiré.
+
+        """
+        return self[secrets.randbelow(self.count)]
+
+
+def build_wordlist(source: Path, destination: Path) -> int:
+    """Compile une liste texte (un mot par ligne) en fichier `.pvwl`.
+
+    Les lignes vides, les commentaires (`#`) et les doublons sont ignorés.
+
+    Arguments:
+        source (Path): Le fichier texte source.
+        destination (Path): Le fichier `.pvwl` à écrire.
+
+    Returns:
+        int: Le nombre de mots écrits.
+
+    Raises:
+        ValueError: Si la liste source ne contient aucun mot.
+
+    """
+    offsets = [0]
+    seen = set()
+    # Noms temporaires uniques : d'autres processus peuvent compiler la même liste
+    data_fd, data_name = tempfile.mkstemp(prefix=f".{destination.name}.", suffix=".data", dir=destination.parent)
+    tmp_fd, tmp_name = tempfile.mkstemp(prefix=f".{destination.name}.", suffix=".tmp", dir=destination.parent)
+    try:
+        # Les mots sont écrits au fil de l'eau : seuls les offsets et le
+        # dédoublonnage restent en mémoire pendant la compilation
+        with source.open(encoding="utf-8") as lines, os.fdopen(data_fd, "w+b") as data:
+            for line in lines:
+                word = line.strip()
+                if not word or word.startswith("#") or word in seen:
+                    continue
+                seen.add(word)
+                encoded = word.encode()
+                data.write(encoded)
+                offsets.append(offsets[-1] + len(encoded))
+
+            count = len(offsets) - 1
+            if count == 0:
+                msg = f"Aucun mot dans {source}"
+                raise ValueError(msg)
+
+            data.seek(0)
+            with os.fdopen(tmp_fd, "wb") as out:
+                out.write(HEADER.pack(MAGIC, VERSION, count))
+                out.write(struct.pack(f"<{len(offsets)}I", *offsets))
+                while chunk := data.read(1 << 20):
+                    out.write(chunk)
+        os.chmod(tmp_name, 0o644)
+        os.replace(tmp_name, destination)
+    finally:
+        for name in (data_name, tmp_name):
+            try:
+                os.unlink(name)
+            except FileNotFoundError:
+                pass
+    return count
+
+
+def _trusted_owners() -> set[int]:
+    """Comptes autorisés à posséder une liste compilée : le processus et l'installateur de l'application."""
+    return {os.getuid(), WORDLISTS_DIR.stat().st_uid}
+
+
+def _is_trusted(path: Path, kind: int) -> bool:
+    """Indique si un fichier ou répertoire appartient à un compte de confiance et n'est modifiable par aucun autre.
+
+    Arguments:
+        path (Path): Le chemin (les liens symboliques sont refusés).
+        kind (int): `stat.S_IFREG` ou `stat.S_IFDIR`.
+
+    Returns:
+        bool: True si le chemin peut être utilisé.
+
+    """
+    if not hasattr(os, "getuid"):
+        # Windows : le répertoire temporaire est déjà propre à l'utilisateur
+        return True
+    try:
+        info = os.lstat(path)
+    except FileNotFoundError:
+        return False
+    return (
+        stat.S_IFMT(info.st_mode) == kind
+        and info.st_uid in _trusted_owners()
+        and not info.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+    )
+
+
+def _prepare_directory(directory: Path) -> None:
+    """Crée au besoin le répertoire de compilation (0700) et vérifie qu'il est sûr.
+
+    Arguments:
+        directory (Path): Le répertoire.
+
+    Raises:
+        PermissionError: Si le répertoire appartient à un autre compte ou est modifiable par d'autres.
+
+    """
+    directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+    if not _is_trusted(directory, stat.S_IFDIR):
+        msg = f"Répertoire non sûr pour les listes de mots (propriétaire ou droits) : {directory}"
+        raise PermissionError(msg)
+
+
+def _load_trusted(compiled: Path, source: Path) -> Wordlist | None:
+    """Ouvre une liste compilée à jour, si elle et son répertoire sont sûrs.
+
+    Arguments:
+        compiled (Path): Le fichier `.pvwl`.
+        source (Path): Sa source texte.
+
+    Returns:
+        Wordlist | None: La liste, ou None s'il faut la (re)compiler.
+
+    """
+    if not _is_fresh(compiled, source):
+        return None
+    if not (_is_trusted(compiled.parent, stat.S_IFDIR) and _is_trusted(compiled, stat.S_IFREG)):
+        logger.warning("Liste de mots ignorée, propriétaire ou droits non sûrs : %s", compiled)
+        return None
+    return Wordlist(compiled)
+
+
+def _is_fresh(compiled: Path, source: Path) -> bool:
+    """Indique si un fichier compilé existe et n'est pas plus ancien que sa source."""
+    try:
+        compiled_mtime = compiled.stat().st_mtime
+    except FileNotFoundError:
+        return False
+    return not source.exists() or compiled_mtime >= source.stat().st_mtime
+
+
+@lru_cache(maxsize=8)
+def get_wordlist(name: str = DEFAULT_WORDLIST) -> Wordlist:
+    """Retourne la liste de mots `name`, compilée au besoin depuis sa source texte.
+
+    Le fichier compilé est cherché puis écrit dans `WORDLISTS_DIR`, ou à défaut
+    dans `WORDLISTS_CACHE_DIR`. Un fichier compilé déposé ou modifiable par un
+    autre compte est ignoré (voir `_is_trusted`).
+
+    Arguments:
+        name (str): Nom de la liste (fichier `<name>.pvwl` dans `data/wordlists`).
+
+    Returns:
+        Wordlist: La liste projetée en mémoire.
+
+    Raises:
+        FileNotFoundError: Si ni le fichier compilé ni la source n'existent.
+        OSError: Si la liste ne peut être compilée dans aucun des deux répertoires.
+
+    """
+    source = WORDLISTS_DIR / f"{name}.txt"
+    directories = (WORDLISTS_DIR, WORDLISTS_CACHE_DIR)
+    with _build_lock:
+        for directory in directories:
+            wordlist = _load_trusted(directory / f"{name}.pvwl", source)
+            if wordlist is not None:
+                return wordlist
+        if not source.exists():
+            msg = f"Liste de mots introuvable : {name}"
+            raise FileNotFoundError(msg)
+        for directory in directories:
+            compiled = directory / f"{name}.pvwl"
+            try:
+                _prepare_directory(directory)
+                build_wordlist(source, compiled)
+            except OSError as ex:
+                logger.warning("Compilation de la liste %s impossible dans %s : %s", name, directory, ex)
+                error = ex
+                continue
+            return Wordlist(compiled)
+    raise error
+
+
+def passphrase_entropy(
+    wordlist: Wordlist,
+    word_count: int,
+    capitalization: str,
+    insert_digit: bool,
+) -> float:
+    """Calcule l'entropie d'une phrase de passe générée avec ces paramètres.
+
+    Arguments:
+        wordlist (Wordlist): La liste de mots utilisée.
+        word_count (int): Nombre de mots.
+        capitalization (str): "none", "all" ou "random".
+        insert_digit (bool): Un chiffre est ajouté à un mot tiré au hasard.
+
+    Returns:
+        float: L'entropie en bits.
+
+    """
+    entropy = word_count * wordlist.bits_per_word
+    if capitalization == "random":
+        entropy += word_count  # un bit par mot : majuscule ou non
+    if insert_digit:
+        entropy += math.log2(10 * word_count)  # chiffre et mot qui le reçoit
+    return entropy
+
+
+def generate_passphrase(
+    word_count: int = 6,
+    separator: str = "-",
+    capitalization: str = "none",
+    insert_digit: bool = False,
+    wordlist: Wordlist | None = None,
+) -> tuple[str, float]:
+    """Génère une phrase de passe et son entropie.
+
+    Arguments:
+        word_count (int): Nombre de mots (entre 3 et 20).
+        separator (str): Séparateur entre les mots (voir `SEPARATORS`).
+        capitalization (str): "none", "all" (chaque mot) ou "random" (au hasard).
+        insert_digit (bool): Ajoute un chiffre aléatoire à un mot aléatoire.
+        wordlist (Wordlist | None): La liste de mots (par défaut, la liste française).
+
+    Returns:
+        tuple[str, float]: La phrase de passe et son entropie en bits.
+
+    Raises:
+        ValueError: Si un paramètre est invalide.
+
+    """
+    if not 3 <= word_count <= 20:
+        msg = "Le nombre de mots doit être compris entre 3 et 20."
+        raise ValueError(msg)
+    if separator not in SEPARATORS:
+        msg = "Séparateur non pris en charge."
+        raise ValueError(msg)
+    if capitalization not in CAPITALIZATIONS:
+        msg = "Mode de majuscules non pris en charge."
+        raise ValueError(msg)
+
+    wordlist = wordlist or get_wordlist()
+    words = [wordlist.random_word() for _ in range(word_count)]
+
+    if capitalization == "all":
+        words = [word.capitalize() for word in words]
+    elif capitalization == "random":
+        words = [word.capitalize() if secrets.randbits(1) else word for word in words]
+
+    if insert_digit:
+        index = secrets.randbelow(word_count)
+        words[index] += str(secrets.randbelow(10))
+
+    entropy = passphrase_entropy(wordlist, word_count, capitalization, insert_digit)
+    return separator.join(words), entropy
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (3, 4) or sys.argv[1] != "build":
+        sys.exit("Utilisation : python -m app.services.passphrase build <source.txt> [sortie.pvwl]")
+    source_path = Path(sys.argv[2])
+    output_path = Path(sys.argv[3]) if len(sys.argv) == 4 else source_path.with_suffix(".pvwl")
+    written = build_wordlist(source_path, output_path)
+    print(f"{written} mots écrits dans {output_path}")
@@ -0,0 +1,244 @@
+"""Génération de mots de passe par lots à partir d'un seul tampon `os.urandom`.
+
+Chaque lot tire un grand tampon d'octets aléatoires et le projette sur
+l'alphabet par échantillonnage avec rejet : les octets qui introduiraient un
+biais modulo sont écartés. Le calcul est vectorisé avec NumPy lorsqu'il est
+installé, sinon `bytes.translate` effectue la projection en C.
+"""
+
+import os
+import string
+
+from app.services.password_utils import SPECIAL_CHARS
+
+# NumPy (optionnel) n'est importé qu'au premier lot qui en a besoin : son
+# import coûte plusieurs dizaines de millisecondes au démarrage d'un worker
+np = None
+_numpy_loaded = False
+
+
+def _numpy():
+    """Importe NumPy au premier appel.
+
+    Returns:
+        module | None: Le module NumPy, ou None s'il n'est pas installé.
+
+    """
+    global np, _numpy_loaded
+    if not _numpy_loaded:
+        _numpy_loaded = True
+        try:
+            import numpy
+        except ImportError:  # pragma: no cover - dépend de l'environnement
+            numpy = None
+        np = numpy
+    return np
+
+# Nombre de caractères spéciaux imposés lorsque l'option est activée
+SPECIAL_COUNT = 4
+
+
+def _alphabets(
+    use_special_chars: bool,
+    use_digits: bool,
+    use_uppercase: bool,
+    use_lowercase: bool,
+) -> tuple[bytes, bytes]:
+    """Construit l'alphabet du corps du mot de passe et celui des caractères spéciaux.
+
+    Arguments:
+        use_special_chars (bool): Inclure des caractères spéciaux.
+        use_digits (bool): Inclure des chiffres.
+        use_uppercase (bool): Inclure des lettres majuscules.
+        use_lowercase (bool): Inclure des lettres minuscules.
+
+    Returns:
+        tuple[bytes, bytes]: L'alphabet du corps et l'alphabet spécial (vide si désactivé).
+
+    Raises:
+        ValueError: Si aucun critère de caractère n'est sélectionné.
+
+    """
+    body = ""
+    if use_lowercase:
+        body += string.ascii_lowercase
+    if use_uppercase:
+        body += string.ascii_uppercase
+    if use_digits:
+        body += string.digits
+    special = SPECIAL_CHARS if use_special_chars else ""
+
+    if not body and not special:
+        msg = (
+            "Aucun critère de caractère sélectionné pour la génération du mot de passe."
+        )
+        raise ValueError(msg)
+
+    # Uniquement des caractères spéciaux : le corps en est aussi composé
+    return (body or special).encode(), special.encode()
+
+
+def _py_uniform(n: int, alphabet: bytes) -> bytes:
+    """Tire `n` octets uniformément dans `alphabet` (sans NumPy).
+
+    Arguments:
+        n (int): Nombre d'octets à tirer.
+        alphabet (bytes): L'alphabet cible (256 symboles au plus).
+
+    Returns:
+        bytes: Les `n` symboles tirés.
+
+    """
+    k = len(alphabet)
+    limit = 256 - 256 % k
+    table = bytes(alphabet[b % k] for b in range(256))
+    rejected = bytes(range(limit, 256))
+
+    out = b""
+    while len(out) < n:
+        missing = n - len(out)
+        # Sur-échantillonne pour compenser le taux de rejet attendu
+        buffer = os.urandom(missing * 256 // limit + 64)
+        out += buffer.translate(table, rejected)
+    return out[:n]
+
+
+def _np_uniform(n: int, k: int) -> "np.ndarray":
+    """Tire `n` entiers uniformément dans `[0, k)` avec NumPy.
+
+    Arguments:
+        n (int): Nombre d'entiers à tirer.
+        k (int): Borne supérieure exclue (65536 au plus).
+
+    Returns:
+        np.ndarray: Les entiers tirés.
+
+    """
+    dtype = np.uint8 if k <= 256 else np.dtype("<u2")
+    span = 256 if k <= 256 else 65536
+    limit = span - span % k
+
+    chunks = [np.empty(0, dtype=dtype)]
+    remaining = n
+    while remaining > 0:
+        size = remaining * span // limit + 64
+        values = np.frombuffer(os.urandom(size * np.dtype(dtype).itemsize), dtype=dtype)
+        values = values[values < limit][:remaining]
+        chunks.append(values)
+        remaining -= len(values)
+    return (np.concatenate(chunks) % k).astype(np.intp)
+
+
+def _np_generate(count: int, length: int, body: bytes, special: bytes) -> list[str]:
+    """Génère un lot de mots de passe avec NumPy.
+
+    Arguments:
+        count (int): Nombre de mots de passe.
+        length (int): Longueur de chaque mot de passe.
+        body (bytes): Alphabet du corps.
+        special (bytes): Alphabet spécial (vide si désactivé).
+
+    Returns:
+        list[str]: Les mots de passe générés.
+
+    """
+    n_special = min(SPECIAL_COUNT, length) if special else 0
+    n_body = length - n_special
+
+    body_table = np.frombuffer(body, dtype=np.uint8)
+    chars = body_table[_np_uniform(count * n_body, len(body))].reshape(count, n_body)
+
+    if n_special:
+        special_table = np.frombuffer(special, dtype=np.uint8)
+        specials = special_table[_np_uniform(count * n_special, len(special))]
+        chars = np.concatenate([chars, specials.reshape(count, n_special)], axis=1)
+
+        # Fisher-Yates vectorisé : une itération par position, tous les mots de passe à la fois
+        rows = np.arange(count)
+        for i in range(length - 1, 0, -1):
+            j = _np_uniform(count, i + 1)
+            swapped = chars[rows, j]
+            chars[rows, j] = chars[:, i]
+            chars[:, i] = swapped
+
+    flat = np.ascontiguousarray(chars).tobytes().decode("ascii")
+    return [flat[i : i + length] for i in range(0, count * length, length)]
+
+
+def _py_generate(count: int, length: int, body: bytes, special: bytes) -> list[str]:
+    """Génère un lot de mots de passe sans NumPy.
+
+    Arguments:
+        count (int): Nombre de mots de passe.
+        length (int): Longueur de chaque mot de passe.
+        body (bytes): Alphabet du corps.
+        special (bytes): Alphabet spécial (vide si désactivé).
+
+    Returns:
+        list[str]: Les mots de passe générés.
+
+    """
+    n_special = min(SPECIAL_COUNT, length) if special else 0
+    n_body = length - n_special
+
+    bodies = _py_uniform(count * n_body, body).decode("ascii")
+    if not n_special:
+        return [bodies[i : i + length] for i in range(0, count * length, length)]
+
+    specials = _py_uniform(count * n_special, special).decode("ascii")
+    # Un flux d'indices par position de Fisher-Yates : swaps[i][p] est dans [0, i]
+    swaps = {i: _py_uniform(count, bytes(range(i + 1))) for i in range(1, length)}
+
+    passwords = []
+    for p in range(count):
+        chars = list(
+            bodies[p * n_body : (p + 1) * n_body]
+            + specials[p * n_special : (p + 1) * n_special],
+        )
+        for i in range(length - 1, 0, -1):
+            j = swaps[i][p]
+            chars[i], chars[j] = chars[j], chars[i]
+        passwords.append("".join(chars))
+    return passwords
+
+
+def generate_passwords(
+    count: int,
+    length: int,
+    use_special_chars: bool,
+    use_digits: bool,
+    use_uppercase: bool,
+    use_lowercase: bool,
+) -> list[str]:
+    """Génère `count` mots de passe en un seul tirage d'aléa cryptographique.
+
+    Les caractères sont tirés uniquement dans les classes sélectionnées. Lorsque
+    les caractères spéciaux sont activés, chaque mot de passe en contient
+    exactement 4 (ou `length` s'il est plus court), à des positions aléatoires.
+
+    Arguments:
+        count (int): Nombre de mots de passe à générer.
+        length (int): La longueur de chaque mot de passe (255 au plus).
+        use_special_chars (bool): Inclure des caractères spéciaux.
+        use_digits (bool): Inclure des chiffres.
+        use_uppercase (bool): Inclure des lettres majuscules.
+        use_lowercase (bool): Inclure des lettres minuscules.
+
+    Returns:
+        list[str]: Les mots de passe générés.
+
+    Raises:
+        ValueError: Si aucun critère n'est sélectionné ou si la longueur est invalide.
+
+    """
+    body, special = _alphabets(use_special_chars, use_digits, use_uppercase, use_lowercase)
+    if not 0 < length < 256:
+        msg = "La longueur du mot de passe doit être comprise entre 1 et 255."
+        raise ValueError(msg)
+    if count <= 0:
+        return []
+
+    # Sans mélange à faire, `bytes.translate` est plus rapide que NumPy
+    if special and _numpy() is not None:
+        return _np_generate(count, length, body, special)
+    return _py_generate(count, length, body, special)
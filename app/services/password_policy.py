@@ -0,0 +1,199 @@
+"""Politiques de génération de mots de passe satisfaites en une seule passe.
+
+Une politique fixe la longueur, les classes de caractères autorisées avec un
+minimum par classe, des caractères exclus et une longueur maximale de
+répétition d'un même caractère. La génération ne boucle jamais jusqu'à obtenir
+un mot de passe valide :
+
+1. les emplacements imposés par les minimums sont réservés à leur classe ;
+2. les emplacements restants reçoivent une classe tirée proportionnellement à
+   la taille de son alphabet (équivalent à un tirage uniforme dans l'union) ;
+3. les emplacements sont mélangés (Fisher-Yates) ;
+4. chaque emplacement reçoit un caractère uniforme de sa classe, en écartant
+   au besoin le seul caractère qui dépasserait la répétition maximale.
+
+Les politiques impossibles à satisfaire sont rejetées à la construction.
+"""
+
+import secrets
+import string
+from dataclasses import dataclass, field
+
+from app.services.password_utils import SPECIAL_CHARS
+
+CHARACTER_CLASSES = {
+    "lowercase": string.ascii_lowercase,
+    "uppercase": string.ascii_uppercase,
+    "digits": string.digits,
+    "special": SPECIAL_CHARS,
+}
+# Caractères facilement confondus à la lecture
+AMBIGUOUS_CHARS = "Il1O0o"
+
+_random = secrets.SystemRandom()
+
+
+class PolicyError(ValueError):
+    """Levée lorsqu'une politique de génération est impossible à satisfaire."""
+
+
+@dataclass(frozen=True)
+class PasswordPolicy:
+    """Politique de génération de mots de passe.
+
+    Attributs :
+        length (int) : Longueur des mots de passe générés.
+        minimums (dict[str, int]) : Classes autorisées et nombre minimal de caractères de chacune.
+        exclude (str) : Caractères à ne jamais utiliser.
+        exclude_ambiguous (bool) : Exclure aussi `AMBIGUOUS_CHARS`.
+        max_run (int | None) : Nombre maximal de répétitions consécutives d'un caractère.
+        label (str) : Libellé affiché dans le formulaire.
+    """
+
+    length: int
+    minimums: dict[str, int]
+    exclude: str = ""
+    exclude_ambiguous: bool = False
+    max_run: int | None = None
+    label: str = ""
+    alphabets: dict[str, str] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        """Calcule les alphabets effectifs et vérifie que la politique est satisfiable.
+
+        Raises:
+            PolicyError: Si la politique est impossible à satisfaire.
+
+        """
+        errors = []
+        excluded = set(self.exclude) | (
+            set(AMBIGUOUS_CHARS) if self.exclude_ambiguous else set()
+        )
+
+        if not 1 <= self.length <= 255:
+            errors.append("La longueur doit être comprise entre 1 et 255.")
+        if not self.minimums:
+            errors.append("Au moins une classe de caractères doit être autorisée.")
+
+        alphabets = {}
+        for name, minimum in self.minimums.items():
+            if name not in CHARACTER_CLASSES:
+                errors.append(f"Classe de caractères inconnue : {name}.")
+                continue
+            if minimum < 0:
+                errors.append(f"Le minimum de la classe {name} doit être positif.")
+            alphabet = "".join(c for c in CHARACTER_CLASSES[name] if c not in excluded)
+            if not alphabet:
+                errors.append(f"Tous les caractères de la classe {name} sont exclus.")
+            elif self.max_run is not None and len(alphabet) < 2:
+                errors.append(
+                    f"La classe {name} doit garder au moins 2 caractères avec une répétition maximale.",
+                )
+            alphabets[name] = alphabet
+
+        if sum(self.minimums.values()) > self.length:
+            errors.append("La somme des minimums dépasse la longueur du mot de passe.")
+        if self.max_run is not None and self.max_run < 1:
+            errors.append("La répétition maximale doit être d'au moins 1.")
+
+        if errors:
+            raise PolicyError(" ".join(errors))
+        object.__setattr__(self, "alphabets", alphabets)
+
+    def generate(self) -> str:
+        """Génère un mot de passe respectant la politique, en une seule passe.
+
+        Returns:
+            str: Le mot de passe généré.
+
+        """
+        names = list(self.alphabets)
+        sizes = [len(self.alphabets[name]) for name in names]
+        union_size = sum(sizes)
+
+        slots = [name for name in names for _ in range(self.minimums[name])]
+        for _ in range(self.length - len(slots)):
+            # Classe d'un caractère tiré uniformément dans l'union des alphabets
+            index = secrets.randbelow(union_size)
+            for name, size in zip(names, sizes):
+                if index < size:
+                    slots.append(name)
+                    break
+                index -= size
+        _random.shuffle(slots)
+
+        chars: list[str] = []
+        for name in slots:
+            alphabet = self.alphabets[name]
+            if self.max_run is not None and len(chars) >= self.max_run:
+                tail = chars[-self.max_run :]
+                if tail.count(tail[0]) == self.max_run and tail[0] in alphabet:
+                    alphabet = alphabet.replace(tail[0], "")
+            chars.append(alphabet[secrets.randbelow(len(alphabet))])
+        return "".join(chars)
+
+    def generate_many(self, count: int) -> list[str]:
+        """Génère `count` mots de passe respectant la politique.
+
+        Arguments:
+            count (int): Nombre de mots de passe.
+
+        Returns:
+            list[str]: Les mots de passe générés.
+
+        """
+        return [self.generate() for _ in range(count)]
+
+
+POLICIES = {
+    "standard": PasswordPolicy(
+        length=16,
+        minimums={"lowercase": 1, "uppercase": 1, "digits": 1, "special": 1},
+        label="Standard (16, toutes les classes)",
+    ),
+    "lisible": PasswordPolicy(
+        length=16,
+        minimums={"lowercase": 1, "uppercase": 1, "digits": 1, "special": 1},
+        exclude_ambiguous=True,
+        max_run=2,
+        label="Lisible (sans caractères ambigus)",
+    ),
+    "strict": PasswordPolicy(
+        length=24,
+        minimums={"lowercase": 2, "uppercase": 2, "digits": 2, "special": 2},
+        exclude_ambiguous=True,
+        max_run=1,
+        label="Strict (24, 2 par classe, sans répétition)",
+    ),
+    "alphanumerique": PasswordPolicy(
+        length=20,
+        minimums={"lowercase": 1, "uppercase": 1, "digits": 1},
+        label="Alphanumérique (20)",
+    ),
+    "pin": PasswordPolicy(
+        length=6,
+        minimums={"digits": 6},
+        max_run=2,
+        label="Code PIN (6 chiffres)",
+    ),
+}
+
+
+def get_policy(name: str) -> PasswordPolicy:
+    """Retourne la politique nommée `name`.
+
+    Arguments:
+        name (str): Le nom de la politique (clé de `POLICIES`).
+
+    Returns:
+        PasswordPolicy: La politique.
+
+    Raises:
+        PolicyError: Si la politique n'existe pas.
+
+    """
+    try:
+        return POLICIES[name]
+    except KeyError:
+        msg = f"Politique inconnue : {name}."
+        raise PolicyError(msg) from None
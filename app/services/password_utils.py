@@ -1,8 +1,6 @@
 """Service de gestion des mots de passe (analyse & génération)."""
 
-import random
 import re
-import string
 
 SPECIAL_CHARS = "@&$!()?"
 
@@ -75,6 +73,10 @@ def generate_password(
 ) -> str:
     """Génère un mot de passe aléatoire en fonction des critères spécifiés.
 
+    Le tirage est délégué au moteur par lots (`password_batch`), qui utilise
+    `os.urandom`. Pour plusieurs mots de passe, appeler directement
+    `password_batch.generate_passwords`.
+
     Arguments:
         length (int): La longueur du mot de passe à générer.
         use_special_chars (bool): Inclure des caractères spéciaux.
@@ -87,43 +89,16 @@ def generate_password(
 
     Raises:
         ValueError: Si aucun critère de caractère n'est sélectionné pour la génération.
+        ValueError: Si la longueur n'est pas comprise entre 1 et 255.
 
     """
-    characters = ""
-
-    if use_lowercase:
-        characters += (
-            string.ascii_lowercase
-        )  # Inclure les lettres minuscules si nécessaire
-    if use_uppercase:
-        characters += string.ascii_uppercase  # Ajouter les majuscules si nécessaire
-    if use_digits:
-        characters += string.digits  # Ajouter les chiffres si nécessaire
-    if use_special_chars:
-        characters += (
-            SPECIAL_CHARS  # Ajouter les caractères spéciaux personnalisés si nécessaire
-        )
-
-    if not characters:
-        msg = (
-            "Aucun critère de caractère sélectionné pour la génération du mot de passe."
-        )
-        raise ValueError(
-            msg,
-        )
-
-    # S'assurer qu'il y a au moins un caractère spécial si 'use_special_chars' est True
-    if use_special_chars:
-        # D'abord générer une partie du mot de passe avec les caractères généraux (lettres et chiffres)
-        password = "".join(
-            random.choices(string.ascii_letters + string.digits, k=length - 4),
-        )
-        # Ajouter exactement 4 caractères spéciaux
-        password += "".join(random.choices(SPECIAL_CHARS, k=4))
-        # Mélanger les caractères pour garantir une distribution aléatoire
-        password = "".join(random.sample(password, len(password)))
-    else:
-        # Simple génération sans caractères spéciaux
-        password = "".join(random.choices(characters, k=length))
-
-    return password
+    from app.services.password_batch import generate_passwords
+
+    return generate_passwords(
+        1,
+        length,
+        use_special_chars,
+        use_digits,
+        use_uppercase,
+        use_lowercase,
+    )[0]
@@ -0,0 +1,281 @@
+"""Profilage ponctuel d'une requête : profil statistique et instantané tracemalloc.
+
+Un thread échantillonne `sys._current_frames()` à intervalle fixe pendant la
+requête. Contrairement à cProfile, qui ne suit que le thread qui l'active,
+l'échantillonnage voit aussi les routes et dépendances synchrones exécutées
+dans le pool de threads (SQLAlchemy, boucle de déchiffrement, rendu Jinja).
+Les threads inactifs (en attente sur un verrou, une file ou le sélecteur)
+sont ignorés. Les autres requêtes concurrentes peuvent apparaître dans le
+profil : il est destiné au diagnostic, sur un serveur peu chargé.
+
+Chaque profil est écrit dans `PROFILING_DIR` (`<id>.profile.json` et
+`<id>.tracemalloc`) ; seuls les `PROFILING_KEEP` plus récents sont conservés
+(voir `app.config`).
+
+Utilisation en ligne de commande :
+    python -m app.services.profiling list
+    python -m app.services.profiling summary profiles/<id>.profile.json --top 25
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+
+from app.config import Settings
+
+PROFILING_DIR = Path("profiles")
+PROFILING_KEEP = 50
+SAMPLE_INTERVAL = 0.001
+MAX_DEPTH = 64
+
+# Fonctions feuilles d'un thread qui attend : ses échantillons ne sont pas du travail
+IDLE_LEAVES = {"wait", "_wait_for_tstate_lock", "select", "get", "_worker"}
+IDLE_FILES = ("threading.py", "queue.py", "selectors.py", "thread.py")
+
+
+def _frame_label(frame) -> str:
+    """Décrit une frame par `fonction (fichier:ligne)`."""
+    code = frame.f_code
+    filename = code.co_filename
+    for prefix in sys.path:
+        if prefix and filename.startswith(prefix):
+            filename = filename[len(prefix) :].lstrip(os.sep)
+            break
+    return f"{code.co_name} ({filename}:{frame.f_lineno})"
+
+
+def _is_idle(frame) -> bool:
+    """Indique si la frame feuille est une attente (thread inactif)."""
+    code = frame.f_code
+    return code.co_name in IDLE_LEAVES and code.co_filename.endswith(IDLE_FILES)
+
+
+def configure(directory: str, keep: int) -> None:
+    """Règle l'emplacement et la rotation des profils.
+
+    Arguments:
+        directory (str): Le répertoire des profils.
+        keep (int): Nombre de profils conservés.
+
+    """
+    global PROFILING_DIR, PROFILING_KEEP
+    PROFILING_DIR = Path(directory)
+    PROFILING_KEEP = keep
+
+
+class StackSampler:
+    """Échantillonneur de piles de tous les threads actifs, dans un thread dédié.
+
+    Attributs :
+        interval (float) : Intervalle entre deux échantillons, en secondes.
+        stacks (Counter) : Nombre d'échantillons par pile repliée (racine;...;feuille).
+        samples (int) : Nombre total d'échantillons.
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL) -> None:
+        """Initialise l'échantillonneur.
+
+        Arguments:
+            interval (float): Intervalle entre deux échantillons, en secondes.
+
+        """
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiling-sampler", daemon=True)
+
+    def _run(self) -> None:
+        """Boucle d'échantillonnage, jusqu'à `stop()`."""
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own or _is_idle(frame):
+                    continue
+                labels = []
+                while frame is not None and len(labels) < MAX_DEPTH:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(labels))] += 1
+                self.samples += 1
+
+    def start(self) -> None:
+        """Démarre l'échantillonnage."""
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Arrête l'échantillonnage et attend la fin du thread."""
+        self._stop.set()
+        self._thread.join()
+
+
+class RequestProfile:
+    """Profil d'une requête : échantillonnage et allocations mémoire.
+
+    Attributs :
+        profile_id (str) : Identifiant du profil (préfixe des fichiers).
+        method (str) : Méthode HTTP.
+        path (str) : Chemin de la requête.
+    """
+
+    def __init__(self, method: str, path: str) -> None:
+        """Initialise le profil.
+
+        Arguments:
+            method (str): Méthode HTTP.
+            path (str): Chemin de la requête.
+
+        """
+        slug = "".join(c if c.isalnum() else "-" for c in path.strip("/"))[:40] or "racine"
+        now = time.time()
+        stamp = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}.{int(now % 1 * 1000):03d}"
+        self.profile_id = f"{stamp}-{os.getpid()}-{method}-{slug}"
+        self.method = method
+        self.path = path
+        self._sampler = StackSampler()
+        self._started_tracemalloc = False
+        self._start = 0.0
+
+    def start(self) -> None:
+        """Démarre l'échantillonnage et le suivi des allocations."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(16)
+            self._started_tracemalloc = True
+        tracemalloc.reset_peak()
+        self._start = time.perf_counter()
+        self._sampler.start()
+
+    def stop(self, route: Optional[str], status_code: int) -> Path:
+        """Arrête le profil et l'écrit sur disque.
+
+        Arguments:
+            route (Optional[str]): Le gabarit de la route, s'il est connu.
+            status_code (int): Le statut de la réponse.
+
+        Returns:
+            Path: Le fichier `.profile.json` écrit.
+
+        """
+        self._sampler.stop()
+        duration = time.perf_counter() - self._start
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+
+        PROFILING_DIR.mkdir(parents=True, exist_ok=True)
+        base = PROFILING_DIR / self.profile_id
+        snapshot.dump(f"{base}.tracemalloc")
+        path = Path(f"{base}.profile.json")
+        path.write_text(
+            json.dumps(
+                {
+                    "method": self.method,
+                    "path": self.path,
+                    "route": route,
+                    "status": status_code,
+                    "duration": duration,
+                    "interval": self._sampler.interval,
+                    "samples": self._sampler.samples,
+                    "memory_current": current,
+                    "memory_peak": peak,
+                    "stacks": dict(self._sampler.stacks.most_common()),
+                },
+                ensure_ascii=False,
+            ),
+            encoding="utf-8",
+        )
+        rotate()
+        return path
+
+
+def rotate(directory: Optional[Path] = None, keep: Optional[int] = None) -> None:
+    """Ne conserve que les `keep` profils les plus récents.
+
+    Arguments:
+        directory (Optional[Path]): Le répertoire des profils (par défaut `PROFILING_DIR`).
+        keep (Optional[int]): Nombre de profils conservés (par défaut `PROFILING_KEEP`).
+
+    """
+    directory = PROFILING_DIR if directory is None else directory
+    keep = PROFILING_KEEP if keep is None else keep
+    profiles = sorted(directory.glob("*.profile.json"), key=lambda p: p.stat().st_mtime)
+    for old in profiles[: max(0, len(profiles) - keep)]:
+        old.unlink(missing_ok=True)
+        Path(str(old).removesuffix(".profile.json") + ".tracemalloc").unlink(missing_ok=True)
+
+
+def summarize(path: Path, top: int = 20) -> str:
+    """Résume un profil : frames les plus coûteuses et principales allocations.
+
+    Arguments:
+        path (Path): Le fichier `.profile.json`.
+        top (int): Nombre de lignes par tableau.
+
+    Returns:
+        str: Le résumé, prêt à afficher.
+
+    """
+    data = json.loads(path.read_text(encoding="utf-8"))
+    self_counts: Counter[str] = Counter()
+    total_counts: Counter[str] = Counter()
+    for stack, count in data["stacks"].items():
+        frames = stack.split(";")
+        self_counts[frames[-1]] += count
+        for frame in set(frames):
+            total_counts[frame] += count
+    samples = max(1, data["samples"])
+
+    lines = [
+        f"{data['method']} {data['route'] or data['path']} -> {data['status']} "
+        f"en {data['duration'] * 1000:.1f} ms, {data['samples']} échantillons, "
+        f"pic mémoire {data['memory_peak'] / 1e6:.1f} Mo",
+        "",
+        f"{'propre':>8} {'cumulé':>8}  frame",
+    ]
+    for frame, count in self_counts.most_common(top):
+        lines.append(f"{count / samples:>8.1%} {total_counts[frame] / samples:>8.1%}  {frame}")
+    lines += ["", f"{'cumulé':>8}  frame"]
+    for frame, count in total_counts.most_common(top):
+        lines.append(f"{count / samples:>8.1%}  {frame}")
+
+    snapshot_path = Path(str(path).removesuffix(".profile.json") + ".tracemalloc")
+    if snapshot_path.exists():
+        snapshot = tracemalloc.Snapshot.load(str(snapshot_path))
+        lines += ["", "Mémoire allouée pendant la requête et encore vivante :"]
+        for stat in snapshot.statistics("lineno")[:top]:
+            frame = stat.traceback[0]
+            lines.append(f"{stat.size / 1024:>10.1f} Kio {stat.count:>7}  {frame.filename}:{frame.lineno}")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    """Point d'entrée de la ligne de commande."""
+    parser = argparse.ArgumentParser(description="Profils de requêtes enregistrés.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="Lister les profils, du plus récent au plus ancien")
+    summary = commands.add_parser("summary", help="Résumer un profil")
+    summary.add_argument("path", type=Path)
+    summary.add_argument("--top", type=int, default=20)
+    options = parser.parse_args()
+    settings = Settings.from_env()
+    configure(settings.profiling_dir, settings.profiling_keep)
+
+    if options.command == "list":
+        profiles = sorted(PROFILING_DIR.glob("*.profile.json"), key=lambda p: -p.stat().st_mtime)
+        for profile in profiles:
+            data = json.loads(profile.read_text(encoding="utf-8"))
+            print(f"{profile}  {data['duration'] * 1000:>8.1f} ms  {data['method']} {data['path']}")
+    else:
+        print(summarize(options.path, options.top))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""Instrumentation des requêtes SQL : nombre, durée et requêtes répétées par requête HTTP.
+
+Les événements `before_cursor_execute` / `after_cursor_execute` du moteur
+mesurent chaque instruction. Les totaux alimentent les métriques globales et,
+pendant une requête HTTP, l'objet `QueryStats` placé dans une `ContextVar` par
+`app.middleware.queries` (le contexte est copié vers le pool de threads des
+routes et dépendances synchrones).
+
+Mode développement (`SQL_DEBUG`, voir `configure`) : une même instruction
+exécutée `SQL_REPEAT_THRESHOLD` fois dans une requête signale un probable N+1.
+    - "warn" : avertissement dans les logs ;
+    - "raise" : `RepeatedQueryError`, la requête échoue.
+"""
+
+import heapq
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.services.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+SQL_DEBUG = "off"
+REPEAT_THRESHOLD = 5
+SLOWEST_KEPT = 3
+
+db_queries = registry.counter(
+    "db_queries_total",
+    "Instructions SQL exécutées.",
+)
+db_query_duration = registry.histogram(
+    "db_query_duration_seconds",
+    "Durée des instructions SQL.",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0),
+)
+db_queries_per_request = registry.histogram(
+    "db_queries_per_request",
+    "Nombre d'instructions SQL par requête HTTP.",
+    ("route",),
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+db_time_per_request = registry.histogram(
+    "db_time_per_request_seconds",
+    "Temps passé dans la base par requête HTTP.",
+    ("route",),
+)
+db_repeated_queries = registry.counter(
+    "db_repeated_queries_total",
+    "Requêtes HTTP ayant répété une même instruction (N+1 probable).",
+    ("route",),
+)
+
+
+class RepeatedQueryError(RuntimeError):
+    """Levée en mode "raise" lorsqu'une instruction est répétée dans une requête."""
+
+
+class QueryStats:
+    """Statistiques SQL d'une requête HTTP.
+
+    Attributs :
+        count (int) : Nombre d'instructions exécutées.
+        total_time (float) : Temps total passé dans la base, en secondes.
+        statements (Counter) : Nombre d'exécutions par instruction.
+        slowest (list[tuple[float, str]]) : Les instructions les plus lentes (tas).
+        repeated (set[str]) : Les instructions ayant atteint le seuil de répétition.
+    """
+
+    __slots__ = ("count", "total_time", "statements", "slowest", "repeated")
+
+    def __init__(self) -> None:
+        """Initialise des statistiques vides."""
+        self.count = 0
+        self.total_time = 0.0
+        self.statements: Counter[str] = Counter()
+        self.slowest: list[tuple[float, str]] = []
+        self.repeated: set[str] = set()
+
+    def record(self, statement: str, duration: float) -> bool:
+        """Enregistre une instruction exécutée.
+
+        Arguments:
+            statement (str): L'instruction SQL (paramétrée).
+            duration (float): Sa durée, en secondes.
+
+        Returns:
+            bool: True si l'instruction vient d'atteindre le seuil de répétition.
+
+        """
+        self.count += 1
+        self.total_time += duration
+        self.statements[statement] += 1
+        if len(self.slowest) < SLOWEST_KEPT:
+            heapq.heappush(self.slowest, (duration, statement))
+        else:
+            heapq.heappushpop(self.slowest, (duration, statement))
+        if self.statements[statement] == REPEAT_THRESHOLD:
+            self.repeated.add(statement)
+            return True
+        return False
+
+    def slowest_first(self) -> list[tuple[float, str]]:
+        """Retourne les instructions les plus lentes, de la plus lente à la moins lente."""
+        return sorted(self.slowest, reverse=True)
+
+
+current_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_stats", default=None)
+
+
+def _shorten(statement: str, limit: int = 200) -> str:
+    """Réduit une instruction SQL à une ligne pour les logs."""
+    text = " ".join(statement.split())
+    return text if len(text) <= limit else text[: limit - 1] + "…"
+
+
+def _before_cursor_execute(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+    """Mémorise l'instant de début de l'instruction."""
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+    """Enregistre la durée de l'instruction dans les métriques et la requête courante.
+
+    Raises:
+        RepeatedQueryError: En mode "raise", si l'instruction atteint le seuil de répétition.
+
+    """
+    duration = time.perf_counter() - conn.info["query_start"].pop()
+    db_queries.inc()
+    db_query_duration.observe(duration)
+
+    stats = current_stats.get()
+    if stats is None or not stats.record(statement, duration) or SQL_DEBUG == "off":
+        return
+    message = f"Instruction SQL répétée {REPEAT_THRESHOLD} fois (N+1 probable) : {_shorten(statement)}"
+    if SQL_DEBUG == "raise":
+        raise RepeatedQueryError(message)
+    logger.warning(message)
+
+
+def configure(mode: str, repeat_threshold: int) -> None:
+    """Règle la détection des instructions répétées.
+
+    Arguments:
+        mode (str): "off", "warn" ou "raise".
+        repeat_threshold (int): Nombre de répétitions signalant un N+1.
+
+    """
+    global SQL_DEBUG, REPEAT_THRESHOLD
+    SQL_DEBUG = mode
+    REPEAT_THRESHOLD = repeat_threshold
+
+
+def instrument(engine: Engine) -> None:
+    """Branche l'instrumentation sur un moteur SQLAlchemy.
+
+    Arguments:
+        engine (Engine): Le moteur à instrumenter.
+
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def report(stats: QueryStats, method: str, route: str) -> None:
+    """Publie les totaux d'une requête HTTP dans les métriques et les logs.
+
+    Arguments:
+        stats (QueryStats): Les statistiques de la requête.
+        method (str): La méthode HTTP.
+        route (str): Le gabarit de la route.
+
+    """
+    db_queries_per_request.observe(stats.count, (route,))
+    db_time_per_request.observe(stats.total_time, (route,))
+    if stats.repeated:
+        db_repeated_queries.inc(labels=(route,))
+    if not stats.count:
+        return
+    logger.info(
+        "%s %s : %d instructions SQL, %.1f ms dans la base",
+        method,
+        route,
+        stats.count,
+        stats.total_time * 1000,
+    )
+    if logger.isEnabledFor(logging.DEBUG):
+        for duration, statement in stats.slowest_first():
+            logger.debug("  %.2f ms  %s", duration * 1000, _shorten(statement))
@@ -0,0 +1,477 @@
+"""Index de recherche en mémoire (trigrammes) sur les entrées déchiffrées du coffre.
+
+Un index par utilisateur est construit à partir des champs déchiffrés (titre,
+nom d'utilisateur, URL, e-mail) à l'ouverture du coffre, puis tenu à jour à
+chaque création, modification ou suppression. Il porte la révision du coffre
+qu'il reflète : si une autre voie (autre worker, autre processus) a modifié le
+coffre, la révision ne correspond plus et l'index est reconstruit à la
+prochaine recherche.
+
+Les index d'une application sont dans `app.state.search_indexes` (créé par
+`create_app`). Ils contiennent des données en clair : ils ne vivent qu'en
+mémoire, sont supprimés à la déconnexion, au verrouillage, quand le trousseau
+oublie la clé du coffre, après `SEARCH_INDEX_IDLE_SECONDS` sans utilisation
+et, au-delà de `SEARCH_INDEX_MAX`, du moins récemment utilisé au plus récent.
+
+Recherche : l'ordre des résultats est fixé par le champ trouvé (titre
+d'abord), puis la correspondance en début de mot, puis la longueur du champ.
+Chaque champ a ses propres listes de clés (trigrammes et débuts de mots d'un à
+trois caractères), triées par (longueur du champ, id) : pour chaque champ, la
+liste la plus courte parmi les clés de la requête est parcourue dans cet ordre
+et chaque candidat vérifié sur le texte, jusqu'à `limit` résultats. Une requête
+très fréquente (« com ») s'arrête donc après quelques dizaines de candidats au
+lieu de classer tout le coffre. Les requêtes d'un ou deux caractères ne
+cherchent qu'en début de mot.
+"""
+
+import re
+import threading
+import time
+import unicodedata
+import weakref
+from bisect import bisect_left, insort
+from collections import OrderedDict, defaultdict
+from collections.abc import Callable, Iterable, Mapping
+from typing import Optional
+
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.models.user import User
+from app.models.views import list_password_views
+from app.services.metrics import registry
+
+# Champs indexés, par ordre de priorité dans le classement
+SEARCH_FIELDS = ("title", "username", "url", "email")
+MAX_QUERY_LENGTH = 100
+# Position d'un début de mot : caractère alphanumérique non précédé d'un autre
+WORD_START = re.compile(r"(?<![^\W_])(?=[^\W_])")
+
+
+def normalize(text: str) -> str:
+    """Normalise un texte pour la recherche : minuscules, sans accents.
+
+    Arguments:
+        text (str): Le texte.
+
+    Returns:
+        str: Le texte normalisé.
+
+    """
+    if text.isascii():
+        return text.lower()
+    text = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(char for char in text if not unicodedata.combining(char))
+
+
+def grams(text: str) -> set[str]:
+    """Retourne les clés d'index d'un texte normalisé.
+
+    Trigrammes du texte, plus les préfixes d'un à trois caractères de chaque
+    mot (préfixés de "^").
+
+    Arguments:
+        text (str): Le texte normalisé.
+
+    Returns:
+        set[str]: Les clés d'index.
+
+    """
+    keys = {text[i : i + 3] for i in range(len(text) - 2)}
+    for match in WORD_START.finditer(text):
+        i = match.start()
+        keys.update(("^" + text[i], "^" + text[i : i + 2], "^" + text[i : i + 3]))
+    return keys
+
+
+def at_word_start(text: str, query: str) -> bool:
+    """Indique si la requête apparaît en début de mot dans le texte.
+
+    Arguments:
+        text (str): Le texte normalisé.
+        query (str): La requête normalisée.
+
+    Returns:
+        bool: True si une occurrence commence un mot.
+
+    """
+    position = text.find(query)
+    while position >= 0:
+        if position == 0 or not text[position - 1].isalnum():
+            return True
+        position = text.find(query, position + 1)
+    return False
+
+
+class TrigramIndex:
+    """Index des entrées d'un coffre.
+
+    Attributs :
+        revision (int) : La révision du coffre reflétée par l'index.
+        last_used (float) : Dernière utilisation (horloge monotone).
+    """
+
+    def __init__(self, revision: int) -> None:
+        """Initialise un index vide.
+
+        Arguments:
+            revision (int): La révision du coffre.
+
+        """
+        self.revision = revision
+        self.last_used = time.monotonic()
+        # id -> champs normalisés, dans l'ordre de SEARCH_FIELDS
+        self._documents: dict[int, tuple[str, ...]] = {}
+        # Par champ : clé -> ids triés par (longueur du champ, id)
+        self._postings: tuple[dict[str, list[int]], ...] = tuple({} for _ in SEARCH_FIELDS)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Nombre d'entrées indexées."""
+        return len(self._documents)
+
+    def _order(self, rank: int) -> Callable[[int], tuple[int, int]]:
+        """Clé de tri des listes d'un champ : (longueur du champ, id)."""
+        documents = self._documents
+        return lambda entry_id: (len(documents[entry_id][rank]), entry_id)
+
+    def _add(self, entry_id: int, fields: Mapping[str, Optional[str]]) -> None:
+        """Indexe une entrée (verrou déjà pris)."""
+        document = tuple(normalize(fields.get(field) or "") for field in SEARCH_FIELDS)
+        self._documents[entry_id] = document
+        for rank, text in enumerate(document):
+            order = self._order(rank)
+            postings = self._postings[rank]
+            for key in grams(text):
+                insort(postings.setdefault(key, []), entry_id, key=order)
+
+    def _remove(self, entry_id: int) -> None:
+        """Retire une entrée de l'index (verrou déjà pris)."""
+        document = self._documents.get(entry_id)
+        if document is None:
+            return
+        for rank, text in enumerate(document):
+            order = self._order(rank)
+            postings = self._postings[rank]
+            position = (len(text), entry_id)
+            for key in grams(text):
+                posting = postings[key]
+                del posting[bisect_left(posting, position, key=order)]
+                if not posting:
+                    del postings[key]
+        del self._documents[entry_id]
+
+    def add_many(self, entries: Iterable[tuple[int, Mapping[str, Optional[str]]]]) -> None:
+        """Indexe plusieurs entrées.
+
+        Sur un index vide, les listes sont remplies dans l'ordre de tri, sans
+        insertion triée.
+
+        Arguments:
+            entries (Iterable[tuple[int, Mapping[str, Optional[str]]]]): Les couples (id, champs en clair).
+
+        """
+        with self._lock:
+            if self._documents:
+                for entry_id, fields in entries:
+                    self._add(entry_id, fields)
+                return
+            documents = self._documents
+            for entry_id, fields in entries:
+                documents[entry_id] = tuple(normalize(fields.get(field) or "") for field in SEARCH_FIELDS)
+            built = []
+            for rank in range(len(SEARCH_FIELDS)):
+                postings: defaultdict[str, list[int]] = defaultdict(list)
+                for entry_id in sorted(documents, key=self._order(rank)):
+                    for key in grams(documents[entry_id][rank]):
+                        postings[key].append(entry_id)
+                built.append(dict(postings))
+            self._postings = tuple(built)
+
+    def update(self, entry_id: int, fields: Mapping[str, Optional[str]]) -> None:
+        """Met à jour une entrée ; les champs absents gardent leur valeur.
+
+        Arguments:
+            entry_id (int): L'identifiant de l'entrée.
+            fields (Mapping[str, Optional[str]]): Les champs modifiés, en clair.
+
+        """
+        with self._lock:
+            previous = dict(zip(SEARCH_FIELDS, self._documents.get(entry_id, ())))
+            self._remove(entry_id)
+            self._add(entry_id, {**previous, **fields})
+
+    def remove(self, entry_id: int) -> None:
+        """Retire une entrée.
+
+        Arguments:
+            entry_id (int): L'identifiant de l'entrée.
+
+        """
+        with self._lock:
+            self._remove(entry_id)
+
+    def search(self, query: str, limit: int = 20) -> list[int]:
+        """Recherche les entrées contenant la requête dans un champ indexé.
+
+        Arguments:
+            query (str): Le texte recherché.
+            limit (int): Nombre maximal de résultats.
+
+        Returns:
+            list[int]: Les identifiants, du plus pertinent au moins pertinent.
+
+        """
+        query = normalize(query.strip())[:MAX_QUERY_LENGTH]
+        if not query or limit < 1:
+            return []
+        self.last_used = time.monotonic()
+        trigrams = [query[i : i + 3] for i in range(len(query) - 2)]
+        results: list[int] = []
+        seen: set[int] = set()
+        with self._lock:
+            documents = self._documents
+            for rank, field_postings in enumerate(self._postings):
+                # Débuts de mots d'abord, puis (trois caractères ou plus) le reste du champ
+                for word_start in (True, False) if trigrams else (True,):
+                    keys = trigrams + ["^" + query[:3]] if word_start else trigrams
+                    postings = [field_postings.get(key) for key in keys]
+                    if not all(postings):
+                        continue
+                    for entry_id in min(postings, key=len):
+                        if entry_id in seen:
+                            continue
+                        text = documents[entry_id][rank]
+                        if at_word_start(text, query) if word_start else query in text:
+                            results.append(entry_id)
+                            if len(results) >= limit:
+                                return results
+                            seen.add(entry_id)
+        return results
+
+
+class SearchIndexes:
+    """Index des coffres ouverts, par utilisateur, bornés en nombre et en durée d'inactivité.
+
+    Attributs :
+        idle_timeout (float) : Durée d'inactivité avant suppression, en secondes.
+        max_indexes (int) : Nombre maximal d'index conservés.
+    """
+
+    def __init__(self, idle_timeout: float = 900.0, max_indexes: int = 200) -> None:
+        """Initialise un registre vide.
+
+        Arguments:
+            idle_timeout (float): Durée d'inactivité avant suppression, en secondes.
+            max_indexes (int): Nombre maximal d'index conservés.
+
+        """
+        self.idle_timeout = idle_timeout
+        self.max_indexes = max_indexes
+        self._indexes: OrderedDict[int, TrigramIndex] = OrderedDict()
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.evictions = 0
+        _registries.add(self)
+
+    def _purge(self) -> None:
+        """Supprime les index inactifs puis les plus anciens au-delà de la capacité (verrou pris)."""
+        now = time.monotonic()
+        for user_id in [user_id for user_id, index in self._indexes.items() if now - index.last_used > self.idle_timeout]:
+            del self._indexes[user_id]
+            self.evictions += 1
+        while len(self._indexes) > self.max_indexes:
+            self._indexes.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, user_id: int, revision: int) -> Optional[TrigramIndex]:
+        """Retourne l'index d'un utilisateur s'il reflète la révision donnée.
+
+        Arguments:
+            user_id (int): L'utilisateur.
+            revision (int): La révision courante du coffre.
+
+        Returns:
+            Optional[TrigramIndex]: L'index, ou None s'il est absent ou périmé.
+
+        """
+        with self._lock:
+            self._purge()
+            index = self._indexes.get(user_id)
+            if index is None or index.revision != revision:
+                return None
+            self._indexes.move_to_end(user_id)
+            return index
+
+    def build(
+        self,
+        user_id: int,
+        revision: int,
+        entries: Iterable[tuple[int, Mapping[str, Optional[str]]]],
+    ) -> TrigramIndex:
+        """Construit et enregistre l'index d'un utilisateur.
+
+        Arguments:
+            user_id (int): L'utilisateur.
+            revision (int): La révision du coffre reflétée.
+            entries (Iterable[tuple[int, Mapping[str, Optional[str]]]]): Les entrées en clair.
+
+        Returns:
+            TrigramIndex: Le nouvel index.
+
+        """
+        index = TrigramIndex(revision)
+        index.add_many(entries)
+        with self._lock:
+            self._indexes[user_id] = index
+            self._indexes.move_to_end(user_id)
+            self.builds += 1
+            self._purge()
+        return index
+
+    def mutate(self, user_id: int, old_revision: int, new_revision: int) -> Optional[TrigramIndex]:
+        """Retourne l'index à modifier après une mutation du coffre, et le passe à la nouvelle révision.
+
+        Si l'index ne reflétait pas la révision précédant la mutation, il est
+        supprimé : il sera reconstruit à la prochaine recherche.
+
+        Arguments:
+            user_id (int): L'utilisateur.
+            old_revision (int): La révision avant la mutation.
+            new_revision (int): La révision après la mutation.
+
+        Returns:
+            Optional[TrigramIndex]: L'index à mettre à jour, ou None.
+
+        """
+        with self._lock:
+            index = self._indexes.get(user_id)
+            if index is None:
+                return None
+            if index.revision != old_revision:
+                del self._indexes[user_id]
+                return None
+            index.revision = new_revision
+            return index
+
+    def evict(self, user_id: int) -> None:
+        """Supprime l'index d'un utilisateur (déconnexion, verrouillage, clé oubliée du trousseau).
+
+        Arguments:
+            user_id (int): L'utilisateur.
+
+        """
+        with self._lock:
+            if self._indexes.pop(user_id, None) is not None:
+                self.evictions += 1
+
+    def stats(self) -> dict[str, int]:
+        """Retourne le nombre d'index, d'entrées indexées, de constructions et de suppressions.
+
+        Returns:
+            dict[str, int]: Les compteurs.
+
+        """
+        with self._lock:
+            return {
+                "indexes": len(self._indexes),
+                "entries": sum(len(index) for index in self._indexes.values()),
+                "builds": self.builds,
+                "evictions": self.evictions,
+            }
+
+
+# Registres des applications du processus, pour les métriques
+_registries: "weakref.WeakSet[SearchIndexes]" = weakref.WeakSet()
+
+
+def _total(counter: str) -> int:
+    """Additionne un compteur de `SearchIndexes.stats` sur les registres du processus."""
+    return sum(indexes.stats()[counter] for indexes in list(_registries))
+
+
+registry.gauge(
+    "search_indexes",
+    "Index de recherche en mémoire (coffres ouverts).",
+    function=lambda: _total("indexes"),
+)
+registry.gauge(
+    "search_index_entries",
+    "Entrées indexées, tous coffres confondus.",
+    function=lambda: _total("entries"),
+)
+registry.counter(
+    "search_index_builds_total",
+    "Constructions complètes d'un index de recherche.",
+    function=lambda: _total("builds"),
+)
+
+
+def ensure_index(indexes: SearchIndexes, db: Session, user: User, aes_key: bytes) -> TrigramIndex:
+    """Retourne l'index à jour du coffre d'un utilisateur, en le construisant si besoin.
+
+    Arguments:
+        indexes (SearchIndexes): Le registre d'index de l'application.
+        db (Session): Session de base de données.
+        user (User): L'utilisateur.
+        aes_key (bytes): La clé du coffre.
+
+    Returns:
+        TrigramIndex: L'index reflétant la révision courante du coffre.
+
+    """
+    revision = user.vault_revision
+    index = indexes.get(user.id, revision)
+    if index is None:
+        views = list_password_views(db, user.id, aes_key, SEARCH_FIELDS)
+        index = indexes.build(user.id, revision, ((view.id, view.as_dict(SEARCH_FIELDS)) for view in views))
+    return index
+
+
+def build_after_unlock(
+    indexes: SearchIndexes,
+    session_factory: sessionmaker,
+    user_id: int,
+    aes_key: bytes,
+) -> None:
+    """Construit l'index d'un coffre qui vient d'être ouvert (tâche de fond après la réponse).
+
+    Arguments:
+        indexes (SearchIndexes): Le registre d'index de l'application.
+        session_factory (sessionmaker): La fabrique de sessions de l'application.
+        user_id (int): L'utilisateur.
+        aes_key (bytes): La clé du coffre.
+
+    """
+    db = session_factory()
+    try:
+        user = db.get(User, user_id)
+        if user is not None:
+            ensure_index(indexes, db, user, aes_key)
+    finally:
+        db.close()
+
+
+def record_changes(
+    indexes: SearchIndexes,
+    user_id: int,
+    old_revision: int,
+    upserts: Iterable[tuple[int, Mapping[str, Optional[str]]]] = (),
+    deletions: Iterable[int] = (),
+) -> None:
+    """Reporte dans l'index une mutation du coffre déjà enregistrée (une révision de plus).
+
+    Arguments:
+        indexes (SearchIndexes): Le registre d'index de l'application.
+        user_id (int): L'utilisateur.
+        old_revision (int): La révision lue avant la mutation.
+        upserts (Iterable[tuple[int, Mapping[str, Optional[str]]]]): Entrées créées ou modifiées (champs en clair).
+        deletions (Iterable[int]): Entrées supprimées.
+
+    """
+    index = indexes.mutate(user_id, old_revision, old_revision + 1)
+    if index is None:
+        return
+    for entry_id, fields in upserts:
+        index.update(entry_id, {field: value for field, value in fields.items() if field in SEARCH_FIELDS})
+    for entry_id in deletions:
+        index.remove(entry_id)
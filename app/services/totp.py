@@ -4,7 +4,8 @@ from base64 import b64encode
 from io import BytesIO
 
 import pyotp
-import qrcode
+
+from app.services.metrics import auth_attempts
 
 
 def generate_totp_secret() -> str:
@@ -32,6 +33,9 @@ def generate_qr_code(secret: str, username: str) -> str:
         str: Le code QR encodé en base64.
 
     """
+    # qrcode (et PIL) ne sont chargés qu'à l'inscription, pas au démarrage
+    import qrcode
+
     totp_uri = f"otpauth://totp/{username}?secret={secret}&issuer=MyApp"
     img = qrcode.make(totp_uri)
     buffer = BytesIO()
@@ -52,4 +56,6 @@ def verify_totp(secret: str, code: str) -> bool:
 
     """
     totp = pyotp.TOTP(secret)
-    return totp.verify(code)
+    valid = totp.verify(code)
+    auth_attempts.inc(labels=("totp", "success" if valid else "failure"))
+    return valid
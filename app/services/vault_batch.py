@@ -0,0 +1,147 @@
+"""Application d'un lot de créations, modifications et suppressions d'entrées.
+
+Le lot entier coûte une requête de vérification de propriété, un appel de
+chiffrement groupé (`PasswordAESEncryption.encrypt_many`), une insertion
+groupée, les mises à jour et suppressions regroupées par SQLAlchemy au
+`flush`, une seule incrémentation de la révision et un seul commit.
+"""
+
+from typing import Any
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.dto.passwords import BatchAdd, BatchDelete, BatchOperation, BatchUpdate
+from app.models import PasswordEntry
+from app.models.user import User
+from app.services import autofill, password_utils, search_index
+from app.services.crypto import PasswordAESEncryption
+
+# Ordre des champs chiffrés d'une création
+ADD_FIELDS = ("title", "username", "email", "url", "password")
+
+
+def _check(operations: list[BatchOperation], owned: dict[int, PasswordEntry]) -> list[dict[str, Any]]:
+    """Valide chaque opération, sans rien modifier.
+
+    Arguments:
+        operations (list[BatchOperation]): Les opérations du lot.
+        owned (dict[int, PasswordEntry]): Les entrées visées appartenant à l'utilisateur.
+
+    Returns:
+        list[dict[str, Any]]: Un résultat par opération (statut 404 ou 409 en cas d'échec).
+
+    """
+    results = []
+    deleted: set[int] = set()
+    for index, operation in enumerate(operations):
+        result: dict[str, Any] = {"index": index, "op": operation.op, "id": getattr(operation, "id", None)}
+        if isinstance(operation, BatchAdd):
+            result["status"] = 201
+        elif operation.id not in owned:
+            result.update(status=404, detail="Entrée de mot de passe introuvable")
+        elif operation.id in deleted:
+            result.update(status=409, detail="Entrée déjà supprimée par une opération précédente du lot")
+        elif isinstance(operation, BatchDelete):
+            deleted.add(operation.id)
+            result["status"] = 204
+        else:
+            result["status"] = 200
+        results.append(result)
+    return results
+
+
+def apply_batch(
+    indexes: search_index.SearchIndexes,
+    db: Session,
+    user: User,
+    aes_key: bytes,
+    operations: list[BatchOperation],
+    atomic: bool = True,
+) -> tuple[bool, list[dict[str, Any]]]:
+    """Applique un lot d'opérations sur le coffre d'un utilisateur, en une transaction.
+
+    Arguments:
+        indexes (SearchIndexes): Le registre d'index de recherche de l'application.
+        db (Session): Session de base de données.
+        user (User): Le propriétaire du coffre.
+        aes_key (bytes): La clé AES du coffre.
+        operations (list[BatchOperation]): Les opérations, dans l'ordre.
+        atomic (bool): Si une opération échoue, n'en appliquer aucune.
+
+    Returns:
+        tuple[bool, list[dict[str, Any]]]: Si le lot a été enregistré, et un résultat par opération.
+
+    """
+    targets = {operation.id for operation in operations if not isinstance(operation, BatchAdd)}
+    owned = {}
+    if targets:
+        # Une seule requête vérifie la propriété de toutes les entrées visées
+        entries = db.query(PasswordEntry).filter(
+            PasswordEntry.user_id == user.id,
+            PasswordEntry.id.in_(targets),
+        )
+        owned = {entry.id: entry for entry in entries}
+
+    results = _check(operations, owned)
+    if atomic and any(result["status"] >= 400 for result in results):
+        for result in results:
+            if result["status"] < 400:
+                result.update(status=424, detail="Lot annulé : une autre opération a échoué")
+        return False, results
+
+    valid = [(operation, result) for operation, result in zip(operations, results) if result["status"] < 400]
+    if not valid:
+        return False, results
+
+    # Toutes les valeurs à chiffrer du lot, en un seul appel
+    plaintexts: list[str] = []
+    for operation, _ in valid:
+        if isinstance(operation, BatchAdd):
+            plaintexts.extend(getattr(operation.data, field) for field in ADD_FIELDS)
+        elif isinstance(operation, BatchUpdate):
+            plaintexts.extend(operation.data.model_dump(exclude_none=True).values())
+    ciphertexts = iter(PasswordAESEncryption.encrypt_many(plaintexts, aes_key))
+
+    domain_key = PasswordAESEncryption.derive_domain_key(aes_key)
+    rows, added = [], []
+    upserts, deletions = [], []
+    for operation, result in valid:
+        if isinstance(operation, BatchAdd):
+            row = {PasswordEntry.ENCRYPTED_FIELDS[field]: next(ciphertexts) for field in ADD_FIELDS}
+            row["complexity"] = password_utils.calculate_password_strength(operation.data.password)
+            row["domain_tag"] = autofill.url_tag(operation.data.url, domain_key)
+            row["user_id"] = user.id
+            rows.append(row)
+            added.append((result, operation.data.model_dump()))
+            result["complexity"] = row["complexity"]
+        elif isinstance(operation, BatchUpdate):
+            entry = owned[operation.id]
+            values = operation.data.model_dump(exclude_none=True)
+            for field in values:
+                setattr(entry, PasswordEntry.ENCRYPTED_FIELDS[field], next(ciphertexts))
+            if "password" in values:
+                entry.complexity = password_utils.calculate_password_strength(values["password"])
+            if "url" in values:
+                entry.domain_tag = autofill.url_tag(values["url"], domain_key)
+            result["complexity"] = entry.complexity
+            upserts.append((operation.id, values))
+        else:
+            db.delete(owned[operation.id])
+            deletions.append(operation.id)
+
+    if rows:
+        # Une seule instruction INSERT ; les identifiants reviennent dans l'ordre des lignes
+        ids = db.scalars(
+            insert(PasswordEntry).returning(PasswordEntry.id, sort_by_parameter_order=True),
+            rows,
+        ).all()
+        for (result, values), entry_id in zip(added, ids):
+            result["id"] = entry_id
+            upserts.append((entry_id, values))
+
+    revision = user.vault_revision
+    user.bump_revision()
+    db.commit()
+    search_index.record_changes(indexes, user.id, revision, upserts, deletions)
+    return True, results
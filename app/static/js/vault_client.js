@@ -0,0 +1,91 @@
+// Déchiffrement du coffre dans le navigateur (mode client du tableau de bord).
+//
+// 1. Le navigateur génère une paire ECDH P-256 et envoie sa clé publique à
+//    /api/v1/client-key ; le serveur renvoie la clé du coffre enveloppée (AES-KW)
+//    avec une clé dérivée par HKDF-SHA256 du secret ECDH.
+// 2. La clé est désenveloppée en CryptoKey AES-CBC NON exportable (le JavaScript
+//    de la page ne voit jamais ses octets) et gardée en mémoire de la page
+//    seulement : rien ne survit au verrouillage, à la déconnexion ni à l'onglet.
+// 3. Chaque champ `data-ct` (base64(IV || AES-256-CBC)) est déchiffré localement.
+(() => {
+  const ECDH = { name: "ECDH", namedCurve: "P-256" };
+
+  const b64ToBytes = (value) => Uint8Array.from(atob(value), (c) => c.charCodeAt(0));
+  const bytesToB64 = (bytes) => btoa(String.fromCharCode(...new Uint8Array(bytes)));
+
+  // Désenveloppe la clé du coffre renvoyée par /api/v1/client-key (voir
+  // `client_crypto.unwrap_vault_key`, l'implémentation de référence en Python).
+  async function unwrapVaultKey(privateKey, payload, extractable = false) {
+    const serverKey = await crypto.subtle.importKey(
+      "raw", b64ToBytes(payload.server_public_key), ECDH, false, [],
+    );
+    const shared = await crypto.subtle.deriveBits({ name: "ECDH", public: serverKey }, privateKey, 256);
+    const hkdfKey = await crypto.subtle.importKey("raw", shared, "HKDF", false, ["deriveKey"]);
+    const kek = await crypto.subtle.deriveKey(
+      {
+        name: "HKDF",
+        hash: "SHA-256",
+        salt: b64ToBytes(payload.salt),
+        info: new TextEncoder().encode(payload.info),
+      },
+      hkdfKey,
+      { name: "AES-KW", length: 256 },
+      false,
+      ["unwrapKey"],
+    );
+    return crypto.subtle.unwrapKey(
+      "raw", b64ToBytes(payload.wrapped_key), kek, "AES-KW", "AES-CBC", extractable, ["decrypt"],
+    );
+  }
+
+  async function decryptField(key, ciphertext) {
+    if (!ciphertext) return "";
+    const data = b64ToBytes(ciphertext);
+    const plain = await crypto.subtle.decrypt({ name: "AES-CBC", iv: data.slice(0, 16) }, key, data.slice(16));
+    return new TextDecoder().decode(plain);
+  }
+
+  if (typeof document === "undefined") {
+    // Node (tests/js/verify_client_vectors.js) : seules les primitives sont utilisées
+    module.exports = { ECDH, b64ToBytes, unwrapVaultKey, decryptField };
+    return;
+  }
+
+  // Les versions précédentes gardaient la clé dans IndexedDB : on l'efface
+  if (window.indexedDB) indexedDB.deleteDatabase("password-vault");
+
+  async function fetchVaultKey() {
+    const pair = await crypto.subtle.generateKey(ECDH, false, ["deriveBits"]);
+    const publicKey = await crypto.subtle.exportKey("raw", pair.publicKey);
+    const response = await fetch("/api/v1/client-key", {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      credentials: "same-origin",
+      body: JSON.stringify({ public_key: bytesToB64(publicKey) }),
+    });
+    if (!response.ok) throw new Error(`client-key : HTTP ${response.status}`);
+    return unwrapVaultKey(pair.privateKey, await response.json());
+  }
+
+  function show(element, value) {
+    element.dataset.value = value;
+    if (element.tagName === "INPUT") {
+      element.value = value;
+    } else if (element.tagName === "A") {
+      element.href = value;
+      element.classList.toggle("hidden", !value);
+    } else {
+      element.textContent = value || "—";
+    }
+    element.removeAttribute("data-ct");
+  }
+
+  async function decryptAll(key) {
+    const elements = [...document.querySelectorAll("[data-ct]")];
+    const values = await Promise.all(elements.map((el) => decryptField(key, el.dataset.ct)));
+    elements.forEach((el, i) => show(el, values[i]));
+  }
+
+  (async () => decryptAll(await fetchVaultKey()))()
+    .catch((error) => console.error("Déchiffrement local impossible", error));
+})();
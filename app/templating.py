@@ -0,0 +1,107 @@
+"""Environnement Jinja partagé par toute l'application.
+
+Un seul environnement compile et met en cache les templates pour tout le
+processus. Le bytecode compilé est conservé sur disque entre deux démarrages
+et tous les templates sont précompilés au lancement de l'application.
+"""
+
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+from starlette.background import BackgroundTask
+from starlette.requests import Request
+from starlette.responses import StreamingResponse
+from starlette.templating import Jinja2Templates
+
+TEMPLATES_DIR = Path(__file__).resolve().parent / "templates"
+# Taille minimale des blocs envoyés lors d'un rendu en flux
+STREAM_CHUNK_SIZE = 16 * 1024
+
+# Sans répertoire configuré, Jinja utilise un dossier privé dans le répertoire temporaire
+environment = Environment(
+    loader=FileSystemLoader(TEMPLATES_DIR),
+    autoescape=True,
+    bytecode_cache=FileSystemBytecodeCache(),
+)
+templates = Jinja2Templates(env=environment)
+
+
+def configure(bytecode_cache_dir: str | None) -> None:
+    """Choisit le répertoire du cache de bytecode, partagé par les workers.
+
+    Arguments:
+        bytecode_cache_dir (str | None): Le répertoire (None : répertoire temporaire privé).
+
+    """
+    if bytecode_cache_dir:
+        Path(bytecode_cache_dir).mkdir(parents=True, exist_ok=True)
+    environment.bytecode_cache = FileSystemBytecodeCache(bytecode_cache_dir)
+
+
+def warm_up() -> int:
+    """Précompile tous les templates de l'application.
+
+    Returns:
+        int: Le nombre de templates compilés.
+
+    """
+    names = environment.list_templates(filter_func=lambda name: name.endswith(".j2"))
+    for name in names:
+        environment.get_template(name)
+    return len(names)
+
+
+def _buffered(chunks: Iterator[str], size: int) -> Iterator[bytes]:
+    """Regroupe les fragments produits par Jinja en blocs d'au moins `size` octets.
+
+    Arguments:
+        chunks (Iterator[str]): Les fragments rendus par `Template.generate`.
+        size (int): Taille minimale d'un bloc.
+
+    Returns:
+        Iterator[bytes]: Les blocs encodés en UTF-8.
+
+    """
+    buffer: list[str] = []
+    buffered = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        buffered += len(chunk)
+        if buffered >= size:
+            yield "".join(buffer).encode()
+            buffer.clear()
+            buffered = 0
+    if buffer:
+        yield "".join(buffer).encode()
+
+
+def stream_template(
+    request: Request,
+    name: str,
+    context: dict[str, Any],
+    status_code: int = 200,
+    background: BackgroundTask | None = None,
+) -> StreamingResponse:
+    """Rend un template en flux, sans construire la page entière en mémoire.
+
+    Arguments:
+        request (Request): La requête HTTP.
+        name (str): Le nom du template.
+        context (dict[str, Any]): Le contexte du template.
+        status_code (int): Le code de statut HTTP.
+        background (BackgroundTask | None): Tâche à exécuter après l'envoi.
+
+    Returns:
+        StreamingResponse: La réponse HTML envoyée au fil du rendu.
+
+    """
+    context.setdefault("request", request)
+    template = environment.get_template(name)
+    return StreamingResponse(
+        _buffered(template.generate(context), STREAM_CHUNK_SIZE),
+        status_code=status_code,
+        media_type="text/html",
+        background=background,
+    )
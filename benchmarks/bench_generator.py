@@ -0,0 +1,80 @@
+"""Compare l'ancien pool par requête au service de génération persistant.
+
+Utilisation :
+    python -m benchmarks.bench_generator --counts 5 100 10000 200000
+"""
+
+import argparse
+import multiprocessing
+import time
+from collections.abc import Callable
+
+from app.services import password_utils
+from app.services.generator import PasswordGeneratorService
+
+ARGS = (16, True, True, True, True)
+
+
+def legacy_generate(count: int) -> list[str]:
+    """Reproduit l'ancien chemin : un pool créé puis détruit à chaque requête.
+
+    Arguments:
+        count (int): Nombre de mots de passe à générer.
+
+    Returns:
+        list[str]: Les mots de passe générés.
+
+    """
+    with multiprocessing.Pool(processes=multiprocessing.cpu_count()) as pool:
+        return pool.starmap(password_utils.generate_password, [ARGS] * count)
+
+
+def measure(func: Callable[[int], list[str]], count: int, repeat: int) -> float:
+    """Mesure la meilleure durée d'exécution de `func(count)`.
+
+    Arguments:
+        func (Callable[[int], list[str]]): La fonction de génération.
+        count (int): Nombre de mots de passe à générer.
+        repeat (int): Nombre de mesures.
+
+    Returns:
+        float: La meilleure durée, en secondes.
+
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(count)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    """Lance le benchmark et affiche un tableau des durées."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--counts", type=int, nargs="+", default=[5, 100, 10_000, 200_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    options = parser.parse_args()
+
+    service = PasswordGeneratorService()
+    try:
+        # Démarre le pool hors mesure, comme au premier gros lot en production
+        service.generate(service.inline_threshold + 1, *ARGS)
+
+        def service_generate(count: int) -> list[str]:
+            return service.generate(count, *ARGS)
+
+        print(f"{'nombre':>10} {'pool/requête (ms)':>20} {'service (ms)':>15} {'gain':>8}")
+        for count in options.counts:
+            legacy = measure(legacy_generate, count, options.repeat)
+            current = measure(service_generate, count, options.repeat)
+            print(
+                f"{count:>10} {legacy * 1000:>20.2f} {current * 1000:>15.2f}"
+                f" {legacy / current:>7.1f}x",
+            )
+    finally:
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
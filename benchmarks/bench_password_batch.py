@@ -0,0 +1,88 @@
+"""Mesure le débit du moteur par lots face à la génération mot de passe par mot de passe.
+
+Utilisation :
+    python -m benchmarks.bench_password_batch --count 1000000 --length 16
+"""
+
+import argparse
+import random
+import string
+import time
+from collections.abc import Callable
+
+from app.services import password_batch
+from app.services.password_utils import SPECIAL_CHARS
+
+
+def legacy_generate(count: int, length: int) -> list[str]:
+    """Reproduit l'ancienne génération : `random.choices` puis `random.sample`.
+
+    Arguments:
+        count (int): Nombre de mots de passe.
+        length (int): Longueur de chaque mot de passe.
+
+    Returns:
+        list[str]: Les mots de passe générés.
+
+    """
+    passwords = []
+    for _ in range(count):
+        password = "".join(
+            random.choices(string.ascii_letters + string.digits, k=length - 4),
+        )
+        password += "".join(random.choices(SPECIAL_CHARS, k=4))
+        passwords.append("".join(random.sample(password, len(password))))
+    return passwords
+
+
+def throughput(func: Callable[[], list[str]], count: int) -> float:
+    """Retourne le nombre de mots de passe générés par seconde.
+
+    Arguments:
+        func (Callable[[], list[str]]): La fonction de génération.
+        count (int): Nombre de mots de passe produits par un appel.
+
+    Returns:
+        float: Le débit, en mots de passe par seconde.
+
+    """
+    start = time.perf_counter()
+    func()
+    return count / (time.perf_counter() - start)
+
+
+def main() -> None:
+    """Lance le benchmark et affiche les débits."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=1_000_000)
+    parser.add_argument("--length", type=int, default=16)
+    options = parser.parse_args()
+    count, length = options.count, options.length
+
+    numpy_module = password_batch._numpy()
+    cases = {
+        "legacy (random, 1 par 1)": lambda: legacy_generate(count, length),
+        "lot, sans spéciaux": lambda: password_batch.generate_passwords(
+            count, length, False, True, True, True,
+        ),
+        "lot, 4 spéciaux": lambda: password_batch.generate_passwords(
+            count, length, True, True, True, True,
+        ),
+    }
+
+    print(f"moteur : {'NumPy' if numpy_module is not None else 'Python pur'}")
+    for name, func in cases.items():
+        print(f"{name:<32} {throughput(func, count):>14,.0f} mdp/s")
+
+    if numpy_module is not None:
+        # Compare avec le repli sans NumPy
+        password_batch.np = None
+        try:
+            for name, func in list(cases.items())[1:]:
+                print(f"{name + ' (Python pur)':<32} {throughput(func, count):>14,.0f} mdp/s")
+        finally:
+            password_batch.np = numpy_module
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Mesure l'index de recherche en mémoire sur un grand coffre synthétique.
+
+1. Construction de l'index (durée, mémoire retenue mesurée par `tracemalloc`).
+2. Latence de `TrigramIndex.search` (p50, p99) par longueur de requête, pour
+   des requêtes tirées des entrées (avec résultats) et aléatoires (souvent sans).
+3. Mises à jour unitaires (modification d'une entrée).
+
+L'objectif est une recherche sous la milliseconde à 50 000 entrées ; le code
+de sortie est 1 si le p99 dépasse `--budget-ms`.
+
+Utilisation :
+    python -m benchmarks.bench_search --entries 50000
+"""
+
+import argparse
+import random
+import string
+import sys
+import time
+import tracemalloc
+
+from app.services.search_index import TrigramIndex
+
+WORDS = (
+    "mail", "banque", "cloud", "forum", "boutique", "jeux", "musique", "photo",
+    "travail", "impots", "assurance", "voyage", "energie", "mutuelle", "ecole",
+)
+
+
+def synthetic_entries(count: int, rng: random.Random) -> list[tuple[int, dict[str, str]]]:
+    """Génère des entrées déterministes ressemblant à un coffre réel.
+
+    Arguments:
+        count (int): Nombre d'entrées.
+        rng (random.Random): Le générateur pseudo-aléatoire.
+
+    Returns:
+        list[tuple[int, dict[str, str]]]: Les couples (id, champs en clair).
+
+    """
+    entries = []
+    for entry_id in range(1, count + 1):
+        word = rng.choice(WORDS)
+        name = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 9)))
+        entries.append(
+            (
+                entry_id,
+                {
+                    "title": f"{word.capitalize()} {name} {entry_id}",
+                    "username": f"{name}.{rng.randint(1, 999)}",
+                    "url": f"https://{name}.{word}.example.com/login",
+                    "email": f"{name}@{rng.choice(('gmail.com', 'proton.me', 'orange.fr'))}",
+                },
+            ),
+        )
+    return entries
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    """Retourne le quantile `fraction` d'une liste triée."""
+    return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+
+def bench_queries(index: TrigramIndex, queries: list[str], limit: int) -> tuple[float, float, float]:
+    """Exécute les requêtes et retourne p50, p99 (ms) et le nombre moyen de résultats."""
+    durations, found = [], 0
+    for query in queries:
+        start = time.perf_counter()
+        found += len(index.search(query, limit))
+        durations.append((time.perf_counter() - start) * 1000)
+    durations.sort()
+    return percentile(durations, 0.5), percentile(durations, 0.99), found / len(queries)
+
+
+def main() -> int:
+    """Lance les mesures.
+
+    Returns:
+        int: Le code de sortie (1 si le budget est dépassé).
+
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=500, help="Requêtes par longueur")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--budget-ms", type=float, default=1.0, help="p99 maximal d'une recherche")
+    parser.add_argument("--seed", type=int, default=0)
+    options = parser.parse_args()
+
+    rng = random.Random(options.seed)
+    entries = synthetic_entries(options.entries, rng)
+
+    start = time.perf_counter()
+    TrigramIndex(0).add_many(entries)
+    duration = time.perf_counter() - start
+    tracemalloc.start()
+    index = TrigramIndex(0)
+    index.add_many(entries)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"Construction ({options.entries} entrées) : {duration * 1000:.0f} ms, {retained / 1e6:.1f} Mo")
+
+    worst = 0.0
+    print(f"{'requête':<22} {'p50 ms':>8} {'p99 ms':>8} {'résultats':>10}")
+    for length in (1, 2, 3, 5, 8, 12):
+        sampled = []
+        for _ in range(options.queries):
+            text = rng.choice(entries)[1][rng.choice(("title", "username", "url", "email"))]
+            offset = rng.randint(0, max(0, len(text) - length))
+            sampled.append(text[offset : offset + length])
+        random_queries = ["".join(rng.choices(string.ascii_lowercase, k=length)) for _ in range(options.queries)]
+        for label, queries in ((f"{length} car. (entrées)", sampled), (f"{length} car. (aléatoire)", random_queries)):
+            p50, p99, found = bench_queries(index, queries, options.limit)
+            worst = max(worst, p99)
+            print(f"{label:<22} {p50:>8.3f} {p99:>8.3f} {found:>10.1f}")
+
+    durations = []
+    for _ in range(options.queries):
+        entry_id, fields = rng.choice(entries)
+        start = time.perf_counter()
+        index.update(entry_id, {"title": fields["title"] + " modifié"})
+        durations.append((time.perf_counter() - start) * 1000)
+    durations.sort()
+    print(f"Mise à jour d'une entrée : p50 {percentile(durations, 0.5):.3f} ms, p99 {percentile(durations, 0.99):.3f} ms")
+
+    if worst > options.budget_ms:
+        print(f"Budget dépassé : p99 {worst:.3f} ms > {options.budget_ms} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
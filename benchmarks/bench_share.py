@@ -0,0 +1,75 @@
+"""Compare le coût d'une consultation de partage selon la version de la clé.
+
+Une consultation de `/share/{uuid}/{token}` dérive la clé de partage puis
+déchiffre les champs de l'entrée ; seule la dérivation dépend de la version.
+
+Utilisation :
+    python -m benchmarks.bench_share --repeat 20
+"""
+
+import argparse
+import secrets
+import time
+
+from app.services.crypto import PasswordAESEncryption, SharedPasswordEncryption
+
+FIELDS = ("Service", "utilisateur", "user@example.com", "S3cr3t-mot-de-passe!", "https://example.com")
+
+
+def retrieve(share_token_id: str, token: str, version: int, encrypted: list[str]) -> list[str]:
+    """Reproduit le travail cryptographique d'une consultation de partage.
+
+    Arguments:
+        share_token_id (str): L'identifiant du partage.
+        token (str): Le token du lien.
+        version (int): La version de la dérivation.
+        encrypted (list[str]): Les champs chiffrés avec la clé de partage.
+
+    Returns:
+        list[str]: Les champs déchiffrés.
+
+    """
+    key = SharedPasswordEncryption.derive_share_token(share_token_id, token, version)
+    return [PasswordAESEncryption.decrypt_password(field, key) for field in encrypted]
+
+
+def measure(version: int, repeat: int) -> float:
+    """Mesure la durée médiane d'une consultation.
+
+    Arguments:
+        version (int): La version de la dérivation.
+        repeat (int): Nombre de consultations mesurées.
+
+    Returns:
+        float: La durée médiane, en secondes.
+
+    """
+    share_token_id = secrets.token_urlsafe(16)
+    token = secrets.token_urlsafe(16)
+    key = SharedPasswordEncryption.derive_share_token(share_token_id, token, version)
+    encrypted = [PasswordAESEncryption.encrypt_password(field, key) for field in FIELDS]
+
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        retrieve(share_token_id, token, version, encrypted)
+        durations.append(time.perf_counter() - start)
+    durations.sort()
+    return durations[len(durations) // 2]
+
+
+def main() -> None:
+    """Lance le benchmark et affiche les durées par version."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=20)
+    options = parser.parse_args()
+
+    v1 = measure(1, options.repeat)
+    v2 = measure(2, options.repeat)
+    print(f"v1 (PBKDF2, 100 000 itérations)  {v1 * 1000:>10.3f} ms / consultation")
+    print(f"v2 (HKDF-SHA256)                 {v2 * 1000:>10.3f} ms / consultation")
+    print(f"gain                             {v1 / v2:>10.0f} x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""Mesure le démarrage de l'application et vérifie un budget.
+
+Deux mesures, chacune dans un interpréteur neuf lancé dans un répertoire
+temporaire (base SQLite vide) :
+    - `python -X importtime -c "import app.main"` : durée d'import et
+      répartition par paquet de premier niveau ;
+    - temps jusqu'à la première réponse : lancement de l'interpréteur, import,
+      lifespan (création du schéma, précompilation des templates) puis
+      `GET /login` servi par l'application ASGI.
+
+Le code de sortie est 1 si un budget est dépassé : la commande peut être
+utilisée comme contrôle en intégration continue.
+
+Utilisation :
+    python -m benchmarks.bench_startup --import-budget-ms 800 --budget-ms 1500
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+FIRST_RESPONSE = """
+import asyncio, json, time
+start = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+
+async def main():
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    async with app.router.lifespan_context(app):
+        started = time.perf_counter()
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": "GET", "scheme": "http", "path": "/login", "raw_path": b"/login",
+            "root_path": "", "query_string": b"", "headers": [(b"host", b"localhost")],
+            "client": ("127.0.0.1", 1), "server": ("localhost", 80),
+        }
+        await app(scope, receive, send)
+        done = time.perf_counter()
+    return started, done, messages[0]["status"]
+
+started, done, status = asyncio.run(main())
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "lifespan_ms": (started - imported) * 1000,
+    "first_request_ms": (done - started) * 1000,
+    "status": status,
+}))
+"""
+
+
+def run_python(args: list[str], cwd: str) -> subprocess.CompletedProcess:
+    """Lance un interpréteur neuf avec le dépôt dans le chemin d'import.
+
+    Arguments:
+        args (list[str]): Les arguments de l'interpréteur.
+        cwd (str): Le répertoire de travail.
+
+    Returns:
+        subprocess.CompletedProcess: Le processus terminé (sorties capturées).
+
+    """
+    env = {**os.environ, "PYTHONPATH": str(ROOT), "PYTHONDONTWRITEBYTECODE": "1"}
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=cwd,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def import_breakdown(cwd: str) -> tuple[float, Counter]:
+    """Mesure l'import de `app.main` avec `-X importtime`.
+
+    Arguments:
+        cwd (str): Le répertoire de travail.
+
+    Returns:
+        tuple[float, Counter]: La durée totale (ms) et la durée propre par paquet (ms).
+
+    """
+    result = run_python(["-X", "importtime", "-c", "import app.main"], cwd)
+    by_package: Counter[str] = Counter()
+    total = 0.0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, self_us, cumulative_us, name = (part.strip() for part in line.replace(":", "|", 1).split("|"))
+        if not self_us.isdigit():
+            continue
+        by_package[name.split(".")[0]] += int(self_us) / 1000
+        if name == "app.main":
+            total = int(cumulative_us) / 1000
+    return total, by_package
+
+
+def main() -> None:
+    """Lance les mesures et vérifie les budgets."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=3000, help="Budget jusqu'à la première réponse")
+    parser.add_argument("--import-budget-ms", type=float, default=1500, help="Budget d'import de app.main")
+    parser.add_argument("--top", type=int, default=12, help="Paquets affichés")
+    parser.add_argument("--json", action="store_true", help="Sortie JSON")
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cwd:
+        import_ms, by_package = import_breakdown(cwd)
+        start = time.perf_counter()
+        result = run_python(["-c", FIRST_RESPONSE], cwd)
+        total_ms = (time.perf_counter() - start) * 1000
+    phases = json.loads(result.stdout.strip().splitlines()[-1])
+
+    report = {
+        "import_ms": round(import_ms, 1),
+        "first_response_ms": round(total_ms, 1),
+        "phases_ms": {key: round(value, 1) for key, value in phases.items() if key.endswith("_ms")},
+        "status": phases["status"],
+        "top_packages_ms": {name: round(ms, 1) for name, ms in by_package.most_common(options.top)},
+        "budgets_ms": {"import": options.import_budget_ms, "first_response": options.budget_ms},
+    }
+    failures = []
+    if import_ms > options.import_budget_ms:
+        failures.append(f"import {import_ms:.0f} ms > {options.import_budget_ms:.0f} ms")
+    if total_ms > options.budget_ms:
+        failures.append(f"première réponse {total_ms:.0f} ms > {options.budget_ms:.0f} ms")
+    if phases["status"] != 200:
+        failures.append(f"GET /login a répondu {phases['status']}")
+
+    if options.json:
+        print(json.dumps({**report, "failures": failures}, indent=2, ensure_ascii=False))
+    else:
+        print(f"import de app.main                 {import_ms:>8.1f} ms")
+        for name, ms in by_package.most_common(options.top):
+            print(f"    {name:<30} {ms:>8.1f} ms")
+        print(f"jusqu'à la première réponse        {total_ms:>8.1f} ms")
+        for key, value in report["phases_ms"].items():
+            print(f"    {key:<30} {value:>8.1f} ms")
+        for failure in failures:
+            print(f"BUDGET DÉPASSÉ : {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Mesure la compilation et le rendu de `dashboard.html.j2` pour un grand coffre.
+
+Utilisation :
+    python -m benchmarks.bench_templates --rows 10000
+"""
+
+import argparse
+import tempfile
+import time
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+from app.models.views import PasswordView
+from app.templating import STREAM_CHUNK_SIZE, TEMPLATES_DIR, _buffered, environment
+
+
+def fake_entries(rows: int) -> list[PasswordView]:
+    """Construit des entrées déchiffrées factices.
+
+    Arguments:
+        rows (int): Nombre d'entrées.
+
+    Returns:
+        list[PasswordView]: Les entrées.
+
+    """
+    return [
+        PasswordView(
+            id=i,
+            title=f"Service {i}",
+            username=f"user{i}",
+            url=f"https://service{i}.example.com/login",
+            email=f"user{i}@example.com",
+            password=f"S3cr3t-{i:08d}!",
+            complexity=i % 5,
+        )
+        for i in range(rows)
+    ]
+
+
+def compile_time(cache_dir: str | None) -> float:
+    """Mesure la compilation du dashboard dans un environnement neuf.
+
+    Arguments:
+        cache_dir (str | None): Répertoire du cache de bytecode (None : sans cache).
+
+    Returns:
+        float: La durée de compilation, en secondes.
+
+    """
+    env = Environment(
+        loader=FileSystemLoader(TEMPLATES_DIR),
+        autoescape=True,
+        bytecode_cache=FileSystemBytecodeCache(cache_dir) if cache_dir else None,
+    )
+    start = time.perf_counter()
+    env.get_template("dashboard.html.j2")
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    """Lance le benchmark et affiche les durées."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10_000)
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cold = compile_time(None)
+        compile_time(cache_dir)  # remplit le cache
+        warm = compile_time(cache_dir)
+    print(f"compilation sans cache          {cold * 1000:>10.2f} ms")
+    print(f"compilation depuis le bytecode  {warm * 1000:>10.2f} ms")
+
+    context = {"request": None, "user": None, "passwords": fake_entries(options.rows)}
+    template = environment.get_template("dashboard.html.j2")
+
+    start = time.perf_counter()
+    html = template.render(context)
+    full = time.perf_counter() - start
+    print(f"rendu complet ({options.rows} lignes)   {full * 1000:>10.2f} ms  ({len(html) / 1e6:.1f} Mo)")
+
+    start = time.perf_counter()
+    chunks = _buffered(template.generate(context), STREAM_CHUNK_SIZE)
+    next(chunks)
+    first = time.perf_counter() - start
+    largest = 0
+    for chunk in chunks:
+        largest = max(largest, len(chunk))
+    total = time.perf_counter() - start
+    print(f"rendu en flux : premier bloc    {first * 1000:>10.2f} ms")
+    print(f"rendu en flux : total           {total * 1000:>10.2f} ms  (bloc max {largest / 1e3:.0f} ko)")
+
+
+if __name__ == "__main__":
+    main()
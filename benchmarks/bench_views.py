@@ -0,0 +1,140 @@
+"""Compare les modèles de lecture des listes du coffre : temps et mémoire.
+
+1. Construction à partir de valeurs déjà déchiffrées : `PasswordOut`
+   (validation pydantic), dictionnaire, `PasswordView` (`__slots__`).
+2. Chargement complet depuis une base SQLite en mémoire : entités ORM +
+   `decrypt_fields` (ancien chemin du tableau de bord) contre
+   `list_password_views` (colonnes en tuples, déchiffrement groupé).
+
+La mémoire est celle encore allouée à la fin de la construction
+(`tracemalloc`), mesurée dans une passe séparée de celle du temps.
+
+Utilisation :
+    python -m benchmarks.bench_views --rows 100000
+"""
+
+import argparse
+import gc
+import os
+import time
+import tracemalloc
+from collections.abc import Callable
+from typing import Any
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app import models  # noqa: F401  (tables de Base.metadata)
+from app.database import Base
+from app.dto.passwords import PasswordOut
+from app.models import PasswordEntry
+from app.models.user import User
+from app.models.views import PasswordView, list_password_views
+from app.services.crypto import PasswordAESEncryption
+
+
+def measure(build: Callable[[], Any]) -> tuple[float, float]:
+    """Mesure la durée de construction puis la mémoire retenue par le résultat.
+
+    Arguments:
+        build (Callable[[], Any]): Construit la liste mesurée.
+
+    Returns:
+        tuple[float, float]: La durée (secondes) et la mémoire retenue (octets).
+
+    """
+    gc.collect()
+    start = time.perf_counter()
+    result = build()
+    duration = time.perf_counter() - start
+    del result
+    gc.collect()
+
+    tracemalloc.start()
+    result = build()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return duration, retained
+
+
+def report(label: str, rows: int, duration: float, retained: float) -> None:
+    """Affiche une ligne de résultats."""
+    print(f"  {label:<38} {duration * 1000:>9.1f} ms  {retained / 1e6:>8.1f} Mo  {retained / rows:>6.0f} o/entrée")
+
+
+def bench_models(rows: int) -> None:
+    """Construit `rows` entrées déchiffrées avec chaque modèle."""
+    values = [
+        (i, f"Service {i}", f"user{i}", f"user{i}@example.com", f"https://s{i}.example.com", f"S3cr3t-{i:08d}!", i % 5)
+        for i in range(rows)
+    ]
+    names = ("id", "title", "username", "email", "url", "password", "complexity")
+    print(f"Construction de {rows} entrées déchiffrées :")
+    for label, build in (
+        ("PasswordOut (pydantic)", lambda: [PasswordOut(**dict(zip(names, row))) for row in values]),
+        ("dict", lambda: [dict(zip(names, row)) for row in values]),
+        ("PasswordView (__slots__)", lambda: [PasswordView(*row) for row in values]),
+    ):
+        report(label, rows, *measure(build))
+
+
+def bench_loading(rows: int) -> None:
+    """Charge `rows` entrées chiffrées depuis SQLite avec l'ancien et le nouveau chemin."""
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    aes_key = os.urandom(32)
+    titles = PasswordAESEncryption.encrypt_many([f"Service {i}" for i in range(rows)], aes_key)
+    other = PasswordAESEncryption.encrypt_many(["user@example.com"], aes_key)[0]
+    with engine.begin() as connection:
+        connection.execute(
+            insert(User.__table__),
+            [{"id": 1, "username": "bench", "hashed_password": "-", "totp_secret": "-", "user_salt": "00"}],
+        )
+        connection.execute(
+            insert(PasswordEntry.__table__),
+            [
+                {
+                    "title": title,
+                    "username": other,
+                    "email": other,
+                    "url": other,
+                    "encrypted_password": other,
+                    "complexity": i % 5,
+                    "user_id": 1,
+                }
+                for i, title in enumerate(titles)
+            ],
+        )
+
+    fields = PasswordEntry.DISPLAY_FIELDS
+
+    def orm_dicts() -> list[dict]:
+        with Session(engine) as db:
+            entries = db.query(PasswordEntry).filter(PasswordEntry.user_id == 1).all()
+            return [entry.decrypt_fields(aes_key, fields) for entry in entries]
+
+    def views() -> list[PasswordView]:
+        with Session(engine) as db:
+            return list_password_views(db, 1, aes_key, fields)
+
+    print(f"Chargement et déchiffrement de {rows} entrées ({', '.join(fields)}) :")
+    report("ORM + decrypt_fields (dict)", rows, *measure(orm_dicts))
+    report("list_password_views (PasswordView)", rows, *measure(views))
+
+
+def main() -> None:
+    """Lance les deux mesures."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--skip-db", action="store_true", help="Ne mesurer que la construction")
+    options = parser.parse_args()
+
+    bench_models(options.rows)
+    if not options.skip_db:
+        bench_loading(options.rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,461 @@
+"""Test de charge reproductible des principaux parcours utilisateur.
+
+Des utilisateurs virtuels (clients httpx asynchrones, un jar de cookies
+chacun) s'inscrivent ou se connectent, puis enchaînent des parcours tirés au
+sort selon `--mix` jusqu'à la fin de `--duration`. Le rapport JSON donne le
+débit global et, pour chaque étape, le nombre de requêtes, les erreurs et les
+percentiles p50/p95/p99.
+
+Sans `--url`, l'application (`app.main.create_app()`) est appelée en processus via
+`httpx.ASGITransport` (la limitation de débit est alors désactivée, tous les
+utilisateurs virtuels partageant la même adresse). Contre un serveur, lancer
+uvicorn avec des limites adaptées, ex. `RATE_LIMITS="login=100000/1,register=100000/1,share=100000/1"`.
+
+Avec `--credentials` (fichier produit par `benchmarks.seed`), les utilisateurs
+virtuels se connectent à des comptes existants au lieu de s'inscrire.
+
+Utilisation :
+    python -m benchmarks.loadtest --users 20 --duration 30 --output rapport.json
+    python -m benchmarks.loadtest --url http://127.0.0.1:8000 --credentials seed.json \\
+        --mix browse=60,edit=20,generator=10,share=10
+
+Nécessite `httpx` (non requis par l'application).
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import sys
+import time
+from collections import defaultdict
+from contextlib import AsyncExitStack
+from pathlib import Path
+from typing import Optional
+
+import pyotp
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - dépend de l'environnement
+    httpx = None
+
+DEFAULT_MIX = {"browse": 50, "edit": 25, "generator": 15, "share": 10}
+USER_ID_RE = re.compile(r'name="user_id" value="(\d+)"')
+SECRET_RE = re.compile(r'name="secret" value="([A-Z2-7]+)"')
+SHARE_LINK_RE = re.compile(r"(/share/[^\"'\s<]+)")
+
+
+class Recorder:
+    """Durées et erreurs par étape."""
+
+    def __init__(self) -> None:
+        """Initialise un enregistreur vide."""
+        self.durations: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+
+    def record(self, step: str, duration: float, ok: bool) -> None:
+        """Enregistre une requête.
+
+        Arguments:
+            step (str): Le nom de l'étape.
+            duration (float): La durée, en secondes.
+            ok (bool): False si la requête a échoué.
+
+        """
+        self.durations[step].append(duration)
+        if not ok:
+            self.errors[step] += 1
+
+    def report(self, elapsed: float) -> dict:
+        """Construit le rapport JSON.
+
+        Arguments:
+            elapsed (float): La durée totale du test, en secondes.
+
+        Returns:
+            dict: Débit global et statistiques par étape (durées en millisecondes).
+
+        """
+        steps = {}
+        for step, durations in sorted(self.durations.items()):
+            ordered = sorted(durations)
+            steps[step] = {
+                "count": len(ordered),
+                "errors": self.errors[step],
+                "throughput_rps": round(len(ordered) / elapsed, 2),
+                "mean_ms": round(sum(ordered) / len(ordered) * 1000, 2),
+                "p50_ms": round(percentile(ordered, 50) * 1000, 2),
+                "p95_ms": round(percentile(ordered, 95) * 1000, 2),
+                "p99_ms": round(percentile(ordered, 99) * 1000, 2),
+                "max_ms": round(ordered[-1] * 1000, 2),
+            }
+        total = sum(len(durations) for durations in self.durations.values())
+        return {
+            "elapsed_s": round(elapsed, 2),
+            "requests": total,
+            "errors": sum(self.errors.values()),
+            "throughput_rps": round(total / elapsed, 2),
+            "steps": steps,
+        }
+
+
+def percentile(ordered: list[float], rank: float) -> float:
+    """Percentile par rang le plus proche.
+
+    Arguments:
+        ordered (list[float]): Les valeurs triées.
+        rank (float): Le percentile voulu (0 à 100).
+
+    Returns:
+        float: La valeur du percentile.
+
+    """
+    index = max(0, min(len(ordered) - 1, round(rank / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class VirtualUser:
+    """Un utilisateur simulé, avec sa session et ses entrées."""
+
+    def __init__(
+        self,
+        client: "httpx.AsyncClient",
+        recorder: Recorder,
+        rng: random.Random,
+        credentials: dict[str, str],
+    ) -> None:
+        """Initialise l'utilisateur.
+
+        Arguments:
+            client (httpx.AsyncClient): Le client HTTP (cookies propres à l'utilisateur).
+            recorder (Recorder): L'enregistreur partagé.
+            rng (random.Random): Le générateur aléatoire de l'utilisateur.
+            credentials (dict[str, str]): `username`, `password` et éventuellement `totp_secret`.
+
+        """
+        self.client = client
+        self.recorder = recorder
+        self.rng = rng
+        self.credentials = credentials
+        self.entry_ids: list[int] = []
+
+    async def request(
+        self,
+        step: str,
+        method: str,
+        url: str,
+        expect: tuple[int, ...] = (200,),
+        **kwargs,
+    ) -> Optional["httpx.Response"]:
+        """Envoie une requête et enregistre sa durée sous le nom de l'étape.
+
+        Arguments:
+            step (str): Le nom de l'étape.
+            method (str): La méthode HTTP.
+            url (str): L'URL (relative à la cible).
+            expect (tuple[int, ...]): Les statuts considérés comme un succès.
+            **kwargs: Arguments transmis à `httpx.AsyncClient.request`.
+
+        Returns:
+            Optional[httpx.Response]: La réponse, ou None en cas d'échec.
+
+        """
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.recorder.record(step, time.perf_counter() - start, ok=False)
+            return None
+        ok = response.status_code in expect
+        self.recorder.record(step, time.perf_counter() - start, ok=ok)
+        if self.client.base_url.scheme == "http":
+            # Le cookie de session est `Secure` : le renvoyer aussi à un serveur local en HTTP
+            for cookie in self.client.cookies.jar:
+                cookie.secure = False
+        return response if ok else None
+
+    def totp_code(self) -> str:
+        """Retourne le code TOTP courant de l'utilisateur."""
+        return pyotp.TOTP(self.credentials["totp_secret"]).now()
+
+    async def register(self) -> bool:
+        """Parcours d'inscription : formulaire puis vérification du code TOTP.
+
+        Returns:
+            bool: True si l'utilisateur est inscrit et connecté.
+
+        """
+        response = await self.request(
+            "register",
+            "POST",
+            "/register",
+            data={"username": self.credentials["username"], "password": self.credentials["password"]},
+        )
+        if response is None:
+            return False
+        user_id = USER_ID_RE.search(response.text)
+        secret = SECRET_RE.search(response.text)
+        if not user_id or not secret:
+            self.recorder.record("register", 0.0, ok=False)
+            return False
+        self.credentials["totp_secret"] = secret.group(1)
+        response = await self.request(
+            "verify_totp",
+            "POST",
+            "/verify_totp",
+            expect=(302,),
+            data={
+                "totp_token": self.totp_code(),
+                "qr_code": "-",
+                "secret": secret.group(1),
+                "user_id": user_id.group(1),
+            },
+        )
+        return response is not None
+
+    async def login(self) -> bool:
+        """Parcours de connexion (mot de passe et TOTP).
+
+        Returns:
+            bool: True si la session est ouverte.
+
+        """
+        response = await self.request(
+            "login",
+            "POST",
+            "/login",
+            expect=(302,),
+            data={
+                "username": self.credentials["username"],
+                "password": self.credentials["password"],
+                "totp_token": self.totp_code(),
+            },
+        )
+        return response is not None
+
+    async def refresh_ids(self) -> None:
+        """Récupère les identifiants des entrées via l'API (sans déchiffrement)."""
+        response = await self.request("api_list_ids", "GET", "/api/v1/passwords", params={"fields": "id"})
+        if response is not None:
+            self.entry_ids = [item["id"] for item in response.json()["items"]]
+
+    def entry_form(self) -> dict[str, str]:
+        """Construit un formulaire d'entrée aléatoire."""
+        n = self.rng.randrange(1_000_000)
+        return {
+            "title": f"Service {n}",
+            "username": f"user{n}",
+            "email": f"user{n}@example.com",
+            "url": f"https://service{n}.example.com",
+            "password": f"Pw-{n:06d}-{self.rng.randrange(10**9)}!",
+        }
+
+    async def browse(self) -> None:
+        """Parcours de consultation : tableau de bord puis révélation d'un mot de passe."""
+        await self.request("dashboard", "GET", "/dashboard")
+        if not self.entry_ids:
+            await self.refresh_ids()
+        if self.entry_ids:
+            entry_id = self.rng.choice(self.entry_ids)
+            await self.request("reveal", "GET", f"/api/v1/passwords/{entry_id}/fields/password")
+
+    async def edit(self) -> None:
+        """Parcours d'édition : ajout, modification puis suppression d'une entrée."""
+        await self.request("add", "POST", "/add_password", expect=(302,), data=self.entry_form())
+        await self.refresh_ids()
+        if not self.entry_ids:
+            return
+        entry_id = max(self.entry_ids)
+        await self.request("update", "POST", f"/update_password/{entry_id}", expect=(302,), data=self.entry_form())
+        if self.rng.random() < 0.5:
+            await self.request("delete", "POST", f"/delete_password/{entry_id}", expect=(302,))
+            self.entry_ids.remove(entry_id)
+
+    async def generator(self) -> None:
+        """Parcours du générateur de mots de passe."""
+        await self.request(
+            "generator",
+            "POST",
+            "/generator",
+            data={
+                "length": "20",
+                "num_passwords": str(self.rng.choice((1, 10, 100))),
+                "use_special_chars": "true",
+                "use_digits": "true",
+                "use_uppercase": "true",
+                "use_lowercase": "true",
+            },
+        )
+
+    async def share(self) -> None:
+        """Parcours de partage : création d'un lien puis consultation anonyme."""
+        if not self.entry_ids:
+            await self.refresh_ids()
+        if not self.entry_ids:
+            return
+        entry_id = self.rng.choice(self.entry_ids)
+        response = await self.request(
+            "share_create",
+            "POST",
+            f"/passwords/{entry_id}/share",
+            data={"validity_hours": "1"},
+        )
+        link = SHARE_LINK_RE.search(response.text) if response is not None else None
+        if link:
+            # La consultation est publique : la session n'y joue aucun rôle
+            await self.request("share_retrieve", "GET", link.group(1))
+
+
+async def run_user(
+    index: int,
+    options: argparse.Namespace,
+    recorder: Recorder,
+    transport: Optional["httpx.AsyncBaseTransport"],
+    credentials: Optional[dict[str, str]],
+    mix: dict[str, int],
+    deadline: float,
+) -> None:
+    """Fait vivre un utilisateur virtuel jusqu'à l'échéance.
+
+    Arguments:
+        index (int): Le numéro de l'utilisateur virtuel.
+        options (argparse.Namespace): Les options de la ligne de commande.
+        recorder (Recorder): L'enregistreur partagé.
+        transport (Optional[httpx.AsyncBaseTransport]): Le transport en processus, ou None.
+        credentials (Optional[dict[str, str]]): Un compte existant, ou None pour s'inscrire.
+        mix (dict[str, int]): Les poids des parcours.
+        deadline (float): L'instant de fin (horloge monotone).
+
+    """
+    rng = random.Random(f"{options.seed}-{index}")
+    base_url = options.url or "https://loadtest"
+    async with httpx.AsyncClient(base_url=base_url, transport=transport, timeout=60) as client:
+        if credentials is None:
+            credentials = {"username": f"load-{options.seed}-{index}-{rng.randrange(10**9)}", "password": "Load-Test-Pw-1!"}
+            user = VirtualUser(client, recorder, rng, credentials)
+            if not await user.register():
+                return
+        else:
+            user = VirtualUser(client, recorder, rng, dict(credentials))
+        if not await user.login():
+            return
+        journeys = list(mix)
+        weights = [mix[name] for name in journeys]
+        while time.monotonic() < deadline:
+            journey = rng.choices(journeys, weights)[0]
+            await getattr(user, journey)()
+
+
+def parse_mix(spec: str) -> dict[str, int]:
+    """Analyse `--mix`, ex. `browse=60,edit=20`.
+
+    Arguments:
+        spec (str): La spécification des poids.
+
+    Returns:
+        dict[str, int]: Les poids par parcours.
+
+    """
+    mix = {}
+    for item in spec.split(","):
+        name, weight = item.split("=")
+        if name not in DEFAULT_MIX:
+            msg = f"Parcours inconnu : {name} (disponibles : {', '.join(DEFAULT_MIX)})"
+            raise argparse.ArgumentTypeError(msg)
+        mix[name] = int(weight)
+    return mix
+
+
+async def main_async(options: argparse.Namespace) -> dict:
+    """Lance le test de charge.
+
+    Arguments:
+        options (argparse.Namespace): Les options de la ligne de commande.
+
+    Returns:
+        dict: Le rapport.
+
+    """
+    async with AsyncExitStack() as stack:
+        transport = None
+        if not options.url:
+            from app.main import create_app
+
+            app = create_app()
+            # ASGITransport n'exécute pas le lifespan : il est exécuté ici, comme
+            # par le serveur (schéma, warm-up, thread d'écriture du journal
+            # d'audit au démarrage, vidage de la file à la fin du test)
+            await stack.enter_async_context(app.router.lifespan_context(app))
+
+            # Tous les utilisateurs virtuels partagent la même adresse en processus
+            app.state.rate_limiter.rules = ()
+            transport = httpx.ASGITransport(app=app)
+        return await run_load(options, transport)
+
+
+async def run_load(options: argparse.Namespace, transport: Optional["httpx.AsyncBaseTransport"]) -> dict:
+    """Exécute les utilisateurs virtuels jusqu'à la fin du test et produit le rapport.
+
+    Arguments:
+        options (argparse.Namespace): Les options de la ligne de commande.
+        transport (Optional[httpx.AsyncBaseTransport]): Transport de l'application en processus.
+
+    Returns:
+        dict: Le rapport.
+
+    """
+    accounts = None
+    if options.credentials:
+        accounts = json.loads(Path(options.credentials).read_text(encoding="utf-8"))["users"]
+
+    recorder = Recorder()
+    start = time.monotonic()
+    deadline = start + options.duration
+    await asyncio.gather(
+        *(
+            run_user(
+                index,
+                options,
+                recorder,
+                transport,
+                accounts[index % len(accounts)] if accounts else None,
+                options.mix,
+                deadline,
+            )
+            for index in range(options.users)
+        ),
+    )
+    report = recorder.report(time.monotonic() - start)
+    report["target"] = options.url or "create_app() (en processus)"
+    report["users"] = options.users
+    report["mix"] = options.mix
+    report["seed"] = options.seed
+    return report
+
+
+def main() -> None:
+    """Point d'entrée de la ligne de commande."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Serveur cible (défaut : application en processus)")
+    parser.add_argument("--users", type=int, default=10, help="Utilisateurs virtuels simultanés")
+    parser.add_argument("--duration", type=float, default=30, help="Durée du test, en secondes")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help="Poids des parcours")
+    parser.add_argument("--credentials", help="Comptes existants (JSON de benchmarks.seed)")
+    parser.add_argument("--seed", type=int, default=0, help="Graine des tirages aléatoires")
+    parser.add_argument("--output", help="Fichier du rapport JSON (défaut : sortie standard)")
+    options = parser.parse_args()
+
+    if httpx is None:
+        sys.exit("Le test de charge nécessite httpx : pip install httpx")
+
+    report = json.dumps(asyncio.run(main_async(options)), indent=2, ensure_ascii=False)
+    if options.output:
+        Path(options.output).write_text(report + "\n", encoding="utf-8")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""Génère rapidement un grand jeu de données réaliste dans la base de l'application.
+
+Les utilisateurs et leurs entrées sont dérivés de `--seed` : deux exécutions
+avec la même graine produisent les mêmes comptes et les mêmes entrées en
+clair (les chiffrés diffèrent, chaque chiffrement tirant un IV aléatoire).
+
+Le chemin normal (`User.__init__` et son bcrypt, `PasswordEntry.__init__` et
+ses cinq chiffrements, une ligne à la fois) est évité :
+    - le hachage bcrypt du mot de passe est calculé une fois et partagé par
+      tous les comptes (sauf `--unique-passwords`) ; chaque compte garde son
+      propre sel, donc sa propre clé de coffre ;
+    - la clé du coffre est dérivée une seule fois par utilisateur, dans un
+      processus de travail qui chiffre toutes ses entrées ;
+    - les lignes sont insérées en masse, par grandes transactions.
+
+Les identifiants utilisés sont écrits dans `--credentials`, au format lu par
+`benchmarks.loadtest --credentials`.
+
+Utilisation :
+    python -m benchmarks.seed --users 10000 --entries 1000 --credentials seed.json
+"""
+
+import argparse
+import json
+import os
+import random
+import string
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from sqlalchemy import func, insert, select
+
+from app.config import Settings
+from app.database import configure_database, init_db
+from app.models import PasswordEntry
+from app.models.user import User
+from app.services import auth, autofill, password_utils
+from app.services.crypto import PasswordAESEncryption
+
+BASE32 = "ABCDEFGHIJKLMNOPQRSTUVWXYZ234567"
+SERVICES = ("mail", "banque", "forum", "boutique", "cloud", "jeu", "vpn", "wiki", "crm", "git")
+
+
+def user_credentials(seed: int, index: int, unique_password: bool) -> dict[str, str]:
+    """Dérive les identifiants d'un utilisateur à partir de la graine.
+
+    Arguments:
+        seed (int): La graine du jeu de données.
+        index (int): Le numéro de l'utilisateur.
+        unique_password (bool): Un mot de passe propre à chaque utilisateur.
+
+    Returns:
+        dict[str, str]: `username`, `password` et `totp_secret`.
+
+    """
+    rng = random.Random(f"{seed}-utilisateur-{index}")
+    totp_secret = "".join(rng.choices(BASE32, k=32))
+    password = f"Seed-{seed}-Pw!"
+    if unique_password:
+        password = "".join(rng.choices(string.ascii_letters + string.digits, k=16)) + "!1a"
+    return {
+        "username": f"seed{seed}-{index:06d}",
+        "password": password,
+        "totp_secret": totp_secret,
+    }
+
+
+def build_user(job: tuple[int, int, int, int, str, bool]) -> tuple[dict, list[dict]]:
+    """Construit un utilisateur et ses entrées chiffrées (exécuté dans un processus de travail).
+
+    Arguments:
+        job (tuple): `(seed, index, user_id, entries, shared_hash, unique_password)`.
+
+    Returns:
+        tuple[dict, list[dict]]: La ligne `users` et les lignes `passwords`.
+
+    """
+    seed, index, user_id, entries, shared_hash, unique_password = job
+    credentials = user_credentials(seed, index, unique_password)
+    salt = os.urandom(16).hex()
+    # Une seule dérivation PBKDF2 par utilisateur, pour toutes ses entrées
+    aes_key = PasswordAESEncryption.derive_key(credentials["password"], bytes.fromhex(salt))
+    encrypt = PasswordAESEncryption.encrypt_password
+    domain_key = PasswordAESEncryption.derive_domain_key(aes_key)
+
+    user_row = {
+        "id": user_id,
+        "username": credentials["username"],
+        "hashed_password": auth.hash_password(credentials["password"]) if unique_password else shared_hash,
+        "totp_secret": credentials["totp_secret"],
+        "user_salt": salt,
+        "vault_revision": 0,
+        "key_check": PasswordAESEncryption.key_check(aes_key),
+    }
+
+    rng = random.Random(f"{seed}-entrees-{index}")
+    rows = []
+    for n in range(entries):
+        service = rng.choice(SERVICES)
+        password = "".join(rng.choices(string.ascii_letters + string.digits + "!@#$%", k=rng.randint(8, 24)))
+        # Un site distinct par service et numéro (domaine réservé .test)
+        url = f"https://login.{service}{n % 100}.test/login"
+        rows.append(
+            {
+                "title": encrypt(f"{service.capitalize()} {n}", aes_key),
+                "username": encrypt(f"{credentials['username']}.{service}", aes_key),
+                "email": encrypt(f"{credentials['username']}+{service}{n}@example.com", aes_key),
+                "url": encrypt(url, aes_key),
+                "domain_tag": autofill.url_tag(url, domain_key),
+                "encrypted_password": encrypt(password, aes_key),
+                "complexity": password_utils.calculate_password_strength(password),
+                "user_id": user_id,
+            },
+        )
+    return user_row, rows
+
+
+def seed_database(options: argparse.Namespace) -> list[dict[str, str]]:
+    """Crée les utilisateurs et leurs entrées.
+
+    Arguments:
+        options (argparse.Namespace): Les options de la ligne de commande.
+
+    Returns:
+        list[dict[str, str]]: Les identifiants des utilisateurs créés.
+
+    """
+    # Même base que l'application : `DATABASE_URL`
+    engine = configure_database(Settings.from_env())
+    init_db()
+
+    with engine.connect() as connection:
+        first_id = (connection.execute(select(func.max(User.id))).scalar() or 0) + 1
+
+    shared_hash = "" if options.unique_passwords else auth.hash_password(f"Seed-{options.seed}-Pw!")
+    jobs = [
+        (options.seed, index, first_id + index, options.entries, shared_hash, options.unique_passwords)
+        for index in range(options.users)
+    ]
+
+    users_table = User.__table__
+    passwords_table = PasswordEntry.__table__
+    pending_users: list[dict] = []
+    pending_entries: list[dict] = []
+    start = time.perf_counter()
+
+    def flush() -> None:
+        with engine.begin() as connection:
+            if engine.dialect.name == "sqlite":
+                # Jeu de données jetable : inutile d'attendre la synchronisation disque
+                connection.exec_driver_sql("PRAGMA synchronous = OFF")
+            connection.execute(insert(users_table), pending_users)
+            if pending_entries:
+                connection.execute(insert(passwords_table), pending_entries)
+        pending_users.clear()
+        pending_entries.clear()
+
+    with ProcessPoolExecutor(max_workers=options.processes) as pool:
+        for done, (user_row, entry_rows) in enumerate(pool.map(build_user, jobs, chunksize=4), 1):
+            pending_users.append(user_row)
+            pending_entries.extend(entry_rows)
+            if len(pending_entries) >= options.batch_rows or len(pending_users) >= options.batch_rows:
+                flush()
+            if done % 100 == 0 or done == options.users:
+                elapsed = time.perf_counter() - start
+                print(f"{done}/{options.users} utilisateurs ({done * options.entries / elapsed:,.0f} entrées/s)")
+    if pending_users:
+        flush()
+
+    return [user_credentials(options.seed, index, options.unique_passwords) for index in range(options.users)]
+
+
+def main() -> None:
+    """Point d'entrée de la ligne de commande."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--entries", type=int, default=100, help="Entrées par utilisateur")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    parser.add_argument("--batch-rows", type=int, default=50_000, help="Lignes par transaction")
+    parser.add_argument("--unique-passwords", action="store_true", help="Un mot de passe (et un bcrypt) par compte")
+    parser.add_argument("--credentials", default="seed_credentials.json")
+    options = parser.parse_args()
+
+    start = time.perf_counter()
+    users = seed_database(options)
+    Path(options.credentials).write_text(
+        json.dumps({"seed": options.seed, "users": users}, indent=1),
+        encoding="utf-8",
+    )
+    elapsed = time.perf_counter() - start
+    print(
+        f"{options.users} utilisateurs et {options.users * options.entries} entrées en {elapsed:.1f} s ; "
+        f"identifiants dans {options.credentials}",
+    )
+
+
+if __name__ == "__main__":
+    main()
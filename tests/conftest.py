@@ -0,0 +1,46 @@
+"""Fixtures partagées : base SQLite temporaire et coffre d'un utilisateur."""
+
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.config import Settings
+from app.database import create_database_engine, create_session_factory, init_db
+from app.models.user import User
+from app.services.crypto import PasswordAESEncryption
+
+PASSWORD = "Pw-alice-1!"
+
+
+@pytest.fixture
+def engine(tmp_path: Path) -> Iterator[Engine]:
+    """Moteur d'une base SQLite neuve, schéma créé."""
+    engine = create_database_engine(Settings(database_url=f"sqlite:///{tmp_path / 'vault.db'}"))
+    init_db(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine: Engine) -> Iterator[Session]:
+    """Session sur la base temporaire."""
+    with create_session_factory(engine)() as session:
+        yield session
+
+
+@pytest.fixture
+def user(db: Session) -> User:
+    """Utilisateur enregistré (bcrypt au coût minimal)."""
+    user = User(username="alice", password=PASSWORD, totp_secret="A" * 32, bcrypt_rounds=4)
+    db.add(user)
+    db.commit()
+    return user
+
+
+@pytest.fixture
+def aes_key(user: User) -> bytes:
+    """Clé du coffre de `user`."""
+    return PasswordAESEncryption.derive_key(PASSWORD, bytes.fromhex(user.user_salt))
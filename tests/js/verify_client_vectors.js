@@ -0,0 +1,33 @@
+// Vérifie les vecteurs de `client_crypto` avec le code du navigateur (static/js/vault_client.js).
+//
+// Utilisation : node tests/js/verify_client_vectors.js tests/data/client_crypto_vectors.json
+const fs = require("fs");
+const path = require("path");
+
+const { ECDH, b64ToBytes, unwrapVaultKey, decryptField } = require(
+  path.join(__dirname, "..", "..", "app", "static", "js", "vault_client.js"),
+);
+
+async function main(file) {
+  const data = JSON.parse(fs.readFileSync(file, "utf-8"));
+  let checked = 0;
+  for (const vector of data.vectors) {
+    const privateKey = await crypto.subtle.importKey(
+      "pkcs8", b64ToBytes(vector.client_private_key_pkcs8), ECDH, false, ["deriveBits"],
+    );
+    const key = await unwrapVaultKey(privateKey, vector.response, true);
+    const raw = Buffer.from(await crypto.subtle.exportKey("raw", key)).toString("base64");
+    if (raw !== vector.vault_key) throw new Error("Clé du coffre désenveloppée incorrecte");
+    for (const field of vector.fields) {
+      const plaintext = await decryptField(key, field.ciphertext);
+      if (plaintext !== field.plaintext) throw new Error(`Champ mal déchiffré : ${field.plaintext}`);
+      checked += 1;
+    }
+  }
+  console.log(`${checked} champs vérifiés`);
+}
+
+main(process.argv[2]).catch((error) => {
+  console.error(error);
+  process.exit(1);
+});
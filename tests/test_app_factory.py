@@ -0,0 +1,35 @@
+"""Indépendance des applications construites par `create_app` dans un même processus."""
+
+from pathlib import Path
+
+from app.config import Settings
+from app.database import init_db
+from app.main import create_app
+from app.models.user import User
+
+
+def test_applications_keep_their_own_database_and_services(tmp_path: Path) -> None:
+    """Deux applications ne partagent ni base, ni limiteur, ni trousseau."""
+    first = create_app(Settings(database_url=f"sqlite:///{tmp_path / 'a.db'}", rate_limits="login=1/60"))
+    second = create_app(Settings(database_url=f"sqlite:///{tmp_path / 'b.db'}"))
+    for app in (first, second):
+        init_db(app.state.engine)
+
+    with first.state.session_factory() as db:
+        db.add(User(username="alice", password="Pw-alice-1!", totp_secret="A" * 32, bcrypt_rounds=4))
+        db.commit()
+    with second.state.session_factory() as db:
+        assert db.query(User).count() == 0
+
+    rule = first.state.rate_limiter.match("POST", "/login")
+    assert first.state.rate_limiter.acquire(rule, "203.0.113.7") == 0
+    assert first.state.rate_limiter.acquire(rule, "203.0.113.7") > 0
+    # La règle de la seconde application garde ses réglages et ses seaux
+    other = second.state.rate_limiter.match("POST", "/login")
+    assert other.capacity != rule.capacity
+    assert second.state.rate_limiter.acquire(other, "203.0.113.7") == 0
+
+    handle = first.state.keyring.put(1, 0, b"k" * 32)
+    assert second.state.keyring.get(handle, 1, 0) is None
+    for app in (first, second):
+        app.state.engine.dispose()
@@ -0,0 +1,43 @@
+"""Journal d'audit : contre-pression sans blocage de la boucle d'événements."""
+
+import asyncio
+import time
+
+from app.services.audit import AuditLog
+
+
+def test_drop_policy_never_waits() -> None:
+    """File pleine en "drop" : l'événement est abandonné immédiatement."""
+    journal = AuditLog(max_queue=1, flush_interval=5, policy="drop")
+    assert journal.record("login", 1)
+    start = time.monotonic()
+    assert not journal.record("login", 1)
+    assert time.monotonic() - start < 0.1
+
+
+def test_block_policy_does_not_block_event_loop() -> None:
+    """File pleine en "block" depuis la boucle : l'attente part dans le pool de threads."""
+    journal = AuditLog(max_queue=1, flush_interval=0.3, policy="block")
+    journal.record("login", 1)
+
+    async def record_on_loop() -> float:
+        start = time.monotonic()
+        assert journal.record("logout", 1)
+        elapsed = time.monotonic() - start
+        # Une place se libère pendant l'attente confiée au pool de threads
+        await asyncio.sleep(0.05)
+        journal._queue.get_nowait()
+        await asyncio.sleep(0.1)
+        return elapsed
+
+    assert asyncio.run(record_on_loop()) < 0.05
+    assert journal._queue.get_nowait()["action"] == "logout"
+
+
+def test_block_policy_waits_in_worker_thread() -> None:
+    """Hors boucle (route synchrone), l'attente est bornée par `flush_interval`."""
+    journal = AuditLog(max_queue=1, flush_interval=0.1, policy="block")
+    journal.record("login", 1)
+    start = time.monotonic()
+    assert not journal.record("login", 1)
+    assert 0.09 <= time.monotonic() - start < 1
@@ -0,0 +1,33 @@
+"""Domaine enregistrable des URL, base de l'index du remplissage automatique."""
+
+import pytest
+
+from app.services.autofill import registrable_domain
+
+
+@pytest.mark.parametrize(
+    ("url", "domain"),
+    [
+        ("https://www.example.com/login", "example.com"),
+        ("https://login.accounts.example.com:8443/", "example.com"),
+        ("example.com/account", "example.com"),
+        ("HTTPS://WWW.Example.COM.", "example.com"),
+        ("https://login.example.co.uk/", "example.co.uk"),
+        ("https://www.impots.gouv.fr/", "impots.gouv.fr"),
+        ("https://alice.github.io/blog", "alice.github.io"),
+        ("https://bücher.example.de/", "example.de"),
+        ("https://www.bücher.de/", "xn--bcher-kva.de"),
+        ("http://192.168.1.10:8080/admin", "192.168.1.10"),
+        ("http://[::1]/", "::1"),
+        ("localhost", "localhost"),
+    ],
+)
+def test_registrable_domain(url: str, domain: str) -> None:
+    """Sous-domaines, suffixes à deux niveaux, IDN et adresses IP."""
+    assert registrable_domain(url) == domain
+
+
+@pytest.mark.parametrize("url", [None, "", "   ", "/chemin/relatif", "https://", "http://[invalide/"])
+def test_url_without_host(url: str) -> None:
+    """Une URL sans nom d'hôte n'a pas de domaine."""
+    assert registrable_domain(url) == ""
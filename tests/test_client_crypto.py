@@ -0,0 +1,65 @@
+"""Vecteurs de test du déchiffrement côté client (Python et JavaScript)."""
+
+import json
+import shutil
+import subprocess
+from base64 import b64decode
+from pathlib import Path
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.keywrap import InvalidUnwrap
+
+from app.services import client_crypto
+
+ROOT = Path(__file__).resolve().parent.parent
+VECTORS = ROOT / "tests" / "data" / "client_crypto_vectors.json"
+
+
+def test_vectors_are_reproducible() -> None:
+    """Le fichier versionné correspond aux vecteurs générés depuis la graine."""
+    assert json.loads(VECTORS.read_text(encoding="utf-8")) == client_crypto.generate_test_vectors()
+
+
+def test_python_reference_verifies_vectors() -> None:
+    """L'implémentation de référence désenveloppe la clé et déchiffre chaque champ."""
+    data = json.loads(VECTORS.read_text(encoding="utf-8"))
+    assert client_crypto.verify_test_vectors(data) == 12
+
+
+def test_python_reference_rejects_tampered_vector() -> None:
+    """Une clé enveloppée altérée n'est pas acceptée."""
+    data = json.loads(VECTORS.read_text(encoding="utf-8"))
+    wrapped = bytearray(b64decode(data["vectors"][0]["response"]["wrapped_key"]))
+    wrapped[0] ^= 1
+    data["vectors"][0]["response"]["wrapped_key"] = client_crypto._b64(bytes(wrapped))
+    with pytest.raises(InvalidUnwrap):
+        client_crypto.verify_test_vectors(data)
+
+
+def test_wrap_round_trip() -> None:
+    """Une clé enveloppée par le serveur est désenveloppée par le client."""
+    client_key = ec.generate_private_key(ec.SECP256R1())
+    public = client_crypto._b64(
+        client_key.public_key().public_bytes(
+            serialization.Encoding.X962,
+            serialization.PublicFormat.UncompressedPoint,
+        ),
+    )
+    payload = client_crypto.wrap_vault_key(b"k" * 32, public)
+    assert client_crypto.unwrap_vault_key(client_key, payload) == b"k" * 32
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="Node.js absent")
+def test_javascript_client_verifies_vectors() -> None:
+    """`static/js/vault_client.js` (WebCrypto sous Node) déchiffre les mêmes vecteurs."""
+    result = subprocess.run(
+        ["node", str(ROOT / "tests" / "js" / "verify_client_vectors.js"), str(VECTORS)],
+        capture_output=True,
+        text=True,
+        timeout=60,
+        check=False,
+    )
+    assert result.returncode == 0, result.stderr
+    assert "12 champs vérifiés" in result.stdout
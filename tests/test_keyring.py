@@ -0,0 +1,150 @@
+"""Trousseau des clés de coffre : expiration, capacité et index de recherche associés."""
+
+from types import SimpleNamespace
+from unittest import mock
+
+from itsdangerous import URLSafeTimedSerializer
+from sqlalchemy.orm import Session
+
+from app.config import Settings
+from app.models.user import User
+from app.services import auth
+from app.services.keyring import SessionKeyWrapper, VaultKeyring
+from app.services.search_index import SearchIndexes
+
+KEY = b"k" * 32
+
+
+def keyring_with_indexes(**options: float) -> tuple[VaultKeyring, SearchIndexes]:
+    """Trousseau relié à un registre d'index, comme dans `create_app`."""
+    indexes = SearchIndexes()
+    return VaultKeyring(on_evict=indexes.evict, **options), indexes
+
+
+def test_idle_key_evicts_search_index() -> None:
+    """Une clé oubliée pour inactivité emporte l'index du coffre."""
+    keyring, indexes = keyring_with_indexes(idle_timeout=60)
+    with mock.patch("app.services.keyring.time.monotonic", return_value=1000.0):
+        handle = keyring.put(1, 0, KEY)
+    indexes.build(1, 0, [(10, {"title": "Github"})])
+
+    with mock.patch("app.services.keyring.time.monotonic", return_value=1061.0):
+        assert keyring.get(handle, 1, 0) is None
+    assert indexes.get(1, 0) is None
+
+
+def test_capacity_eviction_evicts_search_index() -> None:
+    """Au-delà de la capacité, le coffre le moins récent perd sa clé et son index."""
+    keyring, indexes = keyring_with_indexes(max_keys=1)
+    keyring.put(1, 0, KEY)
+    indexes.build(1, 0, [(10, {"title": "Github"})])
+    indexes.build(2, 0, [(20, {"title": "Gitlab"})])
+
+    keyring.put(2, 0, KEY)
+    assert indexes.get(1, 0) is None
+    assert indexes.get(2, 0) is not None
+
+
+def test_index_kept_while_another_session_holds_a_key() -> None:
+    """L'index reste tant qu'une autre session du même utilisateur garde sa clé."""
+    keyring, indexes = keyring_with_indexes(max_keys=2)
+    keyring.put(1, 0, KEY)
+    second = keyring.put(1, 0, KEY)
+    indexes.build(1, 0, [(10, {"title": "Github"})])
+
+    keyring.put(2, 0, KEY)
+    assert keyring.get(second, 1, 0) == KEY
+    assert indexes.get(1, 0) is not None
+
+
+def test_explicit_lock_does_not_call_on_evict() -> None:
+    """`/lock` et la déconnexion suppriment l'index eux-mêmes."""
+    on_evict = mock.Mock()
+    keyring = VaultKeyring(on_evict=on_evict)
+    assert keyring.lock(keyring.put(1, 0, KEY)) == 1
+    on_evict.assert_not_called()
+
+
+def test_key_from_a_past_epoch_is_dropped() -> None:
+    """Une clé déverrouillée avant un verrouillage (autre worker) est oubliée, avec son index."""
+    keyring, indexes = keyring_with_indexes()
+    handle = keyring.put(1, 0, KEY)
+    indexes.build(1, 0, [(10, {"title": "Github"})])
+
+    assert keyring.get(handle, 1, 1) is None
+    assert keyring.get(handle, 1, 0) is None
+    assert len(keyring) == 0
+    assert indexes.get(1, 0) is None
+
+
+def test_wrapped_key_is_bound_to_its_owner() -> None:
+    """La clé chiffrée en session ne se déchiffre que pour son propriétaire, son époque et avec le même secret."""
+    wrapper = SessionKeyWrapper("secret")
+    wrapped = wrapper.wrap(1, 0, KEY)
+    assert SessionKeyWrapper("secret").unwrap(1, 0, wrapped) == KEY
+    assert wrapper.unwrap(2, 0, wrapped) is None
+    assert wrapper.unwrap(1, 1, wrapped) is None
+    assert SessionKeyWrapper("autre").unwrap(1, 0, wrapped) is None
+    assert wrapper.unwrap(1, 0, "pas du base64 !") is None
+
+
+def worker(keyring: VaultKeyring) -> SimpleNamespace:
+    """Application minimale d'un worker : son trousseau, les secrets partagés."""
+    return SimpleNamespace(
+        state=SimpleNamespace(
+            keyring=keyring,
+            key_wrapper=SessionKeyWrapper("secret"),
+            serializer=URLSafeTimedSerializer("secret"),
+            settings=Settings(),
+        )
+    )
+
+
+def request(app: SimpleNamespace, session: dict, user: User) -> SimpleNamespace:
+    """Requête minimale : la session et le cookie `session_token` de `user`."""
+    token = app.state.serializer.dumps({"user_id": user.id})
+    return SimpleNamespace(app=app, session=session, cookies={"session_token": token})
+
+
+def test_other_worker_restores_key_from_session(db: Session, user: User) -> None:
+    """Un worker sans la clé la déchiffre depuis la session, tant qu'elle n'a pas expiré."""
+    first, second = worker(VaultKeyring(idle_timeout=60)), worker(VaultKeyring(idle_timeout=60))
+    session: dict = {}
+    auth.unlock_vault(request(first, session, user), user, KEY)
+
+    restored = dict(session)
+    assert auth.get_session_key(request(second, restored, user), user) == KEY
+    assert len(second.state.keyring) == 1
+    # Même identifiant dans tous les workers : pas de réécriture croisée de la session
+    assert restored[auth.VAULT_SESSION_KEY] == session[auth.VAULT_SESSION_KEY]
+    other = SimpleNamespace(id=user.id + 1, vault_epoch=0)
+    assert auth.get_session_key(SimpleNamespace(app=second, session=dict(session)), other) is None
+
+    expired = {**session, auth.VAULT_SEEN_SESSION_KEY: session[auth.VAULT_SEEN_SESSION_KEY] - 61}
+    assert auth.get_session_key(request(worker(VaultKeyring(idle_timeout=60)), expired, user), user) is None
+    assert auth.VAULT_WRAPPED_SESSION_KEY not in expired
+
+    assert auth.lock_vault(request(first, session, user), db) == user.id
+    assert auth.get_session_key(request(second, session, user), user) is None
+
+
+def test_session_copied_before_lock_is_revoked(db: Session, user: User) -> None:
+    """Une session copiée avant `/lock` ne rouvre le coffre dans aucun worker."""
+    first, second = worker(VaultKeyring(idle_timeout=60)), worker(VaultKeyring(idle_timeout=60))
+    session: dict = {}
+    auth.unlock_vault(request(first, session, user), user, KEY)
+    # Le second worker a déjà la clé en trousseau
+    assert auth.get_session_key(request(second, dict(session), user), user) == KEY
+    captured = dict(session)
+
+    auth.lock_vault(request(first, session, user), db)
+    db.refresh(user)
+    assert user.vault_epoch == 1
+
+    for app in (first, second, worker(VaultKeyring(idle_timeout=60))):
+        assert auth.get_session_key(request(app, dict(captured), user), user) is None
+    assert len(second.state.keyring) == 0
+
+    # Un nouveau déverrouillage vaut pour la nouvelle époque
+    auth.unlock_vault(request(first, session, user), user, KEY)
+    assert auth.get_session_key(request(second, dict(session), user), user) == KEY
@@ -0,0 +1,41 @@
+"""Connexion : échecs gérés et journalisés, y compris pour un nom inconnu."""
+
+import asyncio
+from pathlib import Path
+
+import httpx
+
+from app.config import Settings
+from app.database import init_db
+from app.main import create_app
+from app.models.user import User
+
+
+def test_unknown_username_is_rejected_and_audited(tmp_path: Path) -> None:
+    """Un nom d'utilisateur inconnu donne le formulaire d'erreur et un `login_failed`."""
+    app = create_app(Settings(database_url=f"sqlite:///{tmp_path / 'vault.db'}", rate_limits="login=100/60"))
+    init_db(app.state.engine)
+    app.state.audit_log.start(app.state.engine)
+
+    async def login(username: str) -> httpx.Response:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="https://test") as client:
+            return await client.post(
+                "/login",
+                data={"username": username, "password": "Pw-inconnu-1!", "totp_token": "000000"},
+            )
+
+    with app.state.session_factory() as db:
+        db.add(User(username="alice", password="Pw-alice-1!", totp_secret="A" * 32, bcrypt_rounds=4))
+        db.commit()
+    for username in ("inconnu", "alice"):
+        response = asyncio.run(login(username))
+        assert response.status_code == 200
+        assert "mot de passe incorrect" in response.text
+    assert app.state.audit_log.flush()
+    app.state.audit_log.stop()
+
+    with app.state.engine.connect() as connection:
+        rows = connection.exec_driver_sql("SELECT user_id, detail FROM audit_events WHERE action = 'login_failed'")
+        assert sorted(rows.all(), key=str) == [(1, "alice"), (None, "inconnu")]
+    app.state.engine.dispose()
@@ -0,0 +1,31 @@
+"""Accès à `/metrics` selon la configuration de `METRICS_TOKEN`."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.config import Settings
+from app.main import create_app
+
+
+async def fetch(token: str | None, host: str, headers: dict[str, str] | None = None) -> int:
+    """Appelle `/metrics` depuis l'adresse `host` et retourne le statut."""
+    app = create_app(Settings(database_url="sqlite://", metrics_token=token))
+    transport = httpx.ASGITransport(app=app, client=(host, 12345))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/metrics", headers=headers)
+    return response.status_code
+
+
+@pytest.mark.parametrize(("host", "expected"), [("127.0.0.1", 200), ("::1", 200), ("203.0.113.7", 403)])
+def test_without_token_only_local_clients(host: str, expected: int) -> None:
+    """Sans jeton configuré, seuls les clients locaux lisent les métriques."""
+    assert asyncio.run(fetch(None, host)) == expected
+
+
+def test_with_token_bearer_required() -> None:
+    """Avec un jeton, l'en-tête est exigé, y compris en local."""
+    assert asyncio.run(fetch("s3cret", "127.0.0.1")) == 401
+    assert asyncio.run(fetch("s3cret", "203.0.113.7", {"Authorization": "Bearer s3cret"})) == 200
+
@@ -0,0 +1,87 @@
+"""Listes de mots compilées : un fichier déposé par un autre compte n'est jamais chargé."""
+
+import os
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from app.services import passphrase
+
+WORDS = [f"mot{n}" for n in range(50)]
+OTHER_UID = 54321
+
+
+@pytest.fixture
+def wordlists(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[tuple[Path, Path]]:
+    """Répertoire source (50 mots) et répertoire de cache temporaires."""
+    source_dir, cache_dir = tmp_path / "wordlists", tmp_path / "cache"
+    source_dir.mkdir()
+    (source_dir / "fr.txt").write_text("\n".join(WORDS), encoding="utf-8")
+    monkeypatch.setattr(passphrase, "WORDLISTS_DIR", source_dir)
+    monkeypatch.setattr(passphrase, "WORDLISTS_CACHE_DIR", cache_dir)
+    passphrase.get_wordlist.cache_clear()
+    yield source_dir, cache_dir
+    passphrase.get_wordlist.cache_clear()
+
+
+def plant(directory: Path) -> Path:
+    """Dépose une liste d'un seul mot, plus récente que la source."""
+    directory.mkdir(exist_ok=True)
+    planted = directory / "fr.pvwl"
+    passphrase.build_wordlist(write_source(directory.parent / "piege.txt"), planted)
+    os.utime(planted, (4_000_000_000, 4_000_000_000))
+    return planted
+
+
+def write_source(path: Path) -> Path:
+    """Source d'un seul mot."""
+    path.write_text("piege\n", encoding="utf-8")
+    return path
+
+
+def test_group_writable_file_is_ignored(wordlists: tuple[Path, Path]) -> None:
+    """Une liste modifiable par d'autres comptes est recompilée depuis la source."""
+    source_dir, _ = wordlists
+    planted = plant(source_dir)
+    planted.chmod(0o666)
+
+    assert len(passphrase.get_wordlist("fr")) == len(WORDS)
+
+
+@pytest.mark.skipif(not hasattr(os, "geteuid") or os.geteuid() != 0, reason="chown exige root")
+def test_foreign_file_in_shared_cache_is_ignored(
+    wordlists: tuple[Path, Path],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Source en lecture seule, cache préparé par un autre compte : la liste piégée n'est pas chargée."""
+    _, cache_dir = wordlists
+    planted = plant(cache_dir)
+    os.chown(planted, OTHER_UID, -1)
+    os.chown(cache_dir, OTHER_UID, -1)
+    cache_dir.chmod(0o777)
+
+    # Déploiement en lecture seule : aucune compilation possible à côté de la source
+    build = passphrase.build_wordlist
+
+    def read_only(source: Path, destination: Path) -> int:
+        if destination.parent == passphrase.WORDLISTS_DIR:
+            raise PermissionError(destination.parent)
+        return build(source, destination)
+
+    monkeypatch.setattr(passphrase, "build_wordlist", read_only)
+    with pytest.raises(PermissionError):
+        passphrase.get_wordlist("fr")
+
+    # Le fichier seul appartient à un autre compte, le cache est privé : recompilée
+    os.chown(cache_dir, os.getuid(), -1)
+    cache_dir.chmod(0o700)
+    assert len(passphrase.get_wordlist("fr")) == len(WORDS)
+    assert planted.stat().st_uid == os.getuid()
+
+
+def test_cache_directory_is_private(wordlists: tuple[Path, Path]) -> None:
+    """Le cache de repli est créé en 0700."""
+    _, cache_dir = wordlists
+    passphrase._prepare_directory(cache_dir)
+    assert cache_dir.stat().st_mode & 0o777 == 0o700
@@ -0,0 +1,53 @@
+"""Limiteur de débit : configuration et expiration des seaux."""
+
+from unittest import mock
+
+import pytest
+
+from app.middleware.ratelimit import DEFAULT_RULES, RateLimiter, parse_rules
+
+RULES = {rule.name: rule for rule in DEFAULT_RULES}
+
+
+@pytest.mark.parametrize("spec", ["login=0/60", "login=10/0", "login=10/-5", "login=10/inf", "inconnue=1/1"])
+def test_parse_rules_rejects_invalid_limits(spec: str) -> None:
+    """Les limites inutilisables sont refusées au démarrage, pas à la première requête."""
+    with pytest.raises(ValueError, match="RATE_LIMITS"):
+        parse_rules(spec)
+
+
+def test_parse_rules_overrides_limit() -> None:
+    """Une surcharge remplace la capacité et la période de la règle nommée."""
+    rule = {rule.name: rule for rule in parse_rules("login=3/30")}["login"]
+    assert (rule.capacity, rule.period) == (3, 30.0)
+
+
+def test_expired_buckets_are_purged_per_rule() -> None:
+    """Un seau récent d'une règle à longue période ne retient pas les seaux expirés des autres."""
+    limiter = RateLimiter()
+    now = [0.0]
+    with mock.patch("time.monotonic", lambda: now[0]):
+        limiter.acquire(RULES["register"], "a")
+        for client in ("b", "c"):
+            limiter.acquire(RULES["login"], client)
+        now[0] = 61.0
+        limiter.acquire(RULES["register"], "a")
+    stats = limiter.stats()
+    assert stats["expired"] == 2
+    assert stats["buckets"] == 1
+
+
+def test_capacity_evicts_least_recently_used() -> None:
+    """Au-delà de `max_buckets`, le seau le moins récemment utilisé est évincé, toutes règles confondues."""
+    limiter = RateLimiter(max_buckets=2)
+    now = [0.0]
+    with mock.patch("time.monotonic", lambda: now[0]):
+        limiter.acquire(RULES["login"], "a")
+        now[0] = 1.0
+        limiter.acquire(RULES["register"], "b")
+        now[0] = 2.0
+        limiter.acquire(RULES["login"], "c")
+        # "a" a été évincé : son seau repart plein
+        for _ in range(RULES["login"].capacity):
+            assert limiter.acquire(RULES["login"], "a") == 0
+    assert limiter.stats()["evicted"] == 2
@@ -0,0 +1,70 @@
+"""Index de recherche : classement et mises à jour incrémentales."""
+
+from app.services import search_index
+from app.services.search_index import SearchIndexes, TrigramIndex
+
+
+def index_of(*entries: dict) -> TrigramIndex:
+    """Index à la révision 0 sur des entrées numérotées à partir de 1."""
+    index = TrigramIndex(0)
+    index.add_many(enumerate(entries, start=1))
+    return index
+
+
+def test_title_match_ranks_before_other_fields() -> None:
+    """Le champ trouvé prime : titre, puis nom d'utilisateur, URL, e-mail."""
+    index = index_of(
+        {"title": "Banque", "email": "paypal@example.com"},
+        {"title": "Achats", "url": "https://www.paypal.com"},
+        {"title": "Compte", "username": "paypal-pro"},
+        {"title": "PayPal"},
+    )
+    assert index.search("paypal") == [4, 3, 2, 1]
+
+
+def test_word_start_then_shorter_field() -> None:
+    """Dans un champ : début de mot d'abord, puis le champ le plus court."""
+    index = index_of(
+        {"title": "Mon compte bancaire"},
+        {"title": "Décompte"},
+        {"title": "Compte"},
+        {"title": "Compte joint"},
+    )
+    assert index.search("compte") == [3, 4, 1, 2]
+
+
+def test_short_queries_only_match_word_starts_and_ignore_accents() -> None:
+    """Une requête de un ou deux caractères ne cherche qu'en début de mot ; accents ignorés."""
+    index = index_of({"title": "Élysée"}, {"title": "Télé"})
+    assert index.search("el") == [1]
+    assert index.search("ELYS") == [1]
+    assert index.search("é", limit=0) == []
+
+
+def test_update_and_remove_are_incremental() -> None:
+    """Une modification remplace les champs changés et garde les autres ; une suppression retire l'entrée."""
+    index = index_of({"title": "Github", "username": "octocat"})
+    index.update(1, {"title": "Gitlab"})
+    assert index.search("github") == []
+    assert index.search("gitlab") == [1]
+    assert index.search("octo") == [1]
+
+    index.remove(1)
+    assert index.search("gitlab") == []
+    assert len(index) == 0
+
+
+def test_record_changes_follows_revisions() -> None:
+    """Une mutation à jour modifie l'index ; une révision inattendue le supprime."""
+    indexes = SearchIndexes()
+    index = indexes.build(1, 3, [(10, {"title": "Github"})])
+
+    search_index.record_changes(indexes, 1, 3, upserts=[(11, {"title": "Gitlab", "password": "secret"})])
+    assert indexes.get(1, 4) is index
+    assert index.search("gitlab") == [11]
+    assert index.search("secret") == []
+
+    # Modification par un autre worker (révision 4 -> 5) : cette mutation part de 5
+    search_index.record_changes(indexes, 1, 5, deletions=[10])
+    assert indexes.get(1, 4) is None
+    assert indexes.get(1, 6) is None
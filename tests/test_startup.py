@@ -0,0 +1,41 @@
+"""Budget de démarrage : import léger et première réponse (benchmarks/bench_startup.py)."""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+# Modules chargés à la première utilisation, jamais à l'import de l'application
+LAZY_MODULES = ("numpy", "qrcode", "passlib", "app.services.client_crypto")
+
+
+def run_python(*args: str) -> subprocess.CompletedProcess:
+    """Lance un interpréteur neuf depuis la racine du dépôt."""
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=ROOT,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+        capture_output=True,
+        text=True,
+        timeout=120,
+        check=False,
+    )
+
+
+def test_heavy_modules_are_not_imported_at_startup() -> None:
+    """`import app.main` ne charge ni NumPy, ni qrcode, ni passlib, ni l'enveloppe de clé client."""
+    code = f"import sys, app.main; print([m for m in {LAZY_MODULES!r} if m in sys.modules])"
+    result = run_python("-c", code)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "[]"
+
+
+def test_startup_within_budget() -> None:
+    """Import et première réponse respectent les budgets par défaut du benchmark."""
+    result = run_python("-m", "benchmarks.bench_startup", "--json")
+    report = json.loads(result.stdout)
+    assert report["status"] == 200
+    assert report["failures"] == [], report
+    assert result.returncode == 0
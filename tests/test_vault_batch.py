@@ -0,0 +1,135 @@
+"""Lots d'opérations sur le coffre (`vault_batch.apply_batch`)."""
+
+from sqlalchemy.orm import Session
+
+from app.dto.passwords import BatchAdd, BatchDelete, BatchUpdate, PasswordIn, PasswordUpdate
+from app.models import PasswordEntry
+from app.models.user import User
+from app.services import autofill, search_index
+from app.services.crypto import PasswordAESEncryption
+from app.services.search_index import SearchIndexes
+from app.services.vault_batch import apply_batch
+
+
+def add(title: str, url: str = "") -> BatchAdd:
+    """Opération de création."""
+    return BatchAdd(op="add", data=PasswordIn(title=title, url=url, password="Xx1!" + title))
+
+
+def existing(db: Session, user: User, aes_key: bytes, *titles: str) -> list[int]:
+    """Crée des entrées par un premier lot et retourne leurs identifiants."""
+    applied, results = apply_batch(SearchIndexes(), db, user, aes_key, [add(title) for title in titles])
+    assert applied
+    return [result["id"] for result in results]
+
+
+def titles(db: Session, user: User, aes_key: bytes) -> dict[int, str]:
+    """Titres déchiffrés des entrées de l'utilisateur, par identifiant."""
+    entries = db.query(PasswordEntry).filter(PasswordEntry.user_id == user.id)
+    return {entry.id: PasswordAESEncryption.decrypt_password(entry.title, aes_key) for entry in entries}
+
+
+def test_inserted_ids_follow_operation_order(db: Session, user: User, aes_key: bytes) -> None:
+    """Chaque création reçoit l'identifiant de sa propre ligne (INSERT ... RETURNING ordonné)."""
+    names = [f"Site {n}" for n in range(25)]
+    applied, results = apply_batch(SearchIndexes(), db, user, aes_key, [add(name) for name in names])
+
+    assert applied
+    assert [result["status"] for result in results] == [201] * len(names)
+    stored = titles(db, user, aes_key)
+    assert [stored[result["id"]] for result in results] == names
+
+
+def test_atomic_failure_applies_nothing(db: Session, user: User, aes_key: bytes) -> None:
+    """Lot atomique : une opération en échec annule les autres (424), révision inchangée."""
+    (entry_id,) = existing(db, user, aes_key, "Github")
+    revision = user.vault_revision
+
+    applied, results = apply_batch(
+        SearchIndexes(),
+        db,
+        user,
+        aes_key,
+        [
+            add("Gitlab"),
+            BatchUpdate(op="update", id=entry_id, data=PasswordUpdate(title="Renommé")),
+            BatchDelete(op="delete", id=9999),
+        ],
+    )
+
+    assert not applied
+    assert [result["status"] for result in results] == [424, 424, 404]
+    db.expire_all()
+    assert titles(db, user, aes_key) == {entry_id: "Github"}
+    assert user.vault_revision == revision
+
+
+def test_update_after_delete_conflicts(db: Session, user: User, aes_key: bytes) -> None:
+    """Modifier une entrée supprimée plus tôt dans le même lot : 409."""
+    (entry_id,) = existing(db, user, aes_key, "Github")
+    operations = [
+        BatchDelete(op="delete", id=entry_id),
+        BatchUpdate(op="update", id=entry_id, data=PasswordUpdate(title="Renommé")),
+    ]
+
+    applied, results = apply_batch(SearchIndexes(), db, user, aes_key, operations)
+    assert not applied
+    assert [result["status"] for result in results] == [424, 409]
+
+    applied, results = apply_batch(SearchIndexes(), db, user, aes_key, operations, atomic=False)
+    assert applied
+    assert [result["status"] for result in results] == [204, 409]
+    assert titles(db, user, aes_key) == {}
+
+
+def test_non_atomic_applies_valid_operations(db: Session, user: User, aes_key: bytes) -> None:
+    """Lot non atomique : les opérations valides sont enregistrées, les autres signalées."""
+    (entry_id,) = existing(db, user, aes_key, "Github")
+    revision = user.vault_revision
+
+    applied, results = apply_batch(
+        SearchIndexes(),
+        db,
+        user,
+        aes_key,
+        [add("Gitlab"), BatchDelete(op="delete", id=9999), BatchDelete(op="delete", id=entry_id)],
+        atomic=False,
+    )
+
+    assert applied
+    assert [result["status"] for result in results] == [201, 404, 204]
+    assert titles(db, user, aes_key) == {results[0]["id"]: "Gitlab"}
+    db.refresh(user)
+    assert user.vault_revision == revision + 1
+
+
+def test_search_index_and_domain_tags_follow_batch(db: Session, user: User, aes_key: bytes) -> None:
+    """Le lot met à jour l'index de recherche ouvert et les empreintes de domaine."""
+    indexes = SearchIndexes()
+    github, bitbucket = existing(db, user, aes_key, "Github", "Bitbucket")
+    index = search_index.ensure_index(indexes, db, user, aes_key)
+    builds = indexes.builds
+
+    applied, results = apply_batch(
+        indexes,
+        db,
+        user,
+        aes_key,
+        [
+            add("Gitlab", "https://login.gitlab.co.uk/session"),
+            BatchUpdate(op="update", id=bitbucket, data=PasswordUpdate(title="Gitea")),
+            BatchDelete(op="delete", id=github),
+        ],
+    )
+    assert applied
+    gitlab = results[0]["id"]
+
+    db.refresh(user)
+    assert search_index.ensure_index(indexes, db, user, aes_key) is index
+    assert indexes.builds == builds
+    assert sorted(index.search("git")) == sorted([gitlab, bitbucket])
+    assert index.search("github") == []
+
+    domain, views = autofill.find_entries(db, user.id, aes_key, "https://www.gitlab.co.uk/", ("title",))
+    assert domain == "gitlab.co.uk"
+    assert [view.id for view in views] == [gitlab]